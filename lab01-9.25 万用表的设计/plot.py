@@ -1,11 +1,23 @@
-import matplotlib.pyplot as plt
 import numpy as np
-import cv2
-from matplotlib.ticker import MaxNLocator
+import sys
+from functools import partial
+from pathlib import Path
 
-# 设置中文显示
-plt.rcParams["font.family"] = ["SimHei"]
-plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
+ROOT = str(Path(__file__).resolve().parents[1])  # 仓库根目录，用于导入公共模块phylab
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from phylab.export import drop_alpha, export_figure
+from phylab.figpool import FigurePool, Layout
+from phylab.runtime import configure, lazy
+from phylab.trace import stage
+
+ticker = lazy("matplotlib.ticker")
+
+# 设置中文显示（自动选用已安装的中文字体）并关闭unicode负号；图形不经过pyplot创建
+configure()
+
+# 同尺寸的图复用同一个图形，只更新线条数据和文字
+FIGURES = FigurePool()
 
 def plot_experiment(data_x, data_y, labels, title, x_label, y_label, 
                     figsize=(10, 10), marker='o', linestyle='-', 
@@ -30,43 +42,50 @@ def plot_experiment(data_x, data_y, labels, title, x_label, y_label,
     save_path: 保存图片路径，None则不保存
     show: 是否显示图表
     """
-    plt.figure(figsize=figsize)
-    
-    # 绘制多条线
-    for y, label in zip(data_y, labels):
-        plt.plot(data_x, y, marker=marker, linestyle=linestyle, 
-                 linewidth=linewidth, markersize=markersize, label=label)
-    
-    # 设置标题和标签
-    plt.title(title, fontsize=14)
-    plt.xlabel(x_label, fontsize=12)
-    plt.ylabel(y_label, fontsize=12)
-    
-    # 设置网格
-    if grid:
-        plt.grid(True, linestyle='--', alpha=0.7)
-    
-    # 设置图例
-    if labels:
-        plt.legend(fontsize=10)
-    
-    # 设置坐标轴刻度为整数（如果适用）
-    if all(isinstance(x, (int, np.integer)) for x in data_x):
-        plt.gca().xaxis.set_major_locator(MaxNLocator(integer=True))
-    
-    # 调整布局
-    plt.tight_layout()
-    
-    # 保存图片
-    if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        # 使用OpenCV读取并重新保存（如果需要）
-        img = cv2.imread(save_path)
-        if img is not None:
-            cv2.imwrite(save_path, img)
-    
+    stage("render")
+    with FIGURES.figure(Layout(figsize=tuple(figsize))) as pf:
+        # 绘制多条线
+        for i, (y, label) in enumerate(zip(data_y, labels)):
+            pf.line(f"line{i}", data_x, y, marker=marker, linestyle=linestyle,
+                    linewidth=linewidth, markersize=markersize, label=label,
+                    color=f"C{i}")
+
+        # 设置标题和标签
+        pf.text("title", title, fontsize=14)
+        pf.text("xlabel", x_label, fontsize=12)
+        pf.text("ylabel", y_label, fontsize=12)
+
+        # 设置网格（图形会被复用，不画网格时要清除上一次留下的网格）
+        if grid:
+            pf.ax.grid(True, linestyle='--', alpha=0.7)
+        else:
+            pf.ax.grid(False)
+
+        # 设置图例
+        if labels:
+            pf.legend(fontsize=10)
+
+        # 设置坐标轴刻度为整数（如果适用）
+        if all(isinstance(x, (int, np.integer)) for x in data_x):
+            pf.ax.xaxis.set_major_locator(ticker.MaxNLocator(integer=True))
+        else:
+            pf.ax.xaxis.set_major_locator(ticker.AutoLocator())
+
+        # 调整布局（文字和坐标范围不变时沿用上次的布局）
+        pf.finish()
+
+        stage("save")
+        # 保存图片（渲染一次，去掉透明通道后直接编码为RGB图片）
+        if save_path:
+            export_figure(pf.fig, save_path, dpi=300, postprocess=[drop_alpha])
+
+
+def figure_specs():
+    """
+    返回全部校准曲线的plot_experiment参数列表，每个元素对应一张图
+    """
+    specs = []
 
-def main():
     # 1. 改装5mA量程的电流表并校准数据
     current_standard = [1.00, 2.00, 3.00, 4.00, 5.00]  # I准/mA
     current_measured = [0.21, 0.41, 0.61, 0.80, 0.98]  # I测/mA
@@ -74,7 +93,7 @@ def main():
     current_error = [0.05, 0.05, 0.05, 0.00, -0.10]    # ΔI/mA
     
     # 绘制电流表校准曲线（补充labels参数，单条线用单元素列表）
-    plot_experiment(
+    specs.append(dict(
         data_x=current_standard,
         data_y=[current_modified],
         labels=['改装后电流'],  # 补充标签
@@ -83,10 +102,10 @@ def main():
         y_label='电流值 (mA)',
         marker='o',  # 单条线无需列表
         save_path='5mA.png'
-    )
+    ))
     
     # 新增：电流表误差ΔI与标准电流I准的关系曲线
-    plot_experiment(
+    specs.append(dict(
         data_x=current_standard,
         data_y=[current_error],
         labels=['电流误差ΔI'],
@@ -96,7 +115,7 @@ def main():
         marker='o',
         save_path='5mA_error.png',
         figsize=(10,6)
-    )
+    ))
 
     # 2. 改装5V量程的电压表并校准数据
     voltage_standard = [1.00, 2.00, 3.00, 4.00, 5.00]  # V准/V
@@ -105,7 +124,7 @@ def main():
     voltage_error = [0.00, 0.00, -0.05, -0.10, -0.10]  # ΔV/V
     
     # 绘制电压表校准曲线（补充labels参数）
-    plot_experiment(
+    specs.append(dict(
         data_x=voltage_standard,
         data_y=[voltage_modified],
         labels=['改装后电压'],  # 补充标签
@@ -114,10 +133,10 @@ def main():
         y_label='电压值(V)',
         marker='o',  # 单条线无需列表
         save_path='5V.png'
-    )
+    ))
 
     # 新增：电压表误差ΔV与标准电压V准的关系曲线
-    plot_experiment(
+    specs.append(dict(
         data_x=voltage_standard,
         data_y=[voltage_error],
         labels=['电压误差ΔV'],
@@ -127,7 +146,7 @@ def main():
         marker='o',
         save_path='5V_error.png',
         figsize=(10,6)
-    )
+    ))
     
     # 3. 改装欧姆表数据
     resistance = [0, 100, 200, 300, 400, 500, 600, 700, 
@@ -136,7 +155,7 @@ def main():
                       0.28, 0.26, 0.23, 0.14, 0.10, 0.06, 0.04, 0.02]  # 表头电流I/mA
     
     # 绘制欧姆表曲线
-    plot_experiment(
+    specs.append(dict(
         data_x=resistance,
         data_y=[current_ohmmeter],
         labels=['表头电流'],
@@ -145,7 +164,7 @@ def main():
         y_label='表头电流I (mA)',
         marker='o',
         save_path='R.png'
-    )
+    ))
 
     # 4. 改装欧姆表数据（x轴取lg10处理）
     resistance_safe = resistance[1:]  
@@ -153,7 +172,7 @@ def main():
     log_resistance = np.log10(resistance_safe)  # 对阻值取lg10
     
     # 绘制x轴取lg10后的欧姆表曲线
-    plot_experiment(
+    specs.append(dict(
         data_x=log_resistance,
         data_y=[current_ohmmeter_safe],
         labels=['表头电流'],
@@ -162,7 +181,21 @@ def main():
         y_label='表头电流I (mA)',
         marker='o',
         save_path='R_log.png'  # 保存为新文件，避免覆盖原图表
-    )
+    ))
+    return specs
+
+
+def plot_jobs():
+    """
+    返回 {图片文件名: 绘图函数}，每张图可独立绘制（供phylab.runner并行调度）
+    """
+    return {spec['save_path']: partial(plot_experiment, **spec)
+            for spec in figure_specs()}
+
+
+def main():
+    for job in plot_jobs().values():
+        job()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
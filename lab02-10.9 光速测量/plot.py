@@ -1,14 +1,25 @@
 # -*- coding: utf-8 -*-
-import matplotlib.pyplot as plt
+import sys
+from pathlib import Path
+
 import numpy as np
-import pandas as pd
-from matplotlib.ticker import MaxNLocator
 from typing import Optional
 
+ROOT = str(Path(__file__).resolve().parents[1])  # 仓库根目录，用于导入公共模块phylab
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from phylab.bootstrap import LinearStatistic, bootstrap
+from phylab.decimate import plot_decimated
+from phylab.lightspeed import C_FACTOR, C_TRUE, LightSpeedFit, fit_light_speed
+from phylab.runtime import lazy, pyplot
+from phylab.trace import stage
+from phylab.uncertainty import Normal, propagate
+from phylab.xlsx_cache import MissingColumnsError, read_columns
+
 
-# 中文显示配置（适配Windows终端）
-plt.rcParams["font.family"] = ["SimHei"]
-plt.rcParams['axes.unicode_minus'] = False
+# 中文显示配置（自动选用已安装的中文字体）；matplotlib在开始画图时才导入
+plt = pyplot()
+ticker = lazy("matplotlib.ticker")
 
 
 def plot_delta_s_delta_t(excel_path: str,
@@ -27,93 +38,62 @@ def plot_delta_s_delta_t(excel_path: str,
                          save_path: Optional[str] = "ts.png",
                          show: bool = True,
                          sort_ascending: bool = True,
-                         c_true: float = 2.998e8) -> None:  # 光速准确值（m/s）
+                         c_true: float = C_TRUE) -> LightSpeedFit:  # 光速准确值（m/s）
     """
     适配说明：
     1. Excel列名要求：Δs列→"delta_s_cm"，Δt'列→"delta_t_ns"（纯英文，无特殊符号）
     2. 用"delta_s"替代"Δs"、"R^2"替代"R²"，避免GBK编码冲突
     3. 新增功能：考虑Δs重复点的权重（重复次数越多，权重越大）
+    4. 返回LightSpeedFit拟合结果对象，便于批量处理时直接取用
     """
     # -------------------------- 1. 读取Excel数据 --------------------------
+    stage("load")
+    # 只读取需要的两列，结果按列缓存到.phylab_cache/，工作簿未变化时不再重新解析
     try:
-        df = pd.read_excel(excel_path, sheet_name=sheet_name, engine="openpyxl")
+        columns = read_columns(excel_path, [delta_s_col, delta_t_col], sheet_name=sheet_name)
     except FileNotFoundError:
         raise FileNotFoundError(f"Excel文件不存在：{excel_path}\n请检查路径（例：D:/实验数据.xlsx）")
     except ValueError as e:
         raise ValueError(f"读取工作表失败：{str(e)}\n请检查工作表名'{sheet_name}'是否正确")
-    
-    # 检查必要列
-    required_cols = [delta_s_col, delta_t_col]
-    missing_cols = [col for col in required_cols if col not in df.columns]
-    if missing_cols:
+    except MissingColumnsError as e:
+        # 检查必要列
         raise KeyError(
-            f"Excel缺少列：{missing_cols}\n"
+            f"Excel缺少列：{e.missing}\n"
             f"请修改Excel列名：\n"
             f"- 原Δs列 → 改名为 'delta_s_cm'\n"
             f"- 原Δt'列 → 改名为 'delta_t_ns'"
         )
     
     # 提取数据（去空值）
-    delta_s = df[delta_s_col].dropna().values  # 自变量：delta_s（cm）
-    delta_t = df[delta_t_col].dropna().values  # 因变量：delta_t'（ns）
+    delta_s = columns[delta_s_col][~np.isnan(columns[delta_s_col])]  # 自变量：delta_s（cm）
+    delta_t = columns[delta_t_col][~np.isnan(columns[delta_t_col])]  # 因变量：delta_t'（ns）
     if len(delta_s) != len(delta_t):
         raise ValueError(f"delta_s数据长度（{len(delta_s)}）与delta_t'数据长度（{len(delta_t)}）不匹配")
 
 
-    # -------------------------- 2. 按delta_s升序排序 --------------------------
-    paired_data = sorted(zip(delta_s, delta_t), key=lambda x: x[0], reverse=not sort_ascending)
-    delta_s_sorted = np.array([p[0] for p in paired_data])  # 排序后delta_s（x轴）
-    delta_t_sorted = np.array([p[1] for p in paired_data])  # 排序后delta_t'（y轴）
-
+    # -------------------------- 2~3. 排序、重复点计权、加权线性拟合与光速计算 --------------------------
+    stage("fit")
+    # 全部向量化完成（见phylab.lightspeed），重复次数越多的delta_s权重越大
+    result = fit_light_speed(delta_s, delta_t, sort_ascending=sort_ascending, c_true=c_true)
+    delta_s_sorted, delta_t_sorted = result.delta_s, result.delta_t
+    delta_t_fit = result.fitted
 
-    # -------------------------- 新增：计算权重（重复点权重更高） --------------------------
-    # 统计每个delta_s的出现次数作为权重（重复次数越多，权重越大）
-    unique_s, counts = np.unique(delta_s_sorted, return_counts=True)
-    weight_dict = {s: cnt for s, cnt in zip(unique_s, counts)}
-    weights = np.array([weight_dict[s] for s in delta_s_sorted])  # 生成与数据点对应的权重数组
     # 移除emoji，避免GBK编码错误
     print(f"数据点权重统计：重复的Δs值将被赋予更高权重")
-    for s, cnt in zip(unique_s, counts):
-        if cnt > 1:
-            print(f"   - Δs={s}cm 出现{cnt}次，权重为{cnt}")
-
-
-    # -------------------------- 3. 加权线性拟合+R^2+不确定度计算 --------------------------
-    # 3.1 加权线性拟合：delta_t' = k×delta_s + b（加入权重参数w）
-    k, b = np.polyfit(delta_s_sorted, delta_t_sorted, deg=1, w=weights, cov=False)
-    k, b = round(k, 6), round(b, 4)
-    
-    # 拟合值与残差
-    delta_t_fit = k * delta_s_sorted + b
-    residuals = delta_t_sorted - delta_t_fit
-
-
-    # 3.2 R^2拟合优度（用R^2替代R²，避免编码问题）
-    delta_t_mean = np.mean(delta_t_sorted)
-    ss_tot = np.sum((delta_t_sorted - delta_t_mean) **2)
-    ss_res = np.sum(residuals** 2)
-    r2 = 1 - (ss_res / ss_tot) if ss_tot != 0 else 0.0
-    r2 = round(r2, 6)
-
-
-    # 3.3 拟合参数不确定度（使用加权拟合的协方差）
-    coeffs, cov = np.polyfit(delta_s_sorted, delta_t_sorted, deg=1, w=weights, cov=True)
-    sigma_k = np.sqrt(cov[0, 0])  # 斜率标准误差
-    sigma_b = np.sqrt(cov[1, 1])  # 截距标准误差
-    sigma_k, sigma_b = round(sigma_k, 8), round(sigma_b, 6)
-
-
-    # 3.4 光速计算（物理关系：delta_t' = delta_s/c → c = delta_s/delta_t' = 1/k × 1e7）
-    c_meas = (1 / k) * 1e7  # 测量光速（m/s）
-    sigma_c = (sigma_k / (k ** 2)) * 1e7  # 光速标准误差
-    rel_uncertainty = (sigma_c / c_meas) * 100 if c_meas != 0 else 0.0  # 相对不确定度
-    rel_deviation = ((c_meas - c_true) / c_true) * 100  # 与准确值偏差
-    
-    # 保留有效数字
-    c_meas = round(c_meas, 2)
-    sigma_c = round(sigma_c, 2)
-    rel_uncertainty = round(rel_uncertainty, 4)
-    rel_deviation = round(rel_deviation, 4)
+    repeated = result.counts > 1
+    for s, cnt in zip(result.unique_s[repeated][:20], result.counts[repeated][:20]):
+        print(f"   - Δs={s:g}cm 出现{cnt}次，权重为{cnt}")
+    if repeated.sum() > 20:
+        print(f"   - ……共{repeated.sum()}个重复的Δs值")
+
+    # 保留有效数字（仅用于输出）
+    k, b = round(result.line.k, 6), round(result.line.b, 4)
+    r2 = round(result.line.r2, 6)
+    sigma_k, sigma_b = round(result.line.sigma_k, 8), round(result.line.sigma_b, 6)
+    c_meas = round(result.c_meas, 2)
+    sigma_c = round(result.sigma_c, 2)
+    rel_uncertainty = round(result.rel_uncertainty, 4)
+    rel_deviation = round(result.rel_deviation, 4)
 
 
     # -------------------------- 4. 终端输出（纯文本，无GBK编码冲突） --------------------------
@@ -134,22 +114,35 @@ def plot_delta_s_delta_t(excel_path: str,
     print(f"   - 测量标准误差σ_c：{sigma_c:.2e} m/s")
     print(f"   - 相对不确定度：{rel_uncertainty}%（精度指标，越小越好）")
     print(f"   - 与准确值的相对偏差：{rel_deviation}%（准确度指标，绝对值越小越好）")
+    # σ_c = σ_k/k²×10⁷ 只是一阶近似，用蒙特卡洛法复核（c = 10⁷/k 对k是非线性的）
+    mc = propagate(lambda k: C_FACTOR / k, {"k": Normal(result.line.k, result.line.sigma_k)}, seed=0)
+    print(f"   - 蒙特卡洛法（10⁶次抽样）：c = {mc.mean:.4e} m/s，u_c = {mc.std:.2e} m/s，"
+          f"95%包含区间 [{mc.interval[0]:.4e}, {mc.interval[1]:.4e}] m/s")
+    print(f"   - 与一阶公式比较：{'；'.join(mc.notes) if mc.notes else '一致'}")
+    # σ_k本身来自残差的渐近公式；bootstrap对数据点重抽样（权重随点一起抽取），不依赖正态假设
+    boot = bootstrap(LinearStatistic(result.delta_s, result.delta_t, result.weights,
+                                     derived={"c": lambda k, b: C_FACTOR / k}),
+                     len(result.delta_s), n_resamples=10 ** 5, seed=0)
+    print(f"   - bootstrap（10⁵次重抽样）：{boot.format('k', '.6g')}")
+    print(f"     {boot.format('c', '.4e')}（单位m/s）")
     print("=" * 85)
 
 
     # -------------------------- 5. 绘图（无特殊符号，避免编码问题） --------------------------
+    stage("render")
     plt.figure(figsize=figsize)
     
-    # 绘制原始数据连线
-    plt.plot(delta_s_sorted, delta_t_sorted,
-             marker=marker, linestyle=linestyle,
-             linewidth=linewidth, markersize=markersize,
-             color='#1f77b4', label='原始数据点', zorder=3)
+    # 绘制原始数据连线（点数超过像素预算时降采样，拟合仍使用全部数据）
+    _, raw_points = plot_decimated(plt.gca(), delta_s_sorted, delta_t_sorted,
+                                   marker=marker, linestyle=linestyle,
+                                   linewidth=linewidth, markersize=markersize,
+                                   color='#1f77b4', label='原始数据点', zorder=3)
     
     # 绘制加权线性拟合线（图例用R^2）
-    plt.plot(delta_s_sorted, delta_t_fit,
-             linestyle='--', linewidth=linewidth+1,
-             color='#ff7f0e', label=f'加权拟合线（Δt\'={k}×Δs+{b}，R^2={r2}）', zorder=4)
+    plot_decimated(plt.gca(), delta_s_sorted, delta_t_fit,
+                   linestyle='--', linewidth=linewidth+1,
+                   color='#ff7f0e', label=f'加权拟合线（Δt\'={k}×Δs+{b}，R^2={r2}）', zorder=4)
+    print(f"绘图点数：{raw_points}")
     
     # 图表样式
     plt.title(title, fontsize=14, pad=20, fontweight='bold')
@@ -159,17 +152,19 @@ def plot_delta_s_delta_t(excel_path: str,
     plt.legend(fontsize=10, loc='upper left', frameon=True, shadow=True)
     
     # 坐标轴整数刻度
-    plt.gca().xaxis.set_major_locator(MaxNLocator(integer=True))
-    plt.gca().yaxis.set_major_locator(MaxNLocator(integer=True))
+    plt.gca().xaxis.set_major_locator(ticker.MaxNLocator(integer=True))
+    plt.gca().yaxis.set_major_locator(ticker.MaxNLocator(integer=True))
     
     # 保存与显示
     plt.tight_layout()
+    stage("save")
     if save_path:
         plt.savefig(save_path, dpi=300, bbox_inches='tight', facecolor='white')
         # 移除emoji，避免GBK编码错误
         print(f"\n图表已保存至：{save_path}")
     if show:
         plt.show()
+    return result
 
 
 # -------------------------- 代码调用入口 --------------------------
@@ -0,0 +1,60 @@
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = str(Path(__file__).resolve().parents[1])  # 仓库根目录，用于导入公共模块phylab
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from phylab.scope import open_capture
+from phylab.sound import sound_speed, time_delays
+from phylab.trace import stage
+from phylab.xlsx_cache import read_columns
+
+# ---------------------- 实验参数 ----------------------
+FREQUENCY = 39.90e3   # 信号源输出的谐振频率（Hz）
+T_CELSIUS = 25.1      # 室温平均值（°C）
+V_THEORY = 331.45 * np.sqrt(1 + T_CELSIUS / 273.15)
+# 相位差法的原始波形（可选）：在记录L₁…L₁₂的同一批位置（李萨如图形成直线处）各采集一个文件，
+# 如 captures/L_11.155.csv、captures/L_15.430.csv …，文件名中为接收端位置读数（mm）；
+# 相邻位置相位差π、间距为λ/2，展开相位时按位置顺序每个文件增加半个周期，不能直接np.unwrap。
+# CH1接发射端、CH2接接收端；CSV第一列为时间，二进制文件需填写采样率
+CAPTURES = Path("captures")
+SAMPLE_RATE = None
+TIME_COLUMN = 0
+
+# ---------------------- 1. 读取数据 ----------------------
+stage("load")
+files = sorted(CAPTURES.glob("L_*.*"), key=lambda p: float(re.findall(r"[\d.]+", p.stem)[0]))
+if files:
+    caps = [open_capture(p, SAMPLE_RATE, time_column=TIME_COLUMN) for p in files]
+    n = min(c.n_samples for c in caps)
+    fs = caps[0].sample_rate
+    cols = [c.columns or [0, 1] for c in caps]
+    tx = np.stack([c.data[:n, j[0]] for c, j in zip(caps, cols)])
+    rx = np.stack([c.data[:n, j[1]] for c, j in zip(caps, cols)])
+    L = np.array([float(re.findall(r"[\d.]+", p.stem)[0]) for p in files])
+    source = f"原始波形（{len(files)}个位置，每个 {n} 点）"
+else:
+    L = read_columns("实验数据.xlsx", ["接收端位置读数/mm"], sheet_name="相位差法")["接收端位置读数/mm"]
+    source = "实验数据.xlsx的位置读数"
+
+# ---------------------- 2. 延迟与声速 ----------------------
+stage("fit")
+# 每一行比上一行相位差增加π（一、三象限与二、四象限直线交替），即延迟增加半个周期
+half_periods = np.arange(L.size) / (2 * FREQUENCY)
+if files:
+    delay = time_delays(tx, rx, fs, max_delay=1 / FREQUENCY)
+    result = sound_speed(L * 1e-3, delay, frequency=FREQUENCY, expected=half_periods)
+else:
+    result = sound_speed(L * 1e-3, half_periods, frequency=FREQUENCY, unwrap=False)
+
+# ---------------------- 3. 输出 ----------------------
+print("=" * 60)
+print(f"相位差法：延迟对距离直线拟合（数据来源：{source}）")
+print(f"   斜率 1/v = {result.fit.k * 1e3:.5f} ms/m，R² = {result.fit.r2:.6f}")
+print(f"   声速 v = {result.v:.2f} ± {result.sigma_v:.2f} m/s")
+print(f"   波长 λ = v/f = {result.wavelength * 1e3:.4f} ± {result.sigma_wavelength * 1e3:.4f} mm")
+print(f"   理论值 v = {V_THEORY:.2f} m/s（t = {T_CELSIUS}°C），相对误差 E = {abs(result.v / V_THEORY - 1):.2%}")
+print("=" * 60)
@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = str(Path(__file__).resolve().parents[1])  # 仓库根目录，用于导入公共模块phylab
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from phylab.successive import successive_diff
+from phylab.trace import stage
+from phylab.xlsx_cache import read_columns
+
+# ---------------------- 实验参数 ----------------------
+FREQUENCY = 39.90e3   # 信号源输出的谐振频率（Hz）
+T_CELSIUS = 25.1      # 室温平均值（°C）
+V_THEORY = 331.45 * np.sqrt(1 + T_CELSIUS / 273.15)
+METHODS = ["驻波法", "相位差法"]   # 实验数据.xlsx的工作表名；两种方法相邻读数都相隔λ/2
+COLUMN = "接收端位置读数/mm"
+
+# ---------------------- 1. 读取数据 ----------------------
+stage("load")
+L = np.stack([read_columns("实验数据.xlsx", [COLUMN], sheet_name=m)[COLUMN] for m in METHODS])
+
+# ---------------------- 2. 逐差法 ----------------------
+stage("fit")
+# 两种方法一次处理：(L₇+…+L₁₂ − L₁−…−L₆)/36 = λ/2
+r = successive_diff(L, derived={"lambda": lambda s: 2 * s, "v": lambda s: 2 * s * 1e-3 * FREQUENCY})
+
+# ---------------------- 3. 输出 ----------------------
+print("=" * 60)
+for i, name in enumerate(METHODS):
+    lam, u_lam = r.derived["lambda"][i], r.u_derived["lambda"][i]
+    v, u_v = r.derived["v"][i], r.u_derived["v"][i]
+    print(f"{i + 1}. {name}：λ/2 = {r.slope[i]:.5f} mm，λ = {lam:.4f} ± {u_lam:.4f} mm")
+    print(f"   v = λf = {v:.2f} ± {u_v:.2f} m/s，相对误差 E = {abs(v / V_THEORY - 1):.2%}")
+print(f"理论值 v = {V_THEORY:.2f} m/s（t = {T_CELSIUS}°C），不确定度只含A类")
+print("=" * 60)
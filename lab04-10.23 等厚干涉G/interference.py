@@ -0,0 +1,45 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = str(Path(__file__).resolve().parents[1])  # 仓库根目录，用于导入公共模块phylab
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from phylab.successive import successive_diff
+from phylab.trace import stage
+from phylab.typst_tables import load_table
+
+# ---------------------- 实验参数 ----------------------
+WAVELENGTH = 589.3e-9   # 钠光波长（m）
+L_WEDGE = 44e-3         # 劈尖到待测薄膜的距离（m）
+RING_SPAN = 6           # 牛顿环相隔6圈求直径平方差
+
+# ---------------------- 1. 读取数据 ----------------------
+stage("load")
+table_1 = load_table("lab4", "table_1")
+table_2 = load_table("lab4", "table_2")
+s = np.r_[table_1["标尺读数$s\\/m m$"], table_1["标尺读数$s\\/m m$#2"]]   # s₁ … s₂₀
+k = table_2["圈数号($k$)"]
+d2 = (table_2["$d_右\\/m m$"] - table_2["$d_左\\/m m$"]) ** 2
+
+# ---------------------- 2. 劈尖：条纹间距与薄膜厚度 ----------------------
+stage("fit")
+# s̄ = Σ(s_{x+10} − s_x)/10 为10条条纹的间距，slope为相邻条纹间距；e = nLλ/2，n = 1/slope
+wedge = successive_diff(s, derived={"e": lambda d: L_WEDGE * WAVELENGTH / (2 * d * 1e-3)})
+
+# ---------------------- 3. 牛顿环：曲率半径 ----------------------
+# 圈数号从17递减到6，step = −1；slope = (d_m² − d_n²)/(m − n)，R = slope/(4λ)
+rings = successive_diff(d2, span=RING_SPAN, step=k[1] - k[0],
+                        derived={"R": lambda q: q * 1e-6 / (4 * WAVELENGTH)})
+
+# ---------------------- 4. 输出 ----------------------
+print("=" * 60)
+print("1. 劈尖干涉测薄膜厚度")
+print(f"   s̄ = Σ(s_(x+10) − s_x)/10 = {wedge.mean:.4f} ± {wedge.u_a:.4f} mm")
+print(f"   e = {wedge.derived['e'] * 1e5:.3f} ± {wedge.u_derived['e'] * 1e5:.3f} × 10⁻⁵ m")
+print("-" * 60)
+print("2. 牛顿环测平凸透镜曲率半径")
+print(f"   d_(k+{RING_SPAN})² − d_k² 平均值 = {-rings.mean:.3f} ± {rings.u_a:.3f} mm²")
+print(f"   R = {rings.derived['R']:.4f} ± {rings.u_derived['R']:.4f} m")
+print("=" * 60)
@@ -1,32 +1,49 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.optimize import curve_fit
+import sys
+from pathlib import Path
 
-# 设置中文显示（关键修正）
-plt.rcParams["font.family"] = ["SimHei"]  # 支持中文的字体
-plt.rcParams["axes.unicode_minus"] = False  # 解决负号显示问题
+ROOT = str(Path(__file__).resolve().parents[1])  # 仓库根目录，用于导入公共模块phylab
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from phylab.nlfit import CAUCHY, fit_batch
+from phylab.runtime import pyplot
+from phylab.trace import stage
+
+# 设置中文显示（自动选用已安装的中文字体，并解决负号显示问题）
+plt = pyplot()
 
 # 1. 数据准备（提取波长和折射率，统一单位）
+stage("load")
 # 波长单位：nm -> m（1nm=1e-9m），折射率直接取用
 wavelength_nm = np.array([404.7, 435.8, 546.0, 577.1])  # 波长（nm）
 wavelength_m = wavelength_nm * 1e-9  # 转换为米
 n = np.array([1.7078, 1.6990, 1.6765, 1.6728])  # 折射率
 
-# 2. 定义柯西色散公式：n(λ) = a + b/λ² + c/λ⁴
-def cauchy(lam, a, b, c):
-    return a + b / (lam**2) + c / (lam**4)
-
-# 3. 曲线拟合（使用最小二乘法）
-popt, pcov = curve_fit(cauchy, wavelength_m, n)
-a, b, c = popt  # 拟合得到的参数
+# 2. 柯西色散公式 n(λ) = a + b/λ² + c/λ⁴ 对参数线性，
+# 3. 按列缩放后用最小二乘闭式求解（λ以米为单位时b、c量级相差悬殊）
+stage("fit")
+fit = fit_batch(CAUCHY, wavelength_m, n)
+a, b, c = fit.params[0]  # 拟合得到的参数
+sa, sb, sc = fit.stderr[0]
 
 # 4. 输出拟合参数
 print("柯西色散公式拟合参数：")
 print(f"a = {a:.6f}")
 print(f"b = {b:.2e} m²")  # 单位：m²（因λ单位为m）
 print(f"c = {c:.2e} m⁴")  # 单位：m⁴
+print(f"标准差：σa = {sa:.2e}, σb = {sb:.2e} m², σc = {sc:.2e} m⁴, R² = {fit.r2[0]:.6f}")
+
+# 钠黄光589.3nm处的折射率n_D，标准差按参数协方差一阶传递（∂n/∂(a, b, c) = (1, 1/λ², 1/λ⁴)）
+# 只有4个数据点拟合3个参数，自由度仅为1：σ由1个残差自由度估计，本身很不可靠，
+# 95%置信区间须乘t分布分位数 t(0.975, 1) ≈ 12.7；点数太少，不做bootstrap
+LAMBDA_D = 589.3e-9
+grad = np.array([1.0, LAMBDA_D ** -2, LAMBDA_D ** -4])
+n_D = grad @ fit.params[0]
+s_nD = np.sqrt(grad @ fit.cov[0] @ grad)
+print(f"n_D(589.3nm) = {n_D:.5f} ± {s_nD:.5f}（渐近标准差，自由度 = {fit.dof[0]:.0f}，仅供参考）")
 
 # 5. 绘制色散曲线
+stage("render")
 plt.figure(figsize=(8, 5))
 
 # 绘制原始数据点
@@ -35,7 +52,7 @@ plt.scatter(wavelength_nm, n, color='red', marker='o', label='实验数据')
 # 绘制拟合曲线（用密集波长点生成曲线）
 lam_fit = np.linspace(min(wavelength_nm), max(wavelength_nm), 100)  # 拟合区间
 lam_fit_m = lam_fit * 1e-9  # 转换为米
-n_fit = cauchy(lam_fit_m, a, b, c)
+n_fit = fit(lam_fit_m)[0]
 plt.plot(lam_fit, n_fit, color='blue', linestyle='-', label='柯西公式拟合曲线')
 
 # 图表设置
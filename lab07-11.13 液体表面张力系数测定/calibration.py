@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+
+ROOT = str(Path(__file__).resolve().parents[1])  # 仓库根目录，用于导入公共模块phylab
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from phylab.successive import successive_diff
+from phylab.trace import stage
+from phylab.typst_tables import load_table
+
+# ---------------------- 实验参数 ----------------------
+M0 = 500.00e-6   # 每个砝码的质量（kg）
+G = 9.793        # 重力加速度（m/s²）
+
+# ---------------------- 1. 读取数据 ----------------------
+stage("load")
+table_1 = load_table("lab7", "table_1")
+V_up = table_1["增重读数$V_i^' (m V)$"]
+V_down = table_1["减重读数$V_i^'' (m V)$"]
+V = (V_up + V_down) / 2
+
+# ---------------------- 2. 逐差法求转换系数 ----------------------
+stage("fit")
+# δV_i = V_(i+4) − V_i，每个砝码对应 δV̄ = ΣδV_i/16，K = m₀g/δV̄
+r = successive_diff(V, derived={"K": lambda dv: M0 * G / dv})
+
+# ---------------------- 3. 输出 ----------------------
+print("=" * 60)
+print("逐差 δV_i = V_(i+4) − V_i：" + "，".join(f"{d:.2f}" for d in r.diffs) + " mV")
+print(f"每个砝码对应 δV̄ = {r.slope:.4f} ± {r.u_slope:.2e} mV（A类）")
+print(f"转换系数 K = m₀g/δV̄ = {r.derived['K'] * 1e3:.4f} ± {r.u_derived['K'] * 1e3:.4f} × 10⁻³ N/mV")
+print("=" * 60)
@@ -1,31 +1,49 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy import stats
+import sys
+from pathlib import Path
+
+ROOT = str(Path(__file__).resolve().parents[1])  # 仓库根目录，用于导入公共模块phylab
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from phylab.bootstrap import LinearStatistic, bootstrap
+from phylab.regression import weighted_linfit
+from phylab.runtime import pyplot
+from phylab.trace import stage
+from phylab.typst_tables import load_table
 
 # -------------------------- 1. 配置中文显示（解决乱码问题）--------------------------
-plt.rcParams['font.sans-serif'] = ['SimHei']  # Windows系统推荐字体（黑体）
-# 若为Mac系统，替换为：plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']
-# 若为Linux系统，替换为：plt.rcParams['font.sans-serif'] = ['WenQuanYi Zen Hei']
-plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示异常问题
-plt.rcParams['text.usetex'] = False  # 禁用LaTeX渲染（避免兼容性问题）
-plt.rcParams['mathtext.fontset'] = 'cm'  # 保留基础数学符号兼容性
+# 中文字体按 黑体(Windows) → Arial Unicode MS(Mac) → 文泉驿(Linux) 等顺序自动选用，并解决负号显示异常问题
+plt = pyplot(rc={
+    'text.usetex': False,  # 禁用LaTeX渲染（避免兼容性问题）
+    'mathtext.fontset': 'cm',  # 保留基础数学符号兼容性
+})
 
 # -------------------------- 2. 整理实验数据 --------------------------
+stage("load")
+# 读取实验报告lab8.typ的表1
+table = load_table("lab8", "table_1")
 # 温度 t (单位：℃)
-t = np.array([24.0, 30.3, 35.0, 39.8, 45.0, 50.3, 55.2, 60.0, 65.3, 70.8])
+t = table["温度$t\\/degree C$"]
 # 电阻 Rx (单位：10^-3 Ω，数据直接对应该量级)
-Rx = np.array([4.595, 4.710, 4.795, 4.885, 4.978, 5.070, 5.160, 5.242, 5.330, 5.420])
+Rx = table["电阻$R_x\\/10^(-3)Omega$"]
 
 # -------------------------- 3. 线性拟合与R²计算 --------------------------
+stage("fit")
 # 拟合方程：R_x = slope·t + intercept（slope单位：10^-3 Ω/℃；intercept单位：10^-3 Ω）
-slope, intercept, r_value, p_value, std_err = stats.linregress(t, Rx)
-R_squared = r_value ** 2  # 决定系数R²
+fit = weighted_linfit(t, Rx)
+slope, intercept = fit.k, fit.b
+R_squared = fit.r2  # 决定系数R²
 
 # 生成拟合线数据（使拟合线更平滑）
 t_fit = np.linspace(t.min() - 1, t.max() + 1, 100)
 Rx_fit = slope * t_fit + intercept  # 拟合线电阻值（单位：10^-3 Ω）
 
+# 斜率与温度系数 α = k/b（R_x = R_0(1 + αt)）的bootstrap置信区间，10⁵次重抽样
+boot = bootstrap(LinearStatistic(t, Rx, derived={"alpha": lambda k, b: k / b}),
+                 len(t), n_resamples=10 ** 5, seed=0)
+
 # -------------------------- 4. 绘制Rx-t曲线 --------------------------
+stage("render")
 plt.figure(figsize=(10, 6))  # 画布大小
 
 # 绘制实验数据散点图
@@ -68,4 +86,7 @@ plt.show()
 print(f"线性拟合方程：R_x = ({slope:.6f}t + {intercept:.3f}) × 10^-3 Ω")
 print(f"决定系数 R² = {R_squared:.6f}")
 print(f"拟合斜率：{slope:.6f} (10^-3 Ω/℃)")
-print(f"拟合截距：{intercept:.3f} (10^-3 Ω)")
\ No newline at end of file
+print(f"拟合截距：{intercept:.3f} (10^-3 Ω)")
+print(f"斜率标准误差：{fit.sigma_k:.6f} (10^-3 Ω/℃)（渐近公式）")
+print(f"bootstrap：{boot.format('k', '.6f')} (10^-3 Ω/℃)")
+print(f"bootstrap：{boot.format('alpha', '.5f', scale=1e3)} (10^-3 /℃)")
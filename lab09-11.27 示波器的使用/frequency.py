@@ -0,0 +1,75 @@
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = str(Path(__file__).resolve().parents[1])  # 仓库根目录，用于导入公共模块phylab
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from phylab.scope import comparison_row, lissajous, lissajous_row, open_capture, relative_error, tones
+from phylab.trace import stage
+from phylab.typst_tables import load_table
+
+# ---------------------- 实验参数 ----------------------
+F_X_NOMINAL = 200.0   # 比较法：信号发生器设定的f_x（Hz）
+F_Y_NOMINAL = 50.0    # 李萨如图形法：信号发生器背后输出的约50Hz电压
+# 示波器导出的原始波形（可选）：compare_n1.csv … compare_n6.csv（最后一个通道为被测信号，文件名中为波形个数n），
+# lissajous_1.csv …（CH1接x、CH2接y）；CSV第一列为时间，二进制文件需填写采样率
+CAPTURES = Path("captures")
+SAMPLE_RATE = None
+TIME_COLUMN = 0
+
+# ---------------------- 1. 读取数据 ----------------------
+stage("load")
+compare_files = sorted(CAPTURES.glob("compare_n*.*"), key=lambda p: int(re.findall(r"\d+", p.stem)[0]))
+lissajous_files = sorted(CAPTURES.glob("lissajous_*.*"))
+table_1 = load_table("lab9", "table_1")
+table_2 = load_table("lab9", "table_2")
+
+# ---------------------- 2. 比较法（table_1） ----------------------
+stage("fit")
+if compare_files:
+    rows_1 = []
+    for path in compare_files:
+        cap = open_capture(path, SAMPLE_RATE, time_column=TIME_COLUMN)
+        (tone,) = tones(cap, (-1,))
+        rows_1.append(comparison_row(tone, int(re.findall(r"\d+", path.stem)[0])))
+    n, f_y, f_x = (np.array(c) for c in zip(*rows_1))
+    source_1 = f"原始波形（{len(compare_files)}个文件）"
+else:
+    n = table_1["波形个数$n$"]
+    f_y = table_1["信号频率$f_y (H z)$"]
+    f_x = f_y / n  # 由信号频率与波形个数重新计算，与表中读数核对
+    source_1 = "实验报告table_1的读数"
+
+# ---------------------- 3. 李萨如图形法（table_2） ----------------------
+if lissajous_files:
+    rows_2 = []
+    for path in lissajous_files:
+        cap = open_capture(path, SAMPLE_RATE, time_column=TIME_COLUMN)
+        fig = lissajous(*tones(cap, (0, 1)))
+        rows_2.append(lissajous_row(fig))
+        print(f"{path.name}：f_y:f_x = {fig.ratio}，相位 {np.degrees(fig.phase):.1f}°，图形翻动频率 {fig.drift:.3g} Hz")
+    ratio, N_y, N_x, f_x2, f_y2 = (np.array(c) for c in zip(*rows_2))
+    source_2 = f"原始波形（{len(lissajous_files)}个文件）"
+else:
+    N_y = table_2["垂直交点数$N_y$"]
+    N_x = table_2["水平交点数$N_x$"]
+    f_x2 = table_2["读出$f_x(H z)$"]
+    f_y2 = f_x2 * N_x / N_y  # f_y:f_x = N_x:N_y
+    ratio = np.array([f"{int(a) // 2}:{int(b) // 2}" for a, b in zip(N_x, N_y)])
+    source_2 = "实验报告table_2的读数"
+
+# ---------------------- 4. 输出 ----------------------
+print("=" * 60)
+print(f"1. 比较法验证 f_y = n·f_x（数据来源：{source_1}）")
+for row in zip(n, f_y, f_x):
+    print(f"   n = {row[0]:.0f}：f_y = {row[1]:.1f} Hz，f_x = {row[2]:.1f} Hz")
+print(f"   平均值 f_x = {np.mean(f_x):.1f} Hz，相对误差 E = {relative_error(f_x, F_X_NOMINAL):.1%}")
+print("-" * 60)
+print(f"2. 李萨如图形测频率（数据来源：{source_2}）")
+for row in zip(ratio, N_y, N_x, f_x2, f_y2):
+    print(f"   f_y:f_x = {row[0]}：N_y = {row[1]:.0f}，N_x = {row[2]:.0f}，f_x = {row[3]:.3f} Hz，f_y = {row[4]:.3f} Hz")
+print(f"   平均值 f_y = {np.mean(f_y2):.3f} Hz，相对误差 E = {relative_error(f_y2, F_Y_NOMINAL):.3%}")
+print("=" * 60)
@@ -1,79 +1,95 @@
-import matplotlib.pyplot as plt
+import sys
+from pathlib import Path
+
 import numpy as np
 
-# ---------------------- 完整30组H-B数据（直接嵌入，无需外部文件）----------------------
-# 磁场强度 H（单位：A/m，第一列数据）
-H = [
-    1983.692308, 1594.153846, 1017.230769, 541.3846154, 0,
-    -490.1538462, -865.3846154, -1153.846154, -1341.230769, -1528.615385,
-    -1644, -1716, -1759.384615, -1874.769231, -2033.538462,
-    -1644, -1254.461538, -865.3846154, -389.5384615, 0,
-    504.4615385, 836.3076923, 1110.461538, 1369.846154, 1542.923077,
-    1658.307692, 1716, 1745.076923, 1802.769231, 1918.153846
-]
-
-# 磁感应强度 B（单位：T，第二列数据，与H一一对应）
-B = [
-    1.348064516, 1.31016129, 1.234677419, 1.159032258, 1.033064516,
-    0.869193548, 0.68016129, 0.478548387, 0.302096774, 0,
-    -0.251935484, -0.718225806, -1.23483871, -1.297741935, -1.335645161,
-    -1.297741935, -1.247419355, -1.196935484, -1.121451613, -1.033225806,
-    -0.869354839, -0.705645161, -0.516612903, -0.277096774, 0,
-    0.302419355, 0.692903226, 1.23483871, 1.28516129, 1.323064516
-]
+ROOT = str(Path(__file__).resolve().parents[1])  # 仓库根目录，用于导入公共模块phylab
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from phylab.decimate import decimate, plot_decimated
+from phylab.hysteresis import loop_batch, loop_crossings, loop_loss
+from phylab.runtime import pyplot
+from phylab.trace import stage
+from phylab.typst_tables import load_table
+from phylab.uncertainty import Uniform, propagate, resolution
+
+plt = pyplot()  # 开始画图时才导入matplotlib，并自动选用中文字体
+
+# ---------------------- 完整30组H-B数据（读取实验报告lab10.typ的表1）----------------------
+# 仪器参数（见实验报告）：N1=N2=150匝，L=0.130m，S=1.24e-4m²，R1=2.5Ω，R2=10kΩ，C=3μF
+N1, N2, L, S = 150, 150, 0.130, 1.24e-4
+R1, R2, C = 2.5, 10e3, 3e-6
+
+stage("load")
+# 由示波器读数换算（表中H、B列只保留了四位有效数字）：H=N1·U_X/(L·R1)，B=R2·C·U_Y/(N2·S)
+table = load_table("lab10", "table_1")
+H = table["$U_X (V)$"] * N1 / (L * R1)  # 磁场强度 H（单位：A/m）
+B = table["$U_Y (m V)$"] * 1e-3 * R2 * C / (N2 * S)  # 磁感应强度 B（单位：T），与H一一对应
 
 # ---------------------- 关键处理：使曲线闭合（首尾点相连）----------------------
-H_closed = H + [H[0]]
-B_closed = B + [B[0]]
-
-# ---------------------- 筛选含0的特殊点（H=0 或 B=0）----------------------
-special_H = []
-special_B = []
-common_H = []
-common_B = []
-for h, b in zip(H, B):
-    if abs(h) < 1e-6 or abs(b) < 1e-6:
-        special_H.append(h)
-        special_B.append(b)
-    else:
-        common_H.append(h)
-        common_B.append(b)
+stage("fit")
+H_closed = np.append(H, H[0])
+B_closed = np.append(B, B[0])
+
+# ---------------------- 过零检测：H=0 与 B=0 的交点 ----------------------
+# 向量化检测变号位置，在相邻采样点间线性插值，不要求采样点恰好为0
+crossings = loop_crossings(H_closed, B_closed)
+
+# 特殊点：交点（红色突出显示）；普通点：排除恰好落在交点上的采样点
+special_H = np.concatenate([np.zeros(len(crossings.remanence)), crossings.coercivity.value])
+special_B = np.concatenate([crossings.remanence.value, np.zeros(len(crossings.coercivity))])
+on_axis = (np.abs(H) < 1e-6) | (np.abs(B) < 1e-6)
+common_H = H[~on_axis]
+common_B = B[~on_axis]
 
 # ---------------------- 核心计算：剩磁、矫顽力、磁滞损耗 ----------------------
-# 1. 剩磁（Br）：H=0时的磁感应强度（单位：T）
-remanence = []  # 存储所有H=0对应的B值
-for h, b in zip(special_H, special_B):
-    if abs(h) < 1e-6:
-        remanence.append(b)
-Br_positive = max(remanence, key=abs)  # 正向剩磁（绝对值最大的正向B）
-Br_negative = min(remanence, key=abs)  # 反向剩磁
-Br_average = (abs(Br_positive) + abs(Br_negative)) / 2  # 平均剩磁
+# 1. 剩磁（Br）：H=0时的磁感应强度（单位：T），多周期数据取平均
+Br_positive = crossings.Br_positive  # 正向剩磁（H=0且B>0）
+Br_negative = crossings.Br_negative  # 反向剩磁（H=0且B<0）
+Br_average = crossings.Br_average  # 平均剩磁
 
 # 2. 矫顽力（Hc）：B=0时的磁场强度绝对值（单位：A/m）
-coercivity = []  # 存储所有B=0对应的H绝对值
-for h, b in zip(special_H, special_B):
-    if abs(b) < 1e-6:
-        coercivity.append(abs(h))
-Hc_positive = coercivity[0]  # 正向矫顽力（B=0时的负H绝对值）
-Hc_negative = coercivity[1]  # 反向矫顽力（B=0时的正H绝对值）
-Hc_average = (Hc_positive + Hc_negative) / 2  # 平均矫顽力
+Hc_positive = crossings.Hc_positive  # 正向矫顽力（下降支B=0时的负H绝对值）
+Hc_negative = crossings.Hc_negative  # 反向矫顽力（上升支B=0时的正H绝对值）
+Hc_average = crossings.Hc_average  # 平均矫顽力
 
 # 3. 磁滞损耗：闭合曲线面积积分（单位：J/m³，物理意义：单位体积磁化一周的能量损耗）
-# 采用梯形积分法，积分方向沿闭合曲线顺序，确保面积为正
-hysteresis_loss = abs(np.trapz(B_closed, H_closed))  # abs确保损耗为正
+# 采用梯形积分法沿闭合曲线求面积（首尾自动相接），取绝对值确保损耗为正
+hysteresis_loss = loop_loss(H, B)
+
+# 4. 不确定度：示波器读数按记录的末位分辨力（U_X 1mV，U_Y 0.1mV），两通道垂直增益误差各按±3%均匀分布；
+# 表中H=0、B=0的采样点即剩磁、矫顽力的读数点
+SCOPE_GAIN_TOL = 0.03
+at_H0 = np.flatnonzero(table["$U_X (V)$"] == 0)
+at_B0 = np.flatnonzero(table["$U_Y (m V)$"] == 0)
+
+
+def loop_parameters(U_X, U_Y, gain_x, gain_y):
+    """由示波器读数计算平均剩磁、平均矫顽力与磁滞损耗，每行为一组抽样"""
+    H_s = gain_x[:, None] * U_X * N1 / (L * R1)
+    B_s = gain_y[:, None] * U_Y * 1e-3 * R2 * C / (N2 * S)
+    return {"Br": np.abs(B_s[:, at_H0]).mean(axis=1), "Hc": np.abs(H_s[:, at_B0]).mean(axis=1),
+            "loss": loop_batch(H_s, B_s).loss}
+
+
+uncertainty = propagate(loop_parameters, {
+    "U_X": resolution(table["$U_X (V)$"], 1e-3), "U_Y": resolution(table["$U_Y (m V)$"], 0.1),
+    "gain_x": Uniform(1.0, SCOPE_GAIN_TOL), "gain_y": Uniform(1.0, SCOPE_GAIN_TOL)},
+    n=200_000, seed=0)  # 2×10⁵次抽样时包含区间端点已稳定到三位有效数字
 
 # ---------------------- 绘图配置（无图例，保持其他优化）----------------------
-plt.rcParams['font.sans-serif'] = ['SimHei']  # Windows中文支持（Mac/Linux替换为'Arial Unicode MS'）
+stage("render")
 plt.rcParams['axes.unicode_minus'] = False  # 正常显示负号
 plt.rcParams['figure.dpi'] = 300  # 默认显示清晰度
 
 fig, ax = plt.subplots(figsize=(12, 9))
 
-# 1. 绘制闭合磁滞回线（蓝色实线，线宽2.5）
-ax.plot(H_closed, B_closed, color='#1E90FF', linewidth=2.5, zorder=1)
+# 1. 绘制闭合磁滞回线（蓝色实线，线宽2.5）；点数超过像素预算时降采样，首尾闭合点与过零点保留
+_, loop_points = plot_decimated(ax, H_closed, B_closed, color='#1E90FF', linewidth=2.5, zorder=1)
 
 # 2. 标注普通数据点（深蓝色实心点，尺寸60，白色细边框）
-ax.scatter(common_H, common_B, color='#00008B', s=60, marker='o', 
+common = decimate(common_H, common_B, ax=ax)
+ax.scatter(common.x, common.y, color='#00008B', s=60, marker='o', 
            edgecolor='white', linewidth=1, zorder=2)
 
 # 3. 标注特殊点（红色实心点，尺寸120，白色粗边框，突出显示）
@@ -106,6 +122,7 @@ ax.tick_params(axis='both', which='minor', width=1, length=3)
 plt.tight_layout()
 
 # ---------------------- 保存与显示 ----------------------
+stage("save")
 # 保存300dpi高分辨率图片（无图例，画面更简洁）
 plt.savefig('plot1.png', dpi=300, bbox_inches='tight',
             facecolor='white', edgecolor='none')
@@ -126,5 +143,12 @@ print(f"   - 平均矫顽力：{Hc_average:.2f} A/m")
 print("-"*60)
 print(f"3. 磁滞损耗（单位体积）：{hysteresis_loss:.2f} J/m³")
 print(f"   （物理意义：单位体积铁磁材料每磁化一个周期消耗的能量）")
+print("-"*60)
+print(f"4. 不确定度（蒙特卡洛法，{uncertainty['Br'].n}次抽样，95%包含区间）：")
+for name, unit, fmt in (("Br", "T", ".4f"), ("Hc", "A/m", ".1f"), ("loss", "J/m³", ".1f")):
+    r = uncertainty[name]
+    print(f"   - {name} = {r.mean:{fmt}} ± {r.std:{fmt}} {unit}，[{r.interval[0]:{fmt}}, {r.interval[1]:{fmt}}]"
+          f"{'' if r.agree else '（与一阶解析法不一致：' + '；'.join(r.notes) + '）'}")
 print("="*60)
-print(f"数据点统计：总{len(H)}个 | 普通点{len(common_H)}个 | 特殊点{len(special_H)}个")
\ No newline at end of file
+print(f"数据点统计：总{len(H)}个 | 普通点{len(common_H)}个 | 特殊点{len(special_H)}个")
+print(f"绘图点数：回线 {loop_points} | 普通点 {common}")
\ No newline at end of file
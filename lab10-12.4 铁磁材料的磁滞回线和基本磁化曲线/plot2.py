@@ -1,19 +1,39 @@
-import matplotlib.pyplot as plt
+import sys
+from pathlib import Path
+
 import numpy as np
 
-# ---------------------- 核心数据 ----------------------
-# X轴：磁场强度 H（单位：A/m）
-H_b = [0, 734, 906, 1078, 1265, 1468, 1656, 1984, 2265, 2578, 2906]  # B-H曲线（含原点）
-H_mu = [734, 906, 1078, 1265, 1468, 1656, 1984, 2265, 2578, 2906]     # μ-H曲线（不含原点）
+ROOT = str(Path(__file__).resolve().parents[1])  # 仓库根目录，用于导入公共模块phylab
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from phylab.hysteresis import normal_curve
+from phylab.runtime import pyplot
+from phylab.trace import stage
+from phylab.typst_tables import load_table
+from phylab.uncertainty import propagate, resolution
 
-# 左Y轴：磁感应强度 B（单位：T）
-B = [0, 0.494, 0.651, 0.807, 0.963, 1.100, 1.217, 1.471, 1.588, 1.705, 1.862]
+plt = pyplot()  # 开始画图时才导入matplotlib，并自动选用中文字体
 
-# 右Y轴：磁导率 μ（单位：10⁻⁴H/m）
-mu = [6.734, 7.180, 7.484, 7.613, 7.491, 7.348, 7.413, 7.011, 6.615, 6.406]
+# ---------------------- 核心数据 ----------------------
+stage("load")
+# 逐级增大励磁时各磁滞回线的顶点（有原始波形时用 phylab.hysteresis.loop_tips(H, B) 批量提取）
+table = load_table("lab10", "table_2")  # 实验报告lab10.typ的表2
+# 磁场强度 Hm（单位：A/m）
+Hm = table["$H(A\\/m)$"]
+# 磁感应强度 Bm（单位：T）
+Bm = table["$B(T)$"]
+
+# ---------------------- 基本磁化曲线与磁导率 ----------------------
+stage("fit")
+curve = normal_curve(Hm, Bm)
+H_b = np.r_[0.0, curve.H]  # B-H曲线（含原点）
+B = np.r_[0.0, curve.B]
+H_mu = curve.H             # μ-H曲线（不含原点）
+mu = curve.mu * 1e4        # 磁导率 μ = B/H（单位：10⁻⁴H/m）
+fine = curve.H_fine >= H_mu[0]  # 插值曲线上μ只画测量范围内的部分
 
 # ---------------------- 绘图配置 ----------------------
-plt.rcParams['font.sans-serif'] = ['SimHei']  # Windows中文支持（Mac/Linux替换为'Arial Unicode MS'）
+stage("render")
 plt.rcParams['axes.unicode_minus'] = False  # 正常显示负号
 plt.rcParams['figure.dpi'] = 300  # 默认显示清晰度
 plt.rcParams['lines.linewidth'] = 2.5  # 线条宽度
@@ -23,9 +43,10 @@ fig, ax1 = plt.subplots(figsize=(12, 8))
 
 # ---------------------- 左Y轴：基本磁化曲线（B-H）- 加深蓝色 ----------------------
 color1 = '#0047AB'  # 加深蓝色（原#1E90FF优化为深蓝色）
-line1 = ax1.plot(H_b, B, color=color1, marker='o', markersize=7,
+line1 = ax1.plot(H_b, B, color=color1, marker='o', markersize=7, linestyle='none',
                  markerfacecolor='#2C3E50', markeredgecolor='white', markeredgewidth=1.5,
                  label='基本磁化曲线（B-H）')
+ax1.plot(curve.H_fine, curve.B_fine, color=color1)  # 单调三次插值
 
 # 左Y轴配置
 ax1.set_xlabel('磁场强度 H (A/m)', fontsize=14, fontweight='bold', labelpad=15)
@@ -37,19 +58,22 @@ ax1.set_ylim(0, max(B) * 1.05)
 # ---------------------- 右Y轴：磁导率变化曲线（μ-H）- 修复10⁻⁴显示 ----------------------
 ax2 = ax1.twinx()
 color2 = '#DC143C'  # 橙色保持不变
-line2 = ax2.plot(H_mu, mu, color=color2, marker='s', markersize=7,
+line2 = ax2.plot(H_mu, mu, color=color2, marker='s', markersize=7, linestyle='none',
                  markerfacecolor='#B71C1C', markeredgecolor='white', markeredgewidth=1.5,
                  label='磁导率变化曲线（μ-H）')
+ax2.plot(curve.H_fine[fine], curve.mu_fine[fine] * 1e4, color=color2)
+line3 = ax2.plot(curve.H_mu_max, curve.mu_max * 1e4, marker='*', markersize=16, color='#FF8C00',
+                 linestyle='none', label=f'最大磁导率（H={curve.H_mu_max:.0f} A/m）')
 
 # 右Y轴配置 - 修复10⁻⁴显示（使用LaTeX语法确保上标正常）
 ax2.set_ylabel(r'磁导率 $\mu$ ($10^{-4}\ \text{H/m}$)', fontsize=14, fontweight='bold', color=color2, labelpad=15)
 ax2.tick_params(axis='y', labelcolor=color2, labelsize=12, width=1.5, length=6)
-ax2.set_ylim(min(mu) * 0.95, max(mu) * 1.05)
+ax2.set_ylim(mu.min() * 0.95, max(mu.max(), curve.mu_max * 1e4) * 1.05)
 
 # ---------------------- 图形美化 ----------------------
 ax1.grid(True, linestyle='--', alpha=0.5, linewidth=1, color='#CCCCCC')
 # 合并图例
-lines = line1 + line2
+lines = line1 + line2 + line3
 labels = [l.get_label() for l in lines]
 ax1.legend(lines, labels, fontsize=12, loc='upper left', framealpha=0.95, shadow=True)
 
@@ -61,6 +85,7 @@ ax1.set_title('基本磁化曲线与磁导率变化曲线',
 plt.tight_layout()
 
 # ---------------------- 保存图片（不显示，仅保存） ----------------------
+stage("save")
 plt.savefig('plot2.png', dpi=300, bbox_inches='tight',
             facecolor='white', edgecolor='none')
 
@@ -71,5 +96,15 @@ print(f"   - H范围：{min(H_b)} ~ {max(H_b)} A/m")
 print(f"   - B范围：{min(B)} ~ {max(B)} T")
 print(f"2. 磁导率变化曲线（μ-H）：{len(H_mu)} 组数据")
 print(f"   - H范围：{min(H_mu)} ~ {max(H_mu)} A/m")
-print(f"   - μ范围：{min(mu):.3f} ~ {max(mu):.3f} ×10⁻⁴H/m")
-print(f"3. 磁导率峰值：{max(mu):.3f} ×10⁻⁴H/m（对应H={H_mu[mu.index(max(mu))]} A/m）")
\ No newline at end of file
+print(f"   - μ范围：{mu.min():.3f} ~ {mu.max():.3f} ×10⁻⁴H/m")
+peak = int(np.argmax(mu))
+print(f"3. 磁导率峰值：测量点中 {mu[peak]:.3f} ×10⁻⁴H/m（对应H={H_mu[peak]:g} A/m）；"
+      f"插值曲线上 μmax = {curve.mu_max * 1e4:.3f} ×10⁻⁴H/m（H={curve.H_mu_max:.0f} A/m，"
+      f"B={curve.B_mu_max:.3f} T，μr={curve.mu_r_max:.0f}）")
+print(f"   - 微分磁导率dB/dH：{', '.join(f'{v:.2f}' for v in curve.mu_diff * 1e4)} ×10⁻⁴H/m")
+
+# 磁导率 μ=B/H 的不确定度：H、B按记录的末位分辨力（1A/m、0.001T）估计
+mu_u = propagate(lambda H, B: B / H * 1e4, {"H": resolution(H_mu, 1.0),
+                                              "B": resolution(B[1:], 0.001)}, seed=0)
+print(f"4. 磁导率峰值的不确定度（蒙特卡洛法）：μ = {mu_u.mean[peak]:.3f} ± {mu_u.std[peak]:.3f} ×10⁻⁴H/m，"
+      f"95%包含区间 [{mu_u.interval[0][peak]:.3f}, {mu_u.interval[1][peak]:.3f}]")
\ No newline at end of file
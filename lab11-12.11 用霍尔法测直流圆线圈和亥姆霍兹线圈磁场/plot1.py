@@ -1,27 +1,43 @@
-import matplotlib.pyplot as plt
+import sys
+from pathlib import Path
+
 import numpy as np
 
+ROOT = str(Path(__file__).resolve().parents[1])  # 仓库根目录，用于导入公共模块phylab
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from phylab.coil_field import MU0, Coil, coil_field
+from phylab.runtime import pyplot
+from phylab.trace import stage
+from phylab.typst_tables import load_table
+
+plt = pyplot(cjk=False)  # 开始画图时才导入matplotlib
+
 # ---------------------- 核心参数定义（根据题目给定） ----------------------
-mu0 = 4 * np.pi * 1e-7  # 真空磁导率 (T·m/A)
+mu0 = MU0  # 真空磁导率 (T·m/A)
 R = 0.1  # 线圈半径 (m)，题目给定 R=10cm=0.1m
 N0 = 400  # 线圈匝数，题目给定 N0=400
 I = 0.4  # 励磁电流 (A)，题目给定 I=400mA=0.4A
 
 # ---------------------- 实验数据整理（11个测量点） ----------------------
+stage("load")
+# 读取实验报告lab11.typ的表1：单个圆线圈轴向测量数据
+table = load_table("lab11", "table_1")
 # 轴向距离 X (单位：m)，对应题目中的 10^-2 m（即cm）
-x_experiment = np.array([-5.00, -4.00, -3.00, -2.00, -1.00, 0.00, 1.00, 2.00, 3.00, 4.00, 5.00]) * 1e-2
+x_experiment = table["轴向距离$x(c m)$"] * 1e-2
 # 对应的实验测量磁感应强度 B (单位：μT)
-b_experiment = np.array([735, 820, 895, 957, 998, 1010, 994, 948, 880, 804, 715])
+b_experiment = table["磁感应强度$B(mu T)$"]
 
 # ---------------------- 理论曲线数据生成（平滑曲线，无标记点） ----------------------
+stage("fit")
 # 生成密集的轴向距离点（-10cm 到 10cm），确保曲线平滑
 x_theory = np.linspace(-0.1, 0.1, 100)  # 100个采样点，覆盖范围更广
-# 理论公式：B(x) = (mu0 * N0 * I * R²) / [2 * (R² + x²)^(3/2)]
-numerator = mu0 * N0 * I * R ** 2
-denominator = 2 * (R ** 2 + x_theory ** 2) ** (3/2)
-b_theory = (numerator / denominator) * 1e6  # 转换为 μT 单位（1T=1e6μT）
+# 理论值：轴线上即 B(x) = (mu0 * N0 * I * R²) / [2 * (R² + x²)^(3/2)]（椭圆积分通用公式在r=0处的特例）
+coil = Coil(radius=R, turns=N0, current=I)
+b_theory = coil_field([coil], x_theory, 0.0)[0] * 1e6  # 转换为 μT 单位（1T=1e6μT）
 
 # ---------------------- 绘图设置 ----------------------
+stage("render")
 plt.rcParams['axes.unicode_minus'] = False    # 支持负号显示
 fig, ax = plt.subplots(figsize=(10, 6))       # 画布大小
 
@@ -59,11 +75,12 @@ ax.legend(loc='upper right', fontsize=11, framealpha=0.9)
 plt.tight_layout()
 
 # ---------------------- 保存与显示 ----------------------
+stage("save")
 # 高分辨率保存（300dpi），支持插入实验报告
 plt.savefig('plot1.png', dpi=300, bbox_inches='tight')
 
 # ---------------------- 验证信息输出（可选，用于核对理论值） ----------------------
 center_b_theory = (mu0 * N0 * I) / (2 * R) * 1e6  # 中心处（x=0）理论值
 print(f"线圈中心处（x=0）理论磁场强度：{center_b_theory:.1f} μT")
-print(f"实验中心处磁场强度：{b_experiment[5]} μT")
+print(f"实验中心处磁场强度：{b_experiment[5]:.0f} μT")
 print(f"中心处相对误差：{abs(b_experiment[5] - center_b_theory) / center_b_theory * 100:.1f}%")
\ No newline at end of file
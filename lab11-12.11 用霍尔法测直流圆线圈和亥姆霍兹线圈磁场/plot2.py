@@ -1,21 +1,46 @@
-import matplotlib.pyplot as plt
+import sys
+from pathlib import Path
+
 import numpy as np
 
-# ---------------------- 数据整理（严格对应用户提供的径向测量数据） ----------------------
-# 径向距离 Y (单位：cm)，共10个实验点
-y_data = [-5.00, -4.00, -3.00, -2.00, -1.00, 0.00, 1.00, 2.00, 3.00, 4.00, 5.00]
+ROOT = str(Path(__file__).resolve().parents[1])  # 仓库根目录，用于导入公共模块phylab
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from phylab.coil_field import Coil, coil_field
+from phylab.runtime import pyplot
+from phylab.trace import stage
+from phylab.typst_tables import load_table
+
+plt = pyplot(cjk=False)  # 开始画图时才导入matplotlib
+
+# ---------------------- 数据整理（读取实验报告lab11.typ的表2：径向测量数据） ----------------------
+stage("load")
+table = load_table("lab11", "table_2")
+# 径向距离 Y (单位：cm)，共11个实验点
+y_data = table["径向距离$y(c m)$"]
 # 对应的磁感应强度 B (单位：μT)
-b_data = [1236, 1140, 1078, 1036, 1016, 1008, 1016, 1038, 1084, 1148, 1256]
+b_data = table["磁感应强度$B(mu T)$"]
+
+# ---------------------- 理论曲线（线圈平面内径向分布） ----------------------
+stage("fit")
+# 线圈参数与实验1相同：R=10cm，N0=400，I=400mA；霍尔探头测量轴向分量
+coil = Coil(radius=0.1, turns=400, current=0.4)
+y_theory = np.linspace(-6.0, 6.0, 241)  # 单位：cm
+b_theory = coil_field([coil], 0.0, y_theory * 1e-2)[0] * 1e6  # 单位：μT
 
 # ---------------------- 绘图基础设置（全英文，无中文） ----------------------
+stage("render")
 plt.rcParams['axes.unicode_minus'] = False  # 支持负号显示
 fig, ax = plt.subplots(figsize=(10, 6))     # 保持画布大小与前图一致
 
-# ---------------------- 绘制实验曲线 ----------------------
+# ---------------------- 绘制实验曲线与理论曲线 ----------------------
 # 实验值：深蓝色实线 + 圆形标记，线宽2.5，标记大小7（突出数据点）
 ax.plot(y_data, b_data, color="#2253F4", linewidth=2.5, marker='o', 
         markersize=7, markerfacecolor='#2253F4', markeredgecolor='#2253F4', 
         label='Measured B')
+# 理论值：虚线平滑曲线（椭圆积分公式计算的轴外磁场）
+ax.plot(y_theory, b_theory, color='#E74C3C', linewidth=2, linestyle='--',
+        label='Theoretical B')
 
 # ---------------------- 图表美化（全英文规范，匹配实验报告风格） ----------------------
 # 标题：与实验报告一致的英文标题，加粗
@@ -43,5 +68,6 @@ ax.legend(loc='upper right', fontsize=11, framealpha=0.9)
 plt.tight_layout()
 
 # ---------------------- 保存与显示 ----------------------
+stage("save")
 # 高分辨率保存（300dpi），文件名贴合实验内容
 plt.savefig('plot2.png', dpi=300, bbox_inches='tight')
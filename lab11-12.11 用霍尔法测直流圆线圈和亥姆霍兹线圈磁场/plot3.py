@@ -1,41 +1,60 @@
-import matplotlib.pyplot as plt
+import sys
+from pathlib import Path
+
 import numpy as np
 
-# ---------------------- 数据整理（严格对应用户提供的轴向测量数据） ----------------------
-# 轴向距离 X (单位：cm)，按表格顺序完整提取31个实验点
-x_data = [
-    -10.00, -9.50, -9.00, -8.50, -8.00, -7.50, -7.00, -6.50, -6.00, -5.50, -5.00,
-    -4.00, -3.00, -2.00, -1.00, 0.00, 1.00, 2.00, 3.00, 4.00, 5.00, 5.50, 6.00,
-    6.50, 7.00, 7.50, 8.00, 8.50, 9.00, 9.50, 10.00
-]
-# 对应的磁感应强度 B (单位：μT)，与x_data一一对应
-b_data = [
-    877, 932, 986, 1042, 1098, 1152, 1202, 1244, 1284, 1316, 1348, 1388, 1407,
-    1416, 1416, 1416, 1416, 1416, 1410, 1390, 1354, 1326, 1296, 1256, 1216, 1170,
-    1120, 1066, 1008, 956, 898
-]
+ROOT = str(Path(__file__).resolve().parents[1])  # 仓库根目录，用于导入公共模块phylab
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from phylab.coil_field import coil_field, helmholtz
+from phylab.plateau import find_plateaus
+from phylab.runtime import pyplot
+from phylab.trace import stage
+from phylab.typst_tables import load_table
+
+plt = pyplot(cjk=False)  # 开始画图时才导入matplotlib
+
+UNIFORM_TOL = 0.001  # 均匀区判据：与峰值相差不超过0.1%（约为微特斯拉计的分辨率）
+
+# ---------------------- 数据整理（读取实验报告lab11.typ的表3：亥姆霍兹线圈轴向测量数据） ----------------------
+stage("load")
+table = load_table("lab11", "table_3")
+x_data = table["轴向距离$x(c m)$"]  # 轴向距离 X (单位：cm)，共31个实验点
+b_data = table["磁感应强度$B(mu T)$"]  # 对应的磁感应强度 B (单位：μT)，与x_data一一对应
+
+# ---------------------- 理论曲线（亥姆霍兹线圈轴向分布） ----------------------
+stage("fit")
+# 两线圈参数同实验1（R=10cm，N0=400，I=400mA），间距等于半径，关于原点对称
+coils = helmholtz(radius=0.1, turns=400, current=0.4)
+x_theory = np.linspace(-12.0, 12.0, 481)  # 单位：cm
+b_theory = coil_field(coils, x_theory * 1e-2, 0.0)[0] * 1e6  # 单位：μT
 
 # ---------------------- 绘图基础设置（全英文，无中文） ----------------------
+stage("render")
 plt.rcParams['axes.unicode_minus'] = False  # 支持负号显示
 fig, ax = plt.subplots(figsize=(12, 6))     # 加宽画布以更好展示平台区
 
-# ---------------------- 绘制实验曲线 ----------------------
+# ---------------------- 绘制实验曲线与理论曲线 ----------------------
 # 实验值：指定蓝色#2253F4 + 圆形标记，线宽2.5，标记大小5（密集数据点适配）
 ax.plot(x_data, b_data, color='#2253F4', linewidth=2.5, marker='o', 
         markersize=5, markerfacecolor='#2253F4', markeredgecolor='white', 
         markeredgewidth=0.5, label='Measured B')
+# 理论值：虚线平滑曲线（两线圈磁场叠加）
+ax.plot(x_theory, b_theory, color='#E74C3C', linewidth=2, linestyle='--',
+        label='Theoretical B')
 
 # ---------------------- 关键标注（还原实验报告图表特征） ----------------------
+# 自动检测均匀磁场平台区：与峰值相差不超过容差的最宽连续区间（平台区：-2.00~2.00 cm）
+plateau = find_plateaus(x_data, b_data, tol=UNIFORM_TOL)
 max_b = max(b_data)
-# 找到最大值对应的x范围（平台区：-2.00~2.00 cm）
-max_x_range = [x for x, b in zip(x_data, b_data) if b == max_b]
-max_x_str = f"{min(max_x_range):.2f}~{max(max_x_range):.2f} cm"
+max_x_str = f"{plateau.x_start:.2f}~{plateau.x_end:.2f} cm"
 # 在最大值平台区标注，位置偏移避免遮挡
-ax.text(0.0, max_b + 20, f'Max B={max_b} μT at X={max_x_str}', 
-        fontsize=12, fontweight='bold', color='#E74C3C', ha='center')
+ax.text((plateau.x_start + plateau.x_end) / 2, max(max_b, b_theory.max()) + 5,
+        f'Max B={max_b:.0f} μT at X={max_x_str}\nMean {plateau.mean:.0f} μT, ripple {plateau.ripple:.0f} μT',
+        fontsize=12, fontweight='bold', color='#E74C3C', ha='center', va='bottom')
 
 # 标注均匀磁场平台区（用阴影强调）
-ax.axvspan(-2.0, 2.0, alpha=0.1, color='#2253F4', label='Uniform Magnetic Field Region')
+ax.axvspan(plateau.x_start, plateau.x_end, alpha=0.1, color='#2253F4', label='Uniform Magnetic Field Region')
 
 # ---------------------- 图表美化（全英文规范，匹配实验报告风格） ----------------------
 # 标题：与实验报告一致的英文标题，加粗
@@ -63,5 +82,6 @@ ax.legend(loc='upper right', fontsize=11, framealpha=0.9)
 plt.tight_layout()
 
 # ---------------------- 保存与显示 ----------------------
+stage("save")
 # 高分辨率保存（300dpi），文件名贴合实验内容
 plt.savefig('plot3.png', dpi=300, bbox_inches='tight')
@@ -1,28 +1,69 @@
+import sys
+from pathlib import Path
+
 import numpy as np
-import matplotlib.pyplot as plt
+
+ROOT = str(Path(__file__).resolve().parents[1])  # 仓库根目录，用于导入公共模块phylab
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from phylab.nlfit import POWER_FACTOR, fit_batch
+from phylab.polyfit import poly_batch, resonance_peaks
+from phylab.runtime import pyplot
+from phylab.trace import stage
+from phylab.typst_tables import load_table
+
+plt = pyplot(cjk=False)  # 开始画图时才导入matplotlib
 # --------------------------
 # 1. Define experimental data
 # --------------------------
+stage("load")
+# Table 1 of the report lab13.typ
+table = load_table("lab13", "table_1")
 # Capacitance (μF)
-C = np.array([0, 1, 2, 3, 4, 5, 6, 7, 8, 9])
+C = table["$C\\/mu F$"]
 # Power factor (cosφ)
-cos_phi = np.array([0.3234, 0.4202, 0.5454, 0.6087, 0.8632, 0.8680, 0.7189, 0.5304, 0.4147, 0.3843])
+cos_phi = table["$cos phi$"]
 
 # --------------------------
 # 2. Polynomial fitting (3rd order, optimal for this data trend)
 # --------------------------
 
+stage("fit")
 # Create dense x-values for smooth fitting curve
 C_fit = np.linspace(min(C), max(C), 100)
+poly = poly_batch(C, cos_phi, degree=3)
+poly_curve = poly(C_fit)[0]
+band_lo, band_hi = poly.band(C_fit)
+poly_peak = poly.peaks()
+
+# --------------------------
+# 3. RLC model: inductive load in parallel with C, cosφ = A / sqrt(1 + ((C - C0)/G)^2)
+#    (C0 cancels the load's inductive susceptance; A < 1 because of harmonics)
+# --------------------------
+rlc = fit_batch(POWER_FACTOR, C, cos_phi)
+rlc_curve = rlc(C_fit)[0]
+rlc_peak = resonance_peaks(rlc)
 
 # --------------------------
 # 4. Plot the curve (save directly, no display)
 # --------------------------
+stage("render")
 plt.figure(figsize=(10, 6))  # Set figure size
 
 # Plot original data (solid line + markers)
 plt.plot(C, cos_phi, 'b-', marker='o', linewidth=2, markersize=8, label='Original Data (cosφ vs C)')
 
+# Fitted curves and 95% confidence band of the cubic fit
+plt.plot(C_fit, poly_curve, 'r--', linewidth=1.8, label=f'3rd-order Polynomial Fit (R^2={poly.r2[0]:.4f})')
+plt.fill_between(C_fit, band_lo[0], band_hi[0], color='r', alpha=0.12, label='95% Confidence Band')
+plt.plot(C_fit, rlc_curve, 'g-', linewidth=1.8, label=f'RLC Model Fit (R^2={rlc.r2[0]:.4f})')
+
+# Maximum power factor capacitance with 95% confidence interval
+for peak, color, name in ((poly_peak, 'r', 'Polynomial'), (rlc_peak, 'g', 'RLC')):
+    if np.isfinite(peak.x[0]):
+        plt.errorbar(peak.x[0], peak.y[0], xerr=peak.x[0] - peak.x_interval[0][0], fmt='D', color=color,
+                     capsize=5, markersize=7, zorder=5, label=f'{name} Peak: C = {peak.x[0]:.2f} μF')
+
 # Set plot properties
 plt.title('Power Factor (cosφ) vs Capacitance (C) Curve', fontsize=14, pad=15)
 plt.xlabel('Capacitance (μF)', fontsize=12)
@@ -38,6 +79,7 @@ plt.legend(loc='upper left', fontsize=11)
 # - bbox_inches='tight': Prevent label/text cutoff
 # - overwrite existing file by default
 plt.tight_layout()
+stage("save")
 plt.savefig('power_factor_curve.png', dpi=300, bbox_inches='tight')
 
 # Close the plot to release memory (optional but recommended)
@@ -47,5 +89,11 @@ plt.close()
 # 5. Print results to console
 # --------------------------
 print("="*50)
+for peak, name in ((poly_peak, "3rd-order polynomial"), (rlc_peak, "RLC model")):
+    print(f"{name}: C_max = {peak.x[0]:.3f} +/- {peak.x_err[0]:.3f} uF "
+          f"(95% CI [{peak.x_interval[0][0]:.3f}, {peak.x_interval[1][0]:.3f}]), "
+          f"cos_phi_max = {peak.y[0]:.4f} +/- {peak.y_err[0]:.4f}")
+A, C0, G = rlc.params[0]
+print(f"RLC parameters: A = {A:.4f}, C0 = {C0:.3f} uF, G = {G:.3f} uF, R^2 = {rlc.r2[0]:.4f}")
 print("="*50)
 print(f"Image saved successfully as: power_factor_curve.png")
\ No newline at end of file
@@ -1,28 +1,63 @@
-# 导入绘图库
-import matplotlib.pyplot as plt
+# 导入绘图库（开始画图时才真正导入matplotlib）
+import numpy as np
+import sys
+from pathlib import Path
+
+ROOT = str(Path(__file__).resolve().parents[1])  # 仓库根目录，用于导入公共模块phylab
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from phylab.runtime import pyplot
+from phylab.trace import stage
+from phylab.typst_tables import load_table
+from phylab.uncertainty import propagate, resolution
+
+plt = pyplot(cjk=False)
 
 # ====================== 1. 整理数据 ======================
+stage("load")
+# Table 1 of the report lab14.typ
+table = load_table("lab14", "table_1")
 # Temperature t (℃)
-t = [23.0, 28.9, 34.2, 39.1, 44.1, 50.2, 56.3, 62.3]
+t = table["温度$t\\/degree C$"]
 # Unbalanced voltage U (mV)
-U = [30.5, 37.9, 44.5, 50.4, 56.4, 63.7, 70.4, 77.1]
+U = table["非平衡电压$U\\/m V$"]
+
+# ====================== 2. 温度系数及其不确定度 ======================
+stage("fit")
+# alpha_i = 4U/(t(eps-2U))，alpha取8次的平均；各读数按记录的末位分辨力估计B类不确定度
+EPSILON = 1.3  # Bridge voltage (V)
+alpha = propagate(lambda t, U, eps: np.mean(4 * U / (t * (eps[:, None] - 2 * U)), axis=1),
+                  {"t": resolution(t, 0.1), "U": resolution(np.array(U) * 1e-3, 0.1e-3),
+                   "eps": resolution(EPSILON, 0.1)},
+                  seed=0)
+print(f"alpha = ({alpha.mean * 1e3:.3f} +/- {alpha.std * 1e3:.3f}) x 10^-3 /C, "
+      f"95% interval [{alpha.interval[0] * 1e3:.3f}, {alpha.interval[1] * 1e3:.3f}] x 10^-3 /C")
+print("Uncertainty budget (x 10^-3 /C): "
+      + ", ".join(f"{name}: {u * 1e3:.4f}" for name, u in alpha.budget.items()))
+# Compare with first-order propagation: standard uncertainty and 95% interval from the linearized model
+a_lo, a_hi = alpha.analytic_interval
+print(f"Monte Carlo vs first-order: u = {alpha.std * 1e3:.4f} vs {alpha.analytic_std * 1e3:.4f}, "
+      f"interval [{alpha.interval[0] * 1e3:.3f}, {alpha.interval[1] * 1e3:.3f}] vs [{a_lo * 1e3:.3f}, {a_hi * 1e3:.3f}] "
+      f"-> {'consistent' if alpha.agree else 'differ beyond tolerance (non-normal output or nonlinear model)'}")
 
-# ====================== 2. 绘图设置 ======================
+# ====================== 3. 绘图设置 ======================
+stage("render")
 # 移除中文字体配置（无需处理中文，避免显示异常）
 plt.figure(figsize=(8, 5))  # Canvas size: 8 inches (width) × 5 inches (height)
 
 # 绘制曲线（散点+折线，清晰展示数据点和趋势）
 plt.plot(t, U, marker='o', color='blue', linestyle='-', linewidth=2, markersize=6, label='U-t Curve')
 
-# ====================== 3. 图表标注（全英文） ======================
+# ====================== 4. 图表标注（全英文） ======================
 plt.xlabel('Temperature t (℃)', fontsize=12)  # X-axis label
 plt.ylabel('Unbalanced Voltage U (mV)', fontsize=12)  # Y-axis label
 plt.title('Curve of Unbalanced Voltage vs Temperature', fontsize=14, fontweight='bold')  # Title
 plt.grid(True, alpha=0.3)  # Show grid (low transparency for readability)
 plt.legend(loc='best')  # Show legend (auto find best position)
 
-# ====================== 4. 保存图片 ======================
+# ====================== 5. 保存图片 ======================
+stage("save")
 # Save as plot1.png, 300 dpi for high clarity, tight layout to avoid label truncation
 plt.savefig('plot1.png', dpi=300, bbox_inches='tight')
 
-# No plt.show() - directly save the image to local directory
\ No newline at end of file
+# No plt.show() - directly save the image to local directory
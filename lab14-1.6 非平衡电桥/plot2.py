@@ -1,19 +1,35 @@
 # 导入所需库
-import matplotlib.pyplot as plt
 import numpy as np
-from scipy.stats import linregress
+import sys
+from pathlib import Path
+
+ROOT = str(Path(__file__).resolve().parents[1])  # 仓库根目录，用于导入公共模块phylab
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from phylab.bootstrap import LinearStatistic, bootstrap
+from phylab.regression import weighted_linfit
+from phylab.runtime import pyplot
+from phylab.trace import stage
+from phylab.typst_tables import load_table
+from phylab.uncertainty import MultiNormal, propagate
+
+plt = pyplot(cjk=False)  # 开始画图时才导入matplotlib
 
 # ====================== 1. 整理实验数据 ======================
+stage("load")
+# Table 2 of the report lab14.typ
+table = load_table("lab14", "table_2")
 # Temperature (℃)
-t = np.array([23.0, 28.9, 34.2, 39.1, 44.1, 50.2, 56.3, 62.3])
+t = table["温度$t\\/degree C$"]
 # Resistance of Cu50 (Ω)
-R = np.array([55.30, 56.55, 57.70, 58.74, 59.83, 61.20, 62.47, 63.78])
+R = table["电阻$R\\/Omega$"]
 
 # ====================== 2. 线性拟合（避免特殊字符） ======================
-fit_results = linregress(t, R)
-slope = fit_results.slope          # Slope (Ω/℃)
-intercept = fit_results.intercept  # Intercept (Ω)
-r_squared = fit_results.rvalue **2  # R-squared (fit goodness)
+stage("fit")
+fit_results = weighted_linfit(t, R)
+slope = fit_results.k          # Slope (Ω/℃)
+intercept = fit_results.b      # Intercept (Ω)
+r_squared = fit_results.r2     # R-squared (fit goodness)
 
 # 用ASCII星号(*)替代乘号×，避免编码乱码
 fit_equation = f"R = {slope:.4f} * t + {intercept:.4f}"
@@ -23,10 +39,27 @@ print("===== Fitting Results =====")
 print(f"Fitting Equation: {fit_equation}")
 print(f"R^2 (Coefficient of Determination): {r_squared:.6f}")  # 用^表示平方，纯ASCII
 
+# 温度系数 alpha = k/b（R = R0(1 + alpha*t)），k与b相关，按拟合协方差传递
+alpha = propagate(lambda p: p[:, 0] / p[:, 1],
+                  {"p": MultiNormal([slope, intercept], fit_results.cov)}, seed=0)
+print(f"alpha = k/b = ({alpha.mean * 1e3:.4f} +/- {alpha.std * 1e3:.4f}) x 10^-3 /C, "
+      f"95% interval [{alpha.interval[0] * 1e3:.4f}, {alpha.interval[1] * 1e3:.4f}] x 10^-3 /C")
+print(f"Monte Carlo vs first-order: {'; '.join(alpha.notes) if alpha.notes else 'consistent'}")
+
+# 对数据点重抽样的bootstrap区间（10^5次），不依赖残差正态的假设
+boot = bootstrap(LinearStatistic(t, R, derived={"alpha": lambda k, b: k / b}),
+                 len(t), n_resamples=10 ** 5, seed=0)
+for name, scale, unit in (("k", 1.0, "Ohm/C"), ("alpha", 1e3, "x 10^-3 /C")):
+    i = boot.index(name)
+    print(f"Bootstrap {name} = {boot.estimate[i] * scale:.4f} +/- {boot.std[i] * scale:.4f} {unit}, "
+          f"95% percentile [{boot.percentile[0][i] * scale:.4f}, {boot.percentile[1][i] * scale:.4f}], "
+          f"BCa [{boot.bca[0][i] * scale:.4f}, {boot.bca[1][i] * scale:.4f}]")
+
 # ====================== 4. 绘制曲线 ======================
 t_fit = np.linspace(min(t), max(t), 100)
 R_fit = slope * t_fit + intercept
 
+stage("render")
 plt.figure(figsize=(9, 6))
 # 原始数据点
 plt.scatter(t, R, color='blue', s=60, label='Experimental Data', zorder=3)
@@ -46,5 +79,6 @@ plt.grid(True, alpha=0.3, zorder=1)
 plt.legend(loc='lower right', fontsize=11)
 
 # ====================== 6. 保存图片 ======================
+stage("save")
 plt.savefig('plot2.png', dpi=300, bbox_inches='tight')
 # 无plt.show()，直接保存
\ No newline at end of file
@@ -0,0 +1,7 @@
+"""
+phylab：各实验绘图/数据处理脚本共用的公共模块
+
+实验目录名含空格和中文，无法直接作为Python包导入，
+因此公共代码统一放在仓库根目录的phylab包中，各实验脚本按需导入。
+本文件保持为空，避免导入phylab时连带导入matplotlib等重量级库。
+"""
@@ -0,0 +1,370 @@
+"""
+计算内核的性能基准：按数据规模（默认10到10⁷个点）计时，结果写为JSON，并可与历史结果比较
+
+内核（与实验脚本实际使用的函数一致）：
+- lightspeed: lab02 plot_delta_s_delta_t 的重复点计权、加权拟合与c的推导（fit_light_speed）
+- hysteresis: lab10 plot1 的剩磁/矫顽力插值与回线面积（loop_crossings + loop_loss）
+- coil_field: lab11 的圆线圈磁场公式（椭圆积分，每次计算前清空场缓存）
+- cauchy: lab06 的柯西色散公式拟合（fit_batch(CAUCHY)，一组n个点）
+- cauchy_batch: 同上，n个点分成每组7个点的多组数据同时拟合
+- linfit: lab08/lab14 的直线拟合（weighted_linfit）
+- render: 含n个点的折线图渲染并编码为PNG（export.render + encode）
+
+每个 (内核, 规模) 先预热一次，再重复repeat轮，每轮自动选取调用次数使耗时不少于min_time，
+记录每次调用的平均耗时；规模指数取最大三个规模上 log耗时-log规模 的斜率。
+比较时以各轮最短耗时之比判断，超过阈值且两次的波动范围不重叠时记为退化。
+
+用法（在仓库根目录下执行）:
+    python -m phylab.bench                          # 全部内核，10 ~ 10⁷ 个点
+    python -m phylab.bench linfit cauchy --max-size 1e5 -o bench.json
+    python -m phylab.bench --compare base.json      # 运行并与base.json比较，有退化时返回码为1
+    python -m phylab.bench --compare base.json new.json   # 只比较两个结果文件
+"""
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+SIZES = tuple(10 ** k for k in range(1, 8))
+REPEAT = 5
+MIN_TIME = 0.05           # 每轮计时的最短时间（秒）
+MAX_NUMBER = 10 ** 5      # 每轮最多调用次数
+LONG_CALL = 1.0           # 单次调用超过1秒时最多计时3轮
+THRESHOLD = 0.10          # 最短耗时变慢超过10%（且超出波动范围）记为退化
+SEED = 20241120
+
+Setup = Callable[[int, np.random.Generator], Callable[[], object]]
+KERNELS: Dict[str, Setup] = {}
+
+
+def kernel(name: str):
+    """注册内核：setup(n, rng) 生成规模为n的合成数据，返回无参的计时函数"""
+    def register(setup: Setup) -> Setup:
+        KERNELS[name] = setup
+        return setup
+    return register
+
+
+# ---------------------- 内核 ----------------------
+@kernel("lightspeed")
+def _lightspeed(n, rng):
+    from phylab.lightspeed import fit_light_speed
+
+    # 与实验相同：Δs取有限几个位置（大量重复点），Δt' = Δs/c + 噪声
+    delta_s = rng.choice([10.0, 15.0, 20.0, 25.0, 30.0, 35.0], size=n)
+    delta_t = delta_s / 0.0685 + rng.normal(0, 2.0, n)
+    return lambda: fit_light_speed(delta_s, delta_t)
+
+
+@kernel("hysteresis")
+def _hysteresis(n, rng):
+    from phylab.hysteresis import loop_crossings, loop_loss
+
+    # 与lab10同量级的磁滞回线（Hm≈2000A/m，Bm≈1.35T），n个采样点绕一周
+    t = np.linspace(0, 2 * np.pi, max(n, 4), endpoint=False)
+    H = 2000 * np.cos(t)
+    B = 1.35 * np.tanh(1.6 * np.cos(t - 0.6)) + rng.normal(0, 1e-3, t.size)
+    H_closed, B_closed = np.append(H, H[0]), np.append(B, B[0])
+    return lambda: (loop_crossings(H_closed, B_closed), loop_loss(H, B))
+
+
+@kernel("coil_field")
+def _coil_field(n, rng):
+    from phylab.coil_field import clear_cache, coil_field, helmholtz
+
+    coils = helmholtz(radius=0.1, turns=400, current=0.4)
+    x = np.linspace(-0.12, 0.12, n)
+    r = rng.uniform(0, 0.05, n)
+
+    def run():
+        clear_cache()
+        return coil_field(coils, x, r)
+    return run
+
+
+def _cauchy_data(n, rng):
+    lam = rng.uniform(400e-9, 700e-9, n)
+    return lam, 1.6 + 1.0e-14 / lam ** 2 + 2.0e-28 / lam ** 4 + rng.normal(0, 1e-4, n)
+
+
+@kernel("cauchy")
+def _cauchy(n, rng):
+    from phylab.nlfit import CAUCHY, fit_batch
+
+    lam, idx = _cauchy_data(max(n, 3), rng)
+    return lambda: fit_batch(CAUCHY, lam, idx)
+
+
+@kernel("cauchy_batch")
+def _cauchy_batch(n, rng):
+    from phylab.nlfit import CAUCHY, fit_batch
+
+    groups = max(n // 7, 1)
+    lam, idx = _cauchy_data(groups * 7, rng)
+    return lambda: fit_batch(CAUCHY, lam.reshape(groups, 7), idx.reshape(groups, 7))
+
+
+@kernel("linfit")
+def _linfit(n, rng):
+    from phylab.regression import weighted_linfit
+
+    # lab08/lab14：电阻随温度线性变化
+    t = rng.uniform(20, 70, max(n, 3))
+    R = 4.17 + 0.0183 * t + rng.normal(0, 0.005, t.size)
+    return lambda: weighted_linfit(t, R)
+
+
+@kernel("render")
+def _render(n, rng):
+    from phylab.runtime import configure
+
+    configure()
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    from phylab.export import encode, render
+
+    x = np.linspace(0, 10, n)
+    y = np.sin(x) + rng.normal(0, 0.05, n)
+    fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(x, y, linewidth=1)
+    ax.set_xlabel("x")
+    ax.set_ylabel("y")
+    fig.tight_layout()
+    out = Path(os.environ.get("TMPDIR", "/tmp")) / f"phylab-bench-{os.getpid()}.png"
+
+    def run():
+        path = encode(render(fig, dpi=150), out)
+        path.unlink()
+    return run
+
+
+# ---------------------- 计时 ----------------------
+@dataclass
+class Measurement:
+    """
+    一个 (内核, 规模) 的计时结果
+
+    times: 每轮中单次调用的平均耗时（秒）
+    number: 每轮调用次数
+    """
+    kernel: str
+    size: int
+    number: int
+    times: List[float] = field(default_factory=list)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+    @property
+    def best(self) -> float:
+        return min(self.times)
+
+
+def measure(name: str, size: int, repeat: int = REPEAT, min_time: float = MIN_TIME,
+            seed: int = SEED) -> Measurement:
+    """预热一次后按 timeit 的方式计时"""
+    run = KERNELS[name](size, np.random.default_rng(seed))
+    start = time.perf_counter()
+    run()
+    once = time.perf_counter() - start
+    number = int(min(MAX_NUMBER, max(1, min_time / max(once, 1e-9))))
+    if once > LONG_CALL:
+        repeat = min(repeat, 3)
+    m = Measurement(name, size, number)
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        m.times.append((time.perf_counter() - start) / number)
+    return m
+
+
+def scaling_exponent(sizes: Sequence[int], times: Sequence[float], tail: int = 3) -> float:
+    """
+    最大的tail个规模上 log(耗时) 对 log(规模) 的斜率：约1为线性，明显小于1说明固定开销仍占主导
+    （小规模时各内核都以函数调用开销为主，不参与拟合）；只有两个规模时为两点连线的斜率，
+    不足两个不同规模时为NaN
+    """
+    order = np.argsort(sizes)[-tail:]
+    x = np.log10(np.asarray(sizes, dtype=float)[order])
+    y = np.log10(np.asarray(times, dtype=float)[order])
+    if np.unique(x).size < 2:
+        return float("nan")
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def scaling_table(results: Sequence[dict]) -> Dict[str, float]:
+    """各内核的规模指数 {内核: 指数}，results为run_suite返回值中的results列表"""
+    sizes: Dict[str, List[int]] = {}
+    times: Dict[str, List[float]] = {}
+    for r in results:
+        sizes.setdefault(r["kernel"], []).append(r["size"])
+        times.setdefault(r["kernel"], []).append(r["median"])
+    return {k: scaling_exponent(sizes[k], times[k]) for k in sizes}
+
+
+def _environment() -> dict:
+    import subprocess
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"python": platform.python_version(), "numpy": np.__version__,
+            "platform": platform.platform(), "machine": platform.machine(),
+            "cpu_count": os.cpu_count(), "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def run_suite(names: Sequence[str] = (), sizes: Sequence[int] = SIZES,
+              repeat: int = REPEAT, min_time: float = MIN_TIME,
+              verbose: bool = True) -> dict:
+    """
+    运行基准
+
+    参数:
+    names: 内核名，为空时运行全部
+    sizes: 数据规模
+    repeat, min_time: 计时轮数与每轮最短时间
+
+    返回:
+    可直接写为JSON的结果 {"environment": ..., "settings": ..., "results": [...]}；
+    规模指数由scaling_table另行计算
+    """
+    names = list(names) or list(KERNELS)
+    unknown = [n for n in names if n not in KERNELS]
+    if unknown:
+        raise KeyError(f"未知的内核：{unknown}，可选：{list(KERNELS)}")
+    results: List[Measurement] = []
+    for name in names:
+        for size in sizes:
+            m = measure(name, size, repeat, min_time)
+            results.append(m)
+            if verbose:
+                print(f"{name:14s} n={size:<9d} {_fmt(m.median)}  "
+                      f"({m.median / size * 1e9:10.1f} ns/点, {m.number}次×{repeat}轮)", flush=True)
+    return {"environment": _environment(),
+            "settings": {"repeat": repeat, "min_time": min_time, "seed": SEED},
+            "results": [dict(asdict(m), median=m.median, best=m.best) for m in results]}
+
+
+def _fmt(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit:2s}"
+    return f"{seconds / 1e-9:8.1f} ns"
+
+
+# ---------------------- 比较 ----------------------
+@dataclass
+class Comparison:
+    """两次结果中同一 (内核, 规模) 的比较；ratio = 新最短耗时 / 旧最短耗时"""
+    kernel: str
+    size: int
+    old: float
+    new: float
+    ratio: float
+    status: str  # "regression"、"faster" 或 "same"
+
+
+def compare(old: dict, new: dict, threshold: float = THRESHOLD) -> List[Comparison]:
+    """
+    按各轮最短耗时比较（受系统干扰最小）：变慢超过threshold、且新结果每一轮都慢于
+    旧结果最慢的一轮时记为退化；提升的判据对称。两次的波动范围重叠时视为无变化
+    """
+    base = {(r["kernel"], r["size"]): r for r in old["results"]}
+    out = []
+    for r in new["results"]:
+        key = (r["kernel"], r["size"])
+        if key not in base:
+            continue
+        b = base[key]
+        ratio = r["best"] / b["best"]
+        if ratio > 1 + threshold and r["best"] > max(b["times"]):
+            status = "regression"
+        elif ratio < 1 / (1 + threshold) and max(r["times"]) < b["best"]:
+            status = "faster"
+        else:
+            status = "same"
+        out.append(Comparison(key[0], key[1], b["best"], r["best"], ratio, status))
+    return out
+
+
+def print_comparison(rows: Sequence[Comparison]) -> None:
+    marks = {"regression": "退化", "faster": "提升", "same": ""}
+    for c in rows:
+        print(f"{c.kernel:14s} n={c.size:<9d} {_fmt(c.old)} → {_fmt(c.new)}  "
+              f"×{c.ratio:5.2f}  {marks[c.status]}")
+    n_reg = sum(c.status == "regression" for c in rows)
+    n_fast = sum(c.status == "faster" for c in rows)
+    print(f"比较{len(rows)}项：退化{n_reg}项，提升{n_fast}项")
+
+
+def _load(path: str) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def _save(path: str, result: dict) -> None:
+    Path(path).write_text(json.dumps(result, ensure_ascii=False, indent=1), encoding="utf-8")
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="计算内核的性能基准")
+    parser.add_argument("kernels", nargs="*", help=f"内核名，默认全部：{', '.join(KERNELS)}")
+    parser.add_argument("--max-size", type=float, default=SIZES[-1], help="最大数据规模")
+    parser.add_argument("--sizes", type=str, default=None, help="逗号分隔的数据规模，如 10,1000,1e5")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="计时轮数")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="每轮最短时间（秒）")
+    parser.add_argument("-o", "--output", default=None, help="结果JSON文件")
+    parser.add_argument("--compare", nargs="+", metavar="JSON",
+                        help="与基准结果比较；给出两个文件时只比较，不运行")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="判为退化的变慢比例")
+    parser.add_argument("--list", action="store_true", help="列出内核")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(KERNELS))
+        return 0
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare 最多给出两个文件")
+    if args.compare and len(args.compare) == 2:
+        rows = compare(_load(args.compare[0]), _load(args.compare[1]), args.threshold)
+        print_comparison(rows)
+        return int(any(c.status == "regression" for c in rows))
+
+    if args.sizes:
+        sizes = [int(float(s)) for s in args.sizes.split(",")]
+    else:
+        sizes = [s for s in SIZES if s <= args.max_size]
+    result = run_suite(args.kernels, sizes, args.repeat, args.min_time)
+    if args.output:
+        _save(args.output, result)  # 先保存计时结果，后续的汇总出错也不丢失测量
+    result["scaling"] = scaling_table(result["results"])
+    print("规模指数（log耗时对log规模的斜率）：" +
+          "，".join(f"{k} {v:.2f}" for k, v in result["scaling"].items()))
+    if args.output:
+        _save(args.output, result)
+    if args.compare:
+        rows = compare(_load(args.compare[0]), result, args.threshold)
+        print_comparison(rows)
+        return int(any(c.status == "regression" for c in rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
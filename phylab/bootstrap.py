@@ -0,0 +1,259 @@
+"""
+拟合参数与导出量的bootstrap/刀切法置信区间（百分位区间与BCa区间）
+
+- 统计量以"下标批"为输入：statistic(idx) 中idx为 (重抽样次数, 点数) 的下标数组，
+  返回 (重抽样次数, 统计量个数)；直线拟合与nlfit模型一次处理整批重抽样（linfit_batch/fit_batch）
+- 重抽样按固定大小分块，每块由 SeedSequence(seed).spawn() 得到独立种子，
+  因此结果只取决于seed，与是否并行、进程数无关
+- 非线性模型（LM迭代）的各块分发到进程池；其余统计量默认在本进程中向量化计算
+- 点数减参数个数小于2时拒绝计算（重抽样基本是精确插值，区间没有意义）
+- 不同点数少于参数个数的退化重抽样（如4个点中只抽到2个不同的点）不参与统计，个数记入n_invalid
+- BCa区间的偏差校正z0取自重抽样分布，加速常数a取自刀切法（留一）估计
+
+用法：
+    from phylab.bootstrap import LinearStatistic, bootstrap
+    stat = LinearStatistic(t, R, derived={"alpha": lambda k, b: k / b})
+    result = bootstrap(stat, len(t), n_resamples=10**5, seed=0)
+    print(result.format("alpha"))
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from phylab.nlfit import Model, fit_batch
+from phylab.regression import linfit_batch
+from phylab.trace import traced
+
+BLOCK = 1 << 13  # 每块重抽样次数（每块一个独立种子）
+CONFIDENCE = 0.95
+MIN_DOF = 2       # 点数至少比参数个数多2个才做重抽样
+
+Array = np.ndarray
+Derived = Dict[str, Callable[..., Array]]
+
+
+# ---------------------- 统计量 ----------------------
+class LinearStatistic:
+    """
+    直线拟合 y = k·x + b 的重抽样统计量，返回 [k, b, *导出量]
+
+    参数:
+    x, y: 一维数据
+    w: 权重（含义同weighted_linfit），随数据点一起被抽取
+    derived: {名称: f(k, b)}，如光速 c = 10⁷/k、温度系数 α = k/b
+    """
+    parallel = False
+
+    def __init__(self, x, y, w=None, derived: Optional[Derived] = None):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.w = None if w is None else np.asarray(w, dtype=float)
+        self.derived = dict(derived or {})
+        self.min_distinct = 2
+
+    @property
+    def names(self) -> List[str]:
+        return ["k", "b"] + list(self.derived)
+
+    def __call__(self, idx: Array) -> Array:
+        fit = linfit_batch(self.x[idx], self.y[idx], None if self.w is None else self.w[idx])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            columns = [fit.k, fit.b] + [f(fit.k, fit.b) for f in self.derived.values()]
+        return np.stack(columns, axis=1)
+
+
+class ModelStatistic:
+    """
+    nlfit模型的重抽样统计量，返回 [各参数, *导出量]
+
+    参数:
+    model: nlfit中的Model（如CAUCHY、SELLMEIER）
+    x, y: 一维数据
+    sigma: 测量标准差，随数据点一起被抽取
+    derived: {名称: f(params)}，params为 (重抽样次数, 参数个数)
+    p0: 非线性模型的初值（各组共用），None时由模型自动估计
+    """
+
+    def __init__(self, model: Model, x, y, sigma=None, derived: Optional[Derived] = None, p0=None):
+        self.model = model
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.sigma = None if sigma is None else np.broadcast_to(np.asarray(sigma, dtype=float), self.y.shape)
+        self.derived = dict(derived or {})
+        self.p0 = p0
+        self.min_distinct = len(model.params)
+        self.parallel = not model.linear  # LM迭代较慢，分块交给进程池
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.model.params) + list(self.derived)
+
+    def __call__(self, idx: Array) -> Array:
+        fit = fit_batch(self.model, self.x[idx], self.y[idx],
+                        sigma=None if self.sigma is None else self.sigma[idx], p0=self.p0)
+        params = np.where(fit.converged[:, None], fit.params, np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            columns = [params] + [np.asarray(f(params)).reshape(-1, 1) for f in self.derived.values()]
+        return np.concatenate(columns, axis=1)
+
+
+# ---------------------- 结果 ----------------------
+@dataclass
+class BootstrapResult:
+    """
+    bootstrap结果（各数组的最后一维对应names中的统计量）
+
+    estimate: 原始数据上的统计量
+    replicates: 有效重抽样的统计量 (次数, 统计量个数)
+    std, bias: bootstrap标准误差与偏差（重抽样均值 − estimate）
+    percentile, bca: 百分位区间与BCa区间，均为 (下限, 上限)
+    jackknife_std: 刀切法（留一）标准误差
+    acceleration, z0: BCa的加速常数与偏差校正量
+    n_invalid: 退化或拟合失败而舍弃的重抽样次数
+    """
+    names: List[str]
+    estimate: Array
+    replicates: Array
+    std: Array
+    bias: Array
+    percentile: Tuple[Array, Array]
+    bca: Tuple[Array, Array]
+    jackknife_std: Array
+    acceleration: Array
+    z0: Array
+    confidence: float
+    n_invalid: int
+
+    def index(self, name: str) -> int:
+        return self.names.index(name)
+
+    def format(self, name: str, fmt: str = ".4g", scale: float = 1.0) -> str:
+        """一行文字：估计值 ± 标准误差，百分位区间与BCa区间（数值乘以scale后显示）"""
+        i = self.index(name)
+        v = lambda a: f"{a[i] * scale:{fmt}}"
+        return (f"{name} = {v(self.estimate)} ± {v(self.std)}，"
+                f"{self.confidence:.0%}百分位区间 [{v(self.percentile[0])}, {v(self.percentile[1])}]，"
+                f"BCa区间 [{v(self.bca[0])}, {v(self.bca[1])}]")
+
+
+# ---------------------- 下标 ----------------------
+def jackknife_indices(n: int) -> Array:
+    """留一法的下标 (n, n−1)，第i行去掉第i个点"""
+    idx = np.tile(np.arange(n - 1), (n, 1))
+    return idx + (idx >= np.arange(n)[:, None])
+
+
+def _distinct(idx: Array) -> Array:
+    s = np.sort(idx, axis=1)
+    return 1 + np.count_nonzero(np.diff(s, axis=1), axis=1)
+
+
+def _evaluate(statistic: Callable[[Array], Array], idx: Array, min_distinct: int) -> Array:
+    """计算一批下标的统计量；不同点数不足的行不计算，结果为NaN"""
+    out = None
+    ok = _distinct(idx) >= min_distinct
+    if ok.any():
+        values = np.asarray(statistic(idx[ok]), dtype=float)
+        values = values.reshape(values.shape[0], -1)
+        out = np.full((idx.shape[0], values.shape[1]), np.nan)
+        out[ok] = values
+    return out
+
+
+def _run_block(statistic, n: int, size: int, seed: np.random.SeedSequence, min_distinct: int):
+    idx = np.random.default_rng(seed).integers(0, n, (size, n))
+    return _evaluate(statistic, idx, min_distinct)
+
+
+# ---------------------- 区间 ----------------------
+def _bca(replicates: Array, estimate: Array, jack: Array, confidence: float):
+    """BCa区间（Efron 1987），返回 (下限, 上限, z0, a)"""
+    nd = NormalDist()
+    n_rep = replicates.shape[0]
+    below = (replicates < estimate).sum(axis=0) + 0.5 * (replicates == estimate).sum(axis=0)
+    frac = np.clip(below / n_rep, 1.0 / n_rep, 1 - 1.0 / n_rep)
+    z0 = np.array([nd.inv_cdf(f) for f in frac])
+
+    d = np.nanmean(jack, axis=0) - jack
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a = np.nansum(d ** 3, axis=0) / (6 * np.nansum(d ** 2, axis=0) ** 1.5)
+    a = np.where(np.isfinite(a), a, 0.0)
+
+    bounds = []
+    for p in ((1 - confidence) / 2, (1 + confidence) / 2):
+        z = nd.inv_cdf(p)
+        adj = np.array([nd.cdf(z0_j + (z0_j + z) / (1 - a_j * (z0_j + z))) for z0_j, a_j in zip(z0, a)])
+        bounds.append(np.array([np.quantile(replicates[:, j], adj[j]) for j in range(replicates.shape[1])]))
+    return bounds[0], bounds[1], z0, a
+
+
+@traced("fit")
+def bootstrap(statistic: Callable[[Array], Array], n_points: int,
+              n_resamples: int = 10 ** 5,
+              confidence: float = CONFIDENCE,
+              seed: Optional[int] = None,
+              names: Optional[Sequence[str]] = None,
+              workers: Optional[int] = None,
+              block: int = BLOCK) -> BootstrapResult:
+    """
+    对n_points个数据点做有放回重抽样，计算统计量的百分位区间与BCa区间
+
+    参数:
+    statistic: 下标批 → (批大小, 统计量个数) 的函数（见LinearStatistic、ModelStatistic）；
+               使用进程池时须可pickle（模块级函数、functools.partial或上述类的实例）
+    n_points: 数据点数
+    n_resamples: 重抽样次数
+    confidence: 置信水平
+    seed: 随机数种子；相同seed在任意workers下结果相同
+    names: 统计量名称，None时取statistic.names
+    workers: 进程数；0为在本进程中计算，None时非线性模型使用全部CPU，其余为0
+    block: 每块重抽样次数
+
+    返回:
+    BootstrapResult；点数减参数个数小于MIN_DOF时抛出ValueError
+    """
+    min_distinct = getattr(statistic, "min_distinct", 1)
+    if n_points - min_distinct < MIN_DOF:
+        # 点数只比参数多0~1个时，重抽样几乎都是穿过p个不同点的精确插值，所得"区间"没有统计意义
+        raise ValueError(f"{n_points}个数据点拟合{min_distinct}个参数，自由度不足{MIN_DOF}，"
+                         "不能用bootstrap估计置信区间")
+    names = list(names or getattr(statistic, "names", []))
+    estimate = _evaluate(statistic, np.arange(n_points)[None, :], 1)[0]
+    if not names:
+        names = [f"θ{i}" for i in range(estimate.size)]
+    jack = _evaluate(statistic, jackknife_indices(n_points), min_distinct)
+    if jack is None:
+        jack = np.full((n_points, estimate.size), np.nan)
+
+    sizes = [min(block, n_resamples - start) for start in range(0, n_resamples, block)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if workers is None:
+        workers = os.cpu_count() if getattr(statistic, "parallel", False) else 0
+    if workers and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(sizes))) as pool:
+            blocks = list(pool.map(_run_block, [statistic] * len(sizes), [n_points] * len(sizes),
+                                   sizes, seeds, [min_distinct] * len(sizes)))
+    else:
+        blocks = [_run_block(statistic, n_points, size, s, min_distinct) for size, s in zip(sizes, seeds)]
+
+    blocks = [b for b in blocks if b is not None]
+    replicates = np.concatenate(blocks) if blocks else np.empty((0, estimate.size))
+    replicates = replicates[np.all(np.isfinite(replicates), axis=1)]
+    n_invalid = n_resamples - replicates.shape[0]
+    if replicates.shape[0] < 2:
+        raise ValueError("有效的重抽样不足2次，数据点过少或拟合全部失败")
+
+    lo, hi = np.quantile(replicates, [(1 - confidence) / 2, (1 + confidence) / 2], axis=0)
+    b_lo, b_hi, z0, a = _bca(replicates, estimate, jack, confidence)
+    valid_jack = jack[np.all(np.isfinite(jack), axis=1)]
+    m = valid_jack.shape[0]
+    jack_std = (np.sqrt((m - 1) / m * ((valid_jack - valid_jack.mean(axis=0)) ** 2).sum(axis=0))
+                if m > 1 else np.full(estimate.size, np.nan))
+    return BootstrapResult(names=names, estimate=estimate, replicates=replicates,
+                           std=replicates.std(axis=0, ddof=1), bias=replicates.mean(axis=0) - estimate,
+                           percentile=(lo, hi), bca=(b_lo, b_hi), jackknife_std=jack_std,
+                           acceleration=a, z0=z0, confidence=confidence, n_invalid=n_invalid)
@@ -0,0 +1,402 @@
+"""
+非平衡电桥（lab14）温度系数的流式计算
+
+数据源按块产生 (t, U) 样本（t单位℃，U单位V），处理全部向量化：
+- 每个样本由 α = 4U / (t(ε − 2U)) 得到温度系数
+- 由 U = (Rx − R0)ε / (2(Rx + R0)) 反解出 Rx = R0(ε + 2U)/(ε − 2U)，
+  在最近window个样本的滚动窗口内拟合 R = R0(1 + αt)
+- 全程的拟合用RunningLinearFit增量累加，窗口用定长环形缓冲区，内存占用与运行时长无关
+- 结果按不超过max_fps的频率推送给实时绘图或其他回调
+
+数据源（均为异步迭代器，每次产出形状为(m, 2)的数组）：
+simulated_daq（本地模拟采集卡）、tail_file（跟踪不断追加的文本文件）、read_pipe（管道/标准输入）。
+文本格式为每行 "t U" 或 "t,U"。
+
+命令行示例：
+python -m phylab.bridge_stream --simulate --rate 10000 --seconds 10
+python -m phylab.bridge_stream --tail log.txt --no-plot
+"""
+import argparse
+import asyncio
+import os
+import stat
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Callable, Optional, Tuple
+
+import numpy as np
+
+from phylab.regression import RunningLinearFit, linfit_batch
+
+EPSILON = 1.3       # 电桥工作电压 (V)，见lab14.typ
+R0 = 50.0           # Cu50在0℃时的标称电阻 (Ω)，即 R1 = R2 = R3
+ALPHA_CU = 4.28e-3  # 铜电阻温度系数理论值 (1/℃)
+WINDOW = 20000      # 滚动窗口样本数（10kHz下为2s）
+MAX_FPS = 10.0      # 推送/重绘频率上限
+SINK_SHARE = 0.5    # 回调（重绘）耗时占总时间的上限，重绘太慢时自动降低帧率
+BLOCK = 500         # 模拟采集卡每块样本数
+
+
+def alpha_from_u(t, U, epsilon: float = EPSILON) -> np.ndarray:
+    """由非平衡电压求温度系数 α = 4U / (t(ε − 2U))，t=0处为NaN"""
+    t = np.asarray(t, dtype=float)
+    U = np.asarray(U, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        alpha = 4 * U / (t * (epsilon - 2 * U))
+    return np.where(np.isfinite(alpha), alpha, np.nan)
+
+
+def resistance_from_u(U, epsilon: float = EPSILON, r0: float = R0) -> np.ndarray:
+    """由非平衡电压反解桥臂电阻 Rx = R0(ε + 2U)/(ε − 2U)"""
+    U = np.asarray(U, dtype=float)
+    return r0 * (epsilon + 2 * U) / (epsilon - 2 * U)
+
+
+# ---------------------- 环形缓冲区 ----------------------
+class RingBuffer:
+    """定长二维环形缓冲区，保留最近capacity行"""
+
+    def __init__(self, capacity: int, width: int):
+        self.data = np.empty((capacity, width))
+        self.capacity = capacity
+        self.head = 0   # 下一次写入的位置
+        self.size = 0
+
+    def extend(self, rows: np.ndarray) -> None:
+        rows = rows[-self.capacity:]
+        m = len(rows)
+        end = self.head + m
+        if end <= self.capacity:
+            self.data[self.head:end] = rows
+        else:
+            split = self.capacity - self.head
+            self.data[self.head:] = rows[:split]
+            self.data[:m - split] = rows[split:]
+        self.head = end % self.capacity
+        self.size = min(self.size + m, self.capacity)
+
+    def view(self) -> np.ndarray:
+        """按时间顺序返回缓冲区内容（副本）"""
+        if self.size < self.capacity:
+            return self.data[:self.size].copy()
+        return np.concatenate([self.data[self.head:], self.data[:self.head]])
+
+
+# ---------------------- 数据源 ----------------------
+def _parse_lines(text: str) -> np.ndarray:
+    """把若干完整的 "t U" / "t,U" 文本行解析为(m, 2)数组，格式不对的行跳过"""
+    lines = text.replace(",", " ").splitlines()
+    values = " ".join(lines).split()
+    n_lines = sum(1 for line in lines if not line.isspace() and line)
+    if len(values) == 2 * n_lines:
+        # 快速路径：每行恰好两个数，整体一次转换
+        try:
+            return np.array(values, dtype=float).reshape(-1, 2)
+        except ValueError:
+            pass
+    rows = []
+    for line in lines:
+        parts = line.split()
+        if len(parts) != 2:
+            continue
+        try:
+            rows.append([float(parts[0]), float(parts[1])])
+        except ValueError:
+            continue
+    return np.array(rows, dtype=float).reshape(-1, 2)
+
+
+class _LineSplitter:
+    """把任意切分的字节流拼成完整行，末尾不完整的一行留到下次"""
+
+    def __init__(self):
+        self.rest = b""
+
+    def feed(self, chunk: bytes) -> np.ndarray:
+        data = self.rest + chunk
+        cut = data.rfind(b"\n") + 1
+        self.rest = data[cut:]
+        if not cut:
+            return np.empty((0, 2))
+        return _parse_lines(data[:cut].decode("utf-8", errors="replace"))
+
+
+async def simulated_daq(rate: float = 10000.0, seconds: Optional[float] = None,
+                        alpha: float = ALPHA_CU, epsilon: float = EPSILON,
+                        t_start: float = 20.0, heating: float = 0.5,
+                        noise: float = 2e-5, block: int = BLOCK,
+                        seed: Optional[int] = None) -> AsyncIterator[np.ndarray]:
+    """
+    本地模拟采集卡：温度线性上升，U按理论公式 U = αtε/(4 + 2αt) 加高斯噪声
+
+    参数:
+    rate: 采样率 (Hz)；0表示不限速（用于测试处理能力）
+    seconds: 采集时长 (s)，None为无限
+    heating: 升温速率 (℃/s)
+    noise: 电压噪声标准差 (V)
+    block: 每块样本数
+    """
+    rng = np.random.default_rng(seed)
+    loop = asyncio.get_running_loop()
+    dt = 1.0 / rate if rate > 0 else 1e-4
+    total = None if seconds is None else int(round(seconds / dt))
+    start = loop.time()
+    i = 0
+    while total is None or i < total:
+        m = block if total is None else min(block, total - i)
+        t = t_start + heating * dt * (i + np.arange(m))
+        U = alpha * t * epsilon / (4 + 2 * alpha * t) + rng.normal(0.0, noise, m)
+        i += m
+        if rate > 0:
+            delay = start + i * dt - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        else:
+            await asyncio.sleep(0)
+        yield np.column_stack([t, U])
+
+
+async def tail_file(path, poll: float = 0.05, from_start: bool = True,
+                    idle_timeout: Optional[float] = None) -> AsyncIterator[np.ndarray]:
+    """
+    跟踪不断追加的文本文件（类似 tail -f）
+
+    参数:
+    poll: 没有新数据时的轮询间隔 (s)
+    from_start: 是否先读出文件已有内容
+    idle_timeout: 连续这么久没有新数据就结束，None为一直等待
+    """
+    splitter = _LineSplitter()
+    idle = 0.0
+    with open(path, "rb") as f:
+        if not from_start:
+            f.seek(0, 2)
+        while True:
+            chunk = f.read(1 << 20)
+            if chunk:
+                idle = 0.0
+                rows = splitter.feed(chunk)
+                if len(rows):
+                    yield rows
+                continue
+            if idle_timeout is not None and idle >= idle_timeout:
+                return
+            await asyncio.sleep(poll)
+            idle += poll
+
+
+async def read_pipe(stream=None, chunk_size: int = 1 << 16) -> AsyncIterator[np.ndarray]:
+    """
+    从管道读取（默认标准输入），写端关闭时结束
+
+    管道和套接字直接注册到事件循环；重定向的普通文件或终端在线程中读取
+    """
+    stream = sys.stdin.buffer if stream is None else stream
+    mode = os.fstat(stream.fileno()).st_mode
+    if stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode):
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), stream)
+        read = lambda: reader.read(chunk_size)
+    else:
+        read = lambda: asyncio.to_thread(stream.read1, chunk_size)
+    splitter = _LineSplitter()
+    while True:
+        chunk = await read()
+        if not chunk:
+            rows = splitter.feed(b"\n")
+            if len(rows):
+                yield rows
+            return
+        rows = splitter.feed(chunk)
+        if len(rows):
+            yield rows
+
+
+# ---------------------- 流水线 ----------------------
+@dataclass
+class BridgeUpdate:
+    """
+    一次推送的结果
+
+    n_total: 已处理样本数
+    t_last: 最新样本温度 (℃)
+    alpha_window: 窗口内各样本α的平均值 (1/℃)
+    alpha_fit: 窗口内拟合 R = R0(1 + αt) 得到的α，即斜率/截距 (1/℃)
+    r0_fit: 窗口内拟合的截距，即0℃电阻 (Ω)
+    r2: 窗口内拟合的决定系数
+    alpha_total: 全部样本拟合得到的α (1/℃)
+    rate: 实际处理速率 (样本/s)
+    """
+    n_total: int
+    t_last: float
+    alpha_window: float
+    alpha_fit: float
+    r0_fit: float
+    r2: float
+    alpha_total: float
+    rate: float
+
+
+Sink = Callable[[BridgeUpdate, np.ndarray], None]
+
+
+async def run_pipeline(source: AsyncIterator[np.ndarray], sink: Optional[Sink] = None,
+                       window: int = WINDOW, epsilon: float = EPSILON, r0: float = R0,
+                       max_fps: float = MAX_FPS) -> Optional[BridgeUpdate]:
+    """
+    消费数据源，计算滚动窗口内的温度系数并限频推送
+
+    参数:
+    source: 产出(m, 2)数组 [t, U] 的异步迭代器
+    sink: 回调 sink(update, window_rows)，window_rows为窗口内的 [t, U, R] 三列；
+          调用频率不超过max_fps，且回调耗时不超过总时间的SINK_SHARE；数据源结束时再调用一次
+    window: 滚动窗口样本数
+
+    返回:
+    最后一次的BridgeUpdate；没有收到数据时为None
+    """
+    ring = RingBuffer(window, 3)
+    total = RunningLinearFit()
+    n_total = 0
+    start = time.perf_counter()
+    frame = 1.0 / max_fps if max_fps > 0 else 0.0
+    next_emit = -np.inf
+    update = None
+
+    def snapshot() -> Tuple[BridgeUpdate, np.ndarray]:
+        rows = ring.view()
+        fit = linfit_batch(rows[:, 0], rows[:, 2])
+        with np.errstate(invalid="ignore"):
+            alpha_window = np.nanmean(alpha_from_u(rows[:, 0], rows[:, 1], epsilon)) if len(rows) else np.nan
+        elapsed = time.perf_counter() - start
+        return BridgeUpdate(n_total=n_total, t_last=float(rows[-1, 0]),
+                            alpha_window=float(alpha_window),
+                            alpha_fit=float(fit.k[0] / fit.b[0]), r0_fit=float(fit.b[0]),
+                            r2=float(fit.r2[0]), alpha_total=float(total.alpha),
+                            rate=n_total / elapsed if elapsed > 0 else np.nan), rows
+
+    pending = False
+    async for block in source:
+        block = np.asarray(block, dtype=float).reshape(-1, 2)
+        if not len(block):
+            continue
+        t, U = block[:, 0], block[:, 1]
+        R = resistance_from_u(U, epsilon, r0)
+        ring.extend(np.column_stack([t, U, R]))
+        total.extend(t, R)
+        n_total += len(block)
+        pending = True
+        now = time.perf_counter()
+        if now >= next_emit:
+            update, rows = snapshot()
+            if sink is not None:
+                sink(update, rows)
+            cost = time.perf_counter() - now
+            next_emit = now + max(frame, cost / SINK_SHARE)
+            pending = False
+    if pending:
+        update, rows = snapshot()
+        if sink is not None:
+            sink(update, rows)
+    return update
+
+
+# ---------------------- 输出 ----------------------
+class LivePlot:
+    """
+    实时绘图：上图为窗口内的R-t数据与拟合直线，下图为α随温度的变化
+
+    只在构造时创建一次图形，之后每帧只更新线条数据；
+    history为下图保留的点数上限
+    """
+
+    def __init__(self, history: int = 2000, max_points: int = 2000):
+        import matplotlib.pyplot as plt
+
+        self.plt = plt
+        plt.ion()
+        self.fig, (self.ax_r, self.ax_a) = plt.subplots(2, 1, figsize=(9, 7))
+        self.max_points = max_points
+        (self.points,) = self.ax_r.plot([], [], ".", ms=2, color="blue", label="Window data")
+        (self.line,) = self.ax_r.plot([], [], "-", color="red", label="Linear fit")
+        self.ax_r.set_xlabel("Temperature t (℃)")
+        self.ax_r.set_ylabel("Resistance R (Ω)")
+        self.ax_r.legend(loc="upper left")
+        self.ax_r.grid(True, alpha=0.3)
+        self.hist_t = deque(maxlen=history)
+        self.hist_fit = deque(maxlen=history)
+        self.hist_mean = deque(maxlen=history)
+        (self.a_fit,) = self.ax_a.plot([], [], "-", color="red", label="α from R-t fit")
+        (self.a_mean,) = self.ax_a.plot([], [], "-", color="blue", label="mean of 4U/(t(ε-2U))")
+        self.ax_a.set_xlabel("Temperature t (℃)")
+        self.ax_a.set_ylabel("α (10^-3/℃)")
+        self.ax_a.legend(loc="upper left")
+        self.ax_a.grid(True, alpha=0.3)
+        self.title = self.fig.suptitle("")
+        self.fig.tight_layout()
+
+    def __call__(self, update: BridgeUpdate, rows: np.ndarray) -> None:
+        step = max(1, len(rows) // self.max_points)
+        shown = rows[::step]
+        self.points.set_data(shown[:, 0], shown[:, 2])
+        t_end = rows[[0, -1], 0]
+        self.line.set_data(t_end, update.r0_fit * (1 + update.alpha_fit * t_end))
+        self.hist_t.append(update.t_last)
+        self.hist_fit.append(update.alpha_fit * 1e3)
+        self.hist_mean.append(update.alpha_window * 1e3)
+        self.a_fit.set_data(self.hist_t, self.hist_fit)
+        self.a_mean.set_data(self.hist_t, self.hist_mean)
+        for ax in (self.ax_r, self.ax_a):
+            ax.relim()
+            ax.autoscale_view()
+        self.title.set_text(f"n = {update.n_total}, α = {update.alpha_fit * 1e3:.3f}e-3/℃, "
+                            f"R0 = {update.r0_fit:.3f} Ω, {update.rate:.0f} samples/s")
+        self.fig.canvas.draw_idle()
+        self.fig.canvas.flush_events()
+
+
+def print_update(update: BridgeUpdate, rows: np.ndarray) -> None:
+    print(f"n={update.n_total:>9d}  t={update.t_last:7.2f}℃  "
+          f"α(fit)={update.alpha_fit * 1e3:.4f}e-3  α(mean)={update.alpha_window * 1e3:.4f}e-3  "
+          f"α(total)={update.alpha_total * 1e3:.4f}e-3  R0={update.r0_fit:.4f}Ω  R²={update.r2:.6f}  {update.rate:,.0f}/s", flush=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="非平衡电桥温度系数的流式计算与实时绘图")
+    src = parser.add_mutually_exclusive_group()
+    src.add_argument("--simulate", action="store_true", help="使用模拟采集卡（默认）")
+    src.add_argument("--tail", metavar="FILE", help="跟踪文本文件，每行 't U'")
+    src.add_argument("--pipe", action="store_true", help="从标准输入读取")
+    parser.add_argument("--rate", type=float, default=10000.0, help="模拟采样率 Hz，0为不限速")
+    parser.add_argument("--seconds", type=float, default=10.0, help="模拟采集时长 s")
+    parser.add_argument("--window", type=int, default=WINDOW, help="滚动窗口样本数")
+    parser.add_argument("--epsilon", type=float, default=EPSILON, help="电桥工作电压 V")
+    parser.add_argument("--r0", type=float, default=R0, help="桥臂电阻 Ω")
+    parser.add_argument("--fps", type=float, default=MAX_FPS, help="刷新频率上限")
+    parser.add_argument("--no-plot", action="store_true", help="不绘图，只在终端输出")
+    args = parser.parse_args(argv)
+
+    if args.tail:
+        source = tail_file(Path(args.tail), idle_timeout=None)
+    elif args.pipe:
+        source = read_pipe()
+    else:
+        source = simulated_daq(rate=args.rate, seconds=args.seconds, epsilon=args.epsilon)
+    sink = print_update if args.no_plot else LivePlot()
+
+    try:
+        final = asyncio.run(run_pipeline(source, sink, window=args.window, epsilon=args.epsilon,
+                                         r0=args.r0, max_fps=args.fps))
+    except KeyboardInterrupt:
+        return 130
+    if final is not None and not args.no_plot:  # --no-plot时最后一次更新已由sink输出
+        print_update(final, np.empty((0, 3)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,523 @@
+"""
+增量构建：数据 → 绘图脚本 → 图片 → Typst报告 → PDF
+
+依赖图的两类节点：
+- 脚本节点（lab*/*.py）：输入为脚本本身、它导入的phylab模块（静态分析import）、
+  运行时读取的数据文件；输出为运行时写出的文件（图片等）。
+  读写哪些文件由工作进程中的审计钩子（sys.addaudithook）在运行时记录，
+  不需要在脚本里声明；命中缓存时不打开源文件的读取函数（如xlsx_cache、typst_tables）
+  会发出 "phylab.input" 审计事件补记依赖
+- 文档节点（lab*/*.typ）：输入为typ文件及其 #import/#include、image(...)、read(...) 引用的文件
+  （递归），输出为同名PDF；编译命令可替换（见TYPST_CMD），测试时可用 --stub 代替typst
+
+每个文件按 (修改时间, 大小) 缓存内容哈希，判断是否变化只比较哈希。
+节点的输入与输出哈希都与上次成功构建时一致才视为最新，否则重建；
+上游节点全部完成后才检查下游节点，互不依赖的节点并行执行（脚本用进程池，编译用线程池）。
+构建记录保存在 .phylab_cache/build.json。
+
+用法（在仓库根目录下执行）:
+    python -m phylab.build               # 只重建过期的节点
+    python -m phylab.build lab10 -j 4    # 只处理目录名包含lab10的实验
+    python -m phylab.build -n            # 只列出过期节点及原因
+    python -m phylab.build -B            # 全部重建
+    python -m phylab.build --typst "typst compile --root . {input} {output}"
+    python -m phylab.build --stub        # 用内置桩程序代替typst编译（会覆盖同名PDF，仅用于测试）
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from phylab import runner
+
+REPO_ROOT = runner.REPO_ROOT
+STATE_FILE = REPO_ROOT / ".phylab_cache" / "build.json"
+STATE_VERSION = 1
+TYPST_CMD = os.environ.get("PHYLAB_TYPST", "typst compile {input} {output}")
+STUB_CMD = f"{shlex.quote(sys.executable)} -m phylab.build --stub-compile {{input}} {{output}}"
+INPUT_EVENT = "phylab.input"
+
+# 运行时记录的文件中忽略的目录（缓存、字节码等）
+IGNORED_PARTS = (".phylab_cache", "__pycache__", ".git")
+
+
+@dataclass
+class Node:
+    """
+    依赖图节点
+
+    id: 唯一标识，如 "script:lab10-.../plot1.py"、"typst:lab10-.../lab10.typ"
+    kind: "script" 或 "typst"
+    source: 脚本或typ文件
+    static_inputs: 静态分析得到的输入（相对仓库根目录的路径）
+    outputs: 已知输出（文档节点为PDF；脚本节点来自上次构建的记录）
+    """
+    id: str
+    kind: str
+    source: Path
+    static_inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+
+
+@dataclass
+class NodeResult:
+    """节点执行结果；inputs/outputs为运行时记录的文件（相对路径）"""
+    node_id: str
+    ok: bool
+    seconds: float
+    error: str = ""
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+
+
+def _rel(path) -> Optional[str]:
+    """仓库内的路径转为相对路径，仓库外或需忽略的返回None"""
+    try:
+        rel = Path(os.path.abspath(path)).relative_to(REPO_ROOT)
+    except ValueError:
+        return None
+    if any(part in IGNORED_PARTS for part in rel.parts):
+        return None
+    return rel.as_posix()
+
+
+# ---------------------- 文件哈希 ----------------------
+class FileHashes:
+    """按 (mtime_ns, size) 缓存的文件内容哈希；文件不存在时哈希为None"""
+
+    def __init__(self, table: Optional[dict] = None):
+        self.table: Dict[str, list] = dict(table or {})
+        self.hashed = 0  # 本次实际读取并计算哈希的文件数
+
+    def digest(self, rel: str) -> Optional[str]:
+        path = REPO_ROOT / rel
+        try:
+            st = path.stat()
+        except OSError:
+            self.table.pop(rel, None)
+            return None
+        cached = self.table.get(rel)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        self.hashed += 1
+        self.table[rel] = [st.st_mtime_ns, st.st_size, h.hexdigest()]
+        return h.hexdigest()
+
+    def snapshot(self, rels: Iterable[str]) -> Dict[str, Optional[str]]:
+        return {rel: self.digest(rel) for rel in sorted(set(rels))}
+
+
+# ---------------------- 静态依赖 ----------------------
+_PY_IMPORT = re.compile(r"^[ \t]*(?:from[ \t]+(phylab(?:\.\w+)*)[ \t]+import[ \t]+(\([^)]*\)|[^\n#]+)"
+                        r"|import[ \t]+(phylab\.[\w.]+))", re.M)
+
+
+def _phylab_imports(path: Path, _memo: Dict[Path, Set[str]] = {}) -> Set[str]:
+    """脚本或模块中导入的phylab模块名（正则匹配import语句，比解析语法树快一个数量级）"""
+    if path not in _memo:
+        names = set()
+        for module, members, plain in _PY_IMPORT.findall(path.read_text(encoding="utf-8")):
+            if plain:
+                names.add(plain)
+            elif module == "phylab":
+                names.update(f"phylab.{m}" for m in re.findall(r"\w+", members) if m != "as")
+            else:
+                names.add(module)
+        _memo[path] = names
+    return _memo[path]
+
+
+def python_deps(script: Path) -> List[str]:
+    """脚本及其（递归）导入的phylab模块文件，相对路径"""
+    seen: Set[str] = set()
+    files = [script]
+    todo = list(_phylab_imports(script))
+    while todo:
+        name = todo.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        path = REPO_ROOT.joinpath(*name.split(".")).with_suffix(".py")
+        if path.exists():
+            files.append(path)
+            todo.extend(_phylab_imports(path))
+    return sorted(filter(None, (_rel(p) for p in files)))
+
+
+_TYPST_REF = re.compile(r"""(?:#?\b(?:import|include)\s+|\b(?:image|read|csv|json|yaml|toml|xml)\s*\(\s*)"([^"]+)\"""")
+
+
+def typst_deps(source: Path) -> List[str]:
+    """typ文件及其递归引用的文件（路径相对引用它的文件；以/开头时相对仓库根目录）"""
+    found: Set[str] = set()
+    todo = [source.resolve()]
+    while todo:
+        path = todo.pop()
+        rel = _rel(path)
+        if rel is None or rel in found:
+            continue
+        found.add(rel)
+        if path.suffix != ".typ" or not path.exists():
+            continue
+        for ref in _TYPST_REF.findall(path.read_text(encoding="utf-8")):
+            if ref.startswith("@"):        # 包管理器中的包，不在仓库内
+                continue
+            todo.append(REPO_ROOT / ref.lstrip("/") if ref.startswith("/") else path.parent / ref)
+    return sorted(found)
+
+
+# ---------------------- 依赖图 ----------------------
+def discover(root: Path = REPO_ROOT, patterns: Sequence[str] = (),
+             state: Optional[dict] = None) -> Dict[str, Node]:
+    """发现全部脚本与文档节点；脚本的输出取自上次构建记录"""
+    records = (state or {}).get("nodes", {})
+    nodes: Dict[str, Node] = {}
+    for script in runner.discover_scripts(root, patterns):
+        nid = f"script:{_rel(script)}"
+        nodes[nid] = Node(nid, "script", script, python_deps(script),
+                          list(records.get(nid, {}).get("outputs", {})))
+    for typ in sorted(Path(root).glob("lab*/*.typ")):
+        if patterns and not any(k in typ.parent.name for k in patterns):
+            continue
+        nid = f"typst:{_rel(typ)}"
+        nodes[nid] = Node(nid, "typst", typ, typst_deps(typ), [_rel(typ.with_suffix(".pdf"))])
+    return nodes
+
+
+def upstream(nodes: Dict[str, Node], state: dict) -> Dict[str, Set[str]]:
+    """
+    每个节点的上游节点：产生其输入文件的节点；
+    文档节点还要等待尚无构建记录（输出未知）的脚本节点
+    """
+    records = state.get("nodes", {})
+    producer = {out: nid for nid, node in nodes.items() for out in node.outputs}
+    unknown = {nid for nid, n in nodes.items() if n.kind == "script" and nid not in records}
+    deps: Dict[str, Set[str]] = {}
+    for nid, node in nodes.items():
+        inputs = set(node.static_inputs) | set(records.get(nid, {}).get("inputs", {}))
+        up = {producer[f] for f in inputs if f in producer} - {nid}
+        if node.kind == "typst":
+            up |= unknown
+        deps[nid] = up
+    return deps
+
+
+def stale_reason(node: Node, state: dict, hashes: FileHashes,
+                 typst_cmd: str) -> Optional[str]:
+    """节点需要重建的原因，最新时返回None"""
+    record = state.get("nodes", {}).get(node.id)
+    if record is None:
+        return "首次构建"
+    if node.kind == "typst" and record.get("command") != typst_cmd:
+        return "编译命令变化"
+    inputs = dict(record.get("inputs", {}))
+    for rel in node.static_inputs:
+        inputs.setdefault(rel, None)
+    for rel, old in inputs.items():
+        new = hashes.digest(rel)
+        if new != old:
+            return f"输入{'缺失' if new is None else '变化'}：{rel}"
+    for rel, old in record.get("outputs", {}).items():
+        new = hashes.digest(rel)
+        if new != old:
+            return f"输出{'缺失' if new is None else '被修改'}：{rel}"
+    return None
+
+
+# ---------------------- 工作进程：运行脚本并记录读写的文件 ----------------------
+class _Recorder:
+    def __init__(self):
+        self.reads: Set[str] = set()
+        self.writes: Set[str] = set()
+
+
+_RECORDER: Optional[_Recorder] = None
+
+
+def _audit(event: str, args) -> None:
+    rec = _RECORDER
+    if rec is None:
+        return
+    if event == "open":
+        path, mode, flags = args
+        if not isinstance(path, (str, bytes, os.PathLike)):
+            return
+        path = os.fsdecode(path)
+        if mode is None:
+            write = bool(flags & (os.O_WRONLY | os.O_RDWR | os.O_CREAT))
+        else:
+            write = any(c in mode for c in "wax+")
+        (rec.writes if write else rec.reads).add(os.path.abspath(path))
+    elif event == "os.rename":
+        rec.writes.add(os.path.abspath(os.fsdecode(args[1])))
+    elif event == INPUT_EVENT:
+        rec.reads.add(os.path.abspath(os.fsdecode(args[0])))
+
+
+def _init_worker() -> None:
+    runner._warm_up()
+    sys.addaudithook(_audit)
+
+
+def build_script(script: Path) -> NodeResult:
+    """在工作进程中运行脚本的全部绘图任务，返回其读写的仓库内文件"""
+    global _RECORDER
+    nid = f"script:{_rel(script)}"
+    rec = _RECORDER = _Recorder()
+    start = time.perf_counter()
+    try:
+        names = runner.list_script_jobs(script) if runner.defines_plot_jobs(script) else [None]
+        results = [runner.run_job(runner.PlotJob(script, name)) for name in names]
+        ok = all(r.ok for r in results)
+        error = "\n".join(r.error for r in results if not r.ok)
+    except Exception:
+        import traceback
+        ok, error = False, traceback.format_exc(limit=-3)
+    finally:
+        _RECORDER = None
+    outputs = {r for r in map(_rel, rec.writes) if r and (REPO_ROOT / r).exists()}
+    inputs = {r for r in map(_rel, rec.reads) if r and not r.endswith(".py")} - outputs
+    return NodeResult(nid, ok, time.perf_counter() - start, error, sorted(inputs), sorted(outputs))
+
+
+def compile_typst(node: Node, typst_cmd: str) -> NodeResult:
+    """调用编译命令生成PDF；命令模板中的 {input}、{output}、{root} 会被替换"""
+    start = time.perf_counter()
+    output = REPO_ROOT / node.outputs[0]
+    argv = [a.format(input=node.source, output=output, root=REPO_ROOT)
+            for a in shlex.split(typst_cmd)]
+    # 保证桩程序等Python实现的编译命令能导入phylab
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])))
+    try:
+        proc = subprocess.run(argv, cwd=node.source.parent, capture_output=True, env=env,
+                              text=True, encoding="utf-8", errors="replace")
+        ok = proc.returncode == 0 and output.exists()
+        error = "" if ok else (proc.stderr or proc.stdout or f"返回码 {proc.returncode}").strip()
+    except OSError as e:
+        ok, error = False, f"无法执行编译命令 {argv[0]}：{e}"
+    return NodeResult(node.id, ok, time.perf_counter() - start, error,
+                      list(node.static_inputs), list(node.outputs))
+
+
+def stub_compile(source: Path, output: Path) -> None:
+    """
+    typst的桩程序：检查全部引用文件存在，写出一个记录各依赖哈希的最小PDF。
+    用于在未安装typst的环境中测试构建流程
+    """
+    hashes = FileHashes()
+    deps = typst_deps(Path(source))
+    missing = [rel for rel in deps if hashes.digest(rel) is None]
+    if missing:
+        raise SystemExit(f"error: file not found: {', '.join(missing)}")
+    lines = [f"% {rel} {hashes.digest(rel)}" for rel in deps]
+    tmp = Path(output).with_name(f".{Path(output).name}.{os.getpid()}.tmp")
+    tmp.write_text("%PDF-1.4\n" + "\n".join(lines) + "\n%%EOF\n", encoding="utf-8")
+    os.replace(tmp, output)
+
+
+# ---------------------- 调度 ----------------------
+def load_state(path: Path = STATE_FILE) -> dict:
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"version": STATE_VERSION, "files": {}, "nodes": {}}
+    if state.get("version") != STATE_VERSION:
+        return {"version": STATE_VERSION, "files": {}, "nodes": {}}
+    return state
+
+
+def save_state(state: dict, path: Path = STATE_FILE) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(state, ensure_ascii=False, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+@dataclass
+class BuildReport:
+    """
+    一次构建的结果
+
+    results: 实际执行的节点结果（按完成顺序）
+    up_to_date: 无需重建的节点
+    skipped: 因上游失败而未执行的节点
+    wall: 总耗时（秒）
+    hashed: 重新计算哈希的文件数
+    """
+    results: List[NodeResult]
+    up_to_date: List[str]
+    skipped: List[str]
+    wall: float
+    hashed: int
+
+    @property
+    def ok(self) -> bool:
+        return all(r.ok for r in self.results) and not self.skipped
+
+
+def build(patterns: Sequence[str] = (), workers: Optional[int] = None,
+          force: bool = False, dry_run: bool = False,
+          typst_cmd: str = TYPST_CMD, state_file: Path = STATE_FILE,
+          verbose: bool = True) -> BuildReport:
+    """
+    增量构建
+
+    参数:
+    patterns: 实验目录名过滤关键字，为空时处理全部实验
+    workers: 并行数，None时使用CPU核数
+    force: 忽略构建记录，全部重建
+    dry_run: 只列出过期节点（不考虑上游重建带来的连锁变化）
+    typst_cmd: 编译命令模板
+    state_file: 构建记录文件
+
+    返回:
+    BuildReport
+    """
+    start = time.perf_counter()
+    state = load_state(state_file)
+    if force:
+        state["nodes"] = {}
+    hashes = FileHashes(state.get("files"))
+    nodes = discover(REPO_ROOT, patterns, state)
+    deps = upstream(nodes, state)
+    report = BuildReport([], [], [], 0.0, 0)
+
+    if dry_run:
+        for nid in nodes:
+            reason = stale_reason(nodes[nid], state, hashes, typst_cmd)
+            if reason is None:
+                report.up_to_date.append(nid)
+            elif verbose:
+                print(f"{nid}  ({reason})")
+        report.wall = time.perf_counter() - start
+        report.hashed = hashes.hashed
+        return report
+
+    workers = workers or os.cpu_count() or 1
+    procs: Optional[ProcessPoolExecutor] = None   # 有过期脚本时才启动进程池
+    threads = ThreadPoolExecutor(max_workers=workers)
+    pending = dict(deps)
+    finished: Set[str] = set()
+    failed: Set[str] = set()
+    running: Dict[Future, str] = {}
+    try:
+        while pending or running:
+            progressed = True
+            while progressed:
+                progressed = False
+                for nid in [n for n, up in pending.items() if up <= finished]:
+                    del pending[nid]
+                    node = nodes[nid]
+                    if deps[nid] & failed:
+                        report.skipped.append(nid)
+                        failed.add(nid)
+                        finished.add(nid)
+                        progressed = True
+                        continue
+                    reason = stale_reason(node, state, hashes, typst_cmd)
+                    if reason is None:
+                        report.up_to_date.append(nid)
+                        finished.add(nid)
+                        progressed = True
+                        continue
+                    # 上游都已完成仍缺少的引用文件（如未提交的照片）无法生成，不必启动编译
+                    missing = [rel for rel in node.static_inputs if hashes.digest(rel) is None]
+                    if missing:
+                        report.results.append(NodeResult(nid, False, 0.0, f"缺少输入文件：{', '.join(missing)}"))
+                        failed.add(nid)
+                        finished.add(nid)
+                        state["nodes"].pop(nid, None)
+                        progressed = True
+                        continue
+                    if verbose:
+                        print(f"[构建] {nid}  ({reason})", flush=True)
+                    if node.kind == "script":
+                        if procs is None:
+                            procs = ProcessPoolExecutor(max_workers=workers,
+                                                        initializer=_init_worker)
+                        running[procs.submit(build_script, node.source)] = nid
+                    else:
+                        running[threads.submit(compile_typst, node, typst_cmd)] = nid
+            if not running:
+                if pending:
+                    raise RuntimeError(f"依赖图中存在循环：{sorted(pending)}")
+                break
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                nid = running.pop(future)
+                result = future.result()
+                report.results.append(result)
+                finished.add(nid)
+                if not result.ok:
+                    failed.add(nid)
+                    state["nodes"].pop(nid, None)
+                    continue
+                node = nodes[nid]
+                record = {"inputs": hashes.snapshot(set(result.inputs) | set(node.static_inputs)),
+                          "outputs": hashes.snapshot(result.outputs)}
+                if node.kind == "typst":
+                    record["command"] = typst_cmd
+                state["nodes"][nid] = record
+                if verbose:
+                    print(f"[完成] {nid}  {result.seconds:.2f} s", flush=True)
+    finally:
+        threads.shutdown()
+        if procs is not None:
+            procs.shutdown()
+        state["files"] = hashes.table
+        save_state(state, state_file)
+    report.wall = time.perf_counter() - start
+    report.hashed = hashes.hashed
+    return report
+
+
+def print_summary(report: BuildReport) -> None:
+    failed = [r for r in report.results if not r.ok]
+    print(f"重建：{len(report.results)} | 最新：{len(report.up_to_date)} | "
+          f"失败：{len(failed)} | 跳过：{len(report.skipped)} | "
+          f"重新计算哈希：{report.hashed}个文件 | 耗时：{report.wall:.3f} s")
+    for r in failed:
+        print(f"\n[{r.node_id}]\n{r.error}")
+    for nid in report.skipped:
+        print(f"跳过（上游失败）：{nid}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv[:1] == ["--stub-compile"]:
+        stub_compile(Path(argv[1]), Path(argv[2]))
+        return 0
+
+    parser = argparse.ArgumentParser(description="增量重新生成实验图片与报告PDF")
+    parser.add_argument("patterns", nargs="*", help="实验目录名过滤关键字，如 lab10")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="并行数，默认为CPU核数")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="只列出过期节点")
+    parser.add_argument("-B", "--always-make", action="store_true", help="全部重建")
+    parser.add_argument("--typst", default=None,
+                        help="编译命令模板，可用{input}、{output}、{root}（默认取环境变量PHYLAB_TYPST）")
+    parser.add_argument("--stub", action="store_true", help="用内置桩程序代替typst编译")
+    args = parser.parse_args(argv)
+
+    typst_cmd = STUB_CMD if args.stub else (args.typst or TYPST_CMD)
+    report = build(args.patterns, args.jobs, args.always_make, args.dry_run, typst_cmd)
+    if not args.dry_run:
+        print_summary(report)
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""
+绘图前的降采样：按输出图片的像素宽度只保留画得出来的点，分析计算仍使用全部数据
+
+- lttb: Largest-Triangle-Three-Buckets，适合x单调的曲线；每个桶保留与相邻两桶质心
+  所成三角形面积最大的点（用相邻桶的质心代替上一桶已选点，全部向量化，无逐桶循环）
+- minmax: 按采样序号分桶，每桶保留x、y各自的最小、最大值点，适合回线等x不单调的参数曲线
+- 无论哪种方法，首末点（闭合回线的接合处）、全局极值点以及每个过零点两侧的采样点都会保留，
+  峰值、过零位置和回线闭合在图上与全分辨率一致
+- NaN（matplotlib画作曲线的间断）不参与分桶比较，每段间断的第一个NaN点及其两侧的点都会保留
+- 点数不超过预算时原样返回；每条曲线可单独选择是否降采样，Decimated.ratio给出压缩比
+
+用法：
+    from phylab.decimate import plot_decimated
+    lines, info = plot_decimated(ax, H_closed, B_closed, color='#1E90FF')
+    print(info)   # 1000001 → 7180 个点（139.3×）
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from phylab.export import DPI
+from phylab.trace import traced
+
+Array = np.ndarray
+POINTS_PER_PIXEL = 2     # 每个像素列保留的点数（一上一下即可画出该列的竖直跨度）
+DEFAULT_BUDGET = 4000    # 未给出坐标轴时的点数预算
+
+
+@dataclass
+class Decimated:
+    """
+    降采样结果
+
+    x, y: 保留的点（按原顺序）
+    index: 保留点在原数组中的序号
+    n_in: 原始点数
+    method: 实际使用的方法（"lttb"、"minmax"或"none"）
+    """
+    x: Array
+    y: Array
+    index: Array
+    n_in: int
+    method: str
+
+    @property
+    def n_out(self) -> int:
+        return int(self.index.size)
+
+    @property
+    def ratio(self) -> float:
+        """压缩比 原始点数/保留点数"""
+        return self.n_in / max(self.n_out, 1)
+
+    def __str__(self) -> str:
+        return f"{self.n_in} → {self.n_out} 个点（{self.ratio:.1f}×，{self.method}）"
+
+
+# ---------------------- 分桶工具 ----------------------
+def _buckets(n: int, n_buckets: int, first: int = 0, last: Optional[int] = None):
+    """把 [first, last) 均分为n_buckets个非空的桶，返回 (各桶起点, 每个点所属的桶号)"""
+    last = n if last is None else last
+    edges = np.linspace(first, last, n_buckets + 1).astype(np.intp)
+    starts = edges[:-1]
+    return starts, np.repeat(np.arange(n_buckets), np.diff(edges))
+
+
+def _argbest(score: Array, starts: Array, seg: Array, offset: int, reduce) -> Array:
+    """
+    各桶中score取最大（reduce=np.fmax）或最小值（np.fmin）的第一个位置；NaN不参与比较，
+    全为NaN的桶不返回任何位置
+    """
+    best = reduce.reduceat(score, starts - offset)
+    idx = np.arange(score.size)
+    pick = np.minimum.reduceat(np.where(score == best[seg], idx, score.size), starts - offset)
+    return pick[pick < score.size] + offset
+
+
+def lttb(x, y, n_out: int) -> Array:
+    """
+    LTTB降采样，返回保留点的序号（含首末点）
+
+    参数:
+    x, y: 一维数组，x应单调
+    n_out: 保留点数（≥3）
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = x.size
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    nb = n_out - 2
+    starts, seg = _buckets(n, nb, 1, n - 1)
+    ok = np.isfinite(x[1:-1]) & np.isfinite(y[1:-1])
+    counts = np.add.reduceat(ok, starts - 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 质心只用有限值的点；整桶为间断（NaN）时质心为NaN，相邻桶的面积随之为NaN而不被选中
+        cx = np.add.reduceat(np.where(ok, x[1:-1], 0.0), starts - 1) / counts
+        cy = np.add.reduceat(np.where(ok, y[1:-1], 0.0), starts - 1) / counts
+    # 每个桶的两个顶点：前一桶质心（第一桶为首点）与后一桶质心（最后一桶为末点）
+    ax, ay = np.r_[x[0], cx[:-1]][seg], np.r_[y[0], cy[:-1]][seg]
+    bx, by = np.r_[cx[1:], x[-1]][seg], np.r_[cy[1:], y[-1]][seg]
+    px, py = x[1:-1], y[1:-1]
+    area = np.abs((ax - bx) * (py - ay) - (ax - px) * (by - ay))
+    return np.r_[0, _argbest(area, starts, seg, 1, np.fmax) + 1, n - 1]
+
+
+def minmax(x, y, n_buckets: int) -> Array:
+    """
+    按序号分桶，每桶保留x、y的最小与最大值点（每桶至多4个点），返回排好序的序号
+
+    参数:
+    x, y: 一维数组，x可以不单调（如磁滞回线）
+    n_buckets: 桶数
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = x.size
+    if n <= 4 * n_buckets:
+        return np.arange(n)
+    starts, seg = _buckets(n, n_buckets)
+    picks = [_argbest(v, starts, seg, 0, r) for v in (x, y) for r in (np.fmin, np.fmax)]
+    return np.unique(np.concatenate(picks))
+
+
+def _crossings(v: Array) -> Array:
+    """v变号处两侧采样点的序号（两侧都须为有限值）"""
+    i = np.flatnonzero((np.signbit(v[:-1]) != np.signbit(v[1:])) & np.isfinite(v[:-1]) & np.isfinite(v[1:]))
+    return np.r_[i, i + 1]
+
+
+def _gaps(x: Array, y: Array) -> Array:
+    """每段NaN间断的第一个点及其前后的有限点，保证降采样后的曲线在同样位置断开"""
+    bad = ~(np.isfinite(x) & np.isfinite(y))
+    if not bad.any():
+        return np.empty(0, dtype=np.intp)
+    edge = np.diff(np.r_[0, bad.view(np.int8), 0])
+    first, stop = np.flatnonzero(edge == 1), np.flatnonzero(edge == -1)
+    i = np.r_[first, first - 1, stop]
+    return i[(i >= 0) & (i < x.size)]
+
+
+def _extrema(v: Array) -> list:
+    """忽略NaN的最大、最小值位置（全为NaN时为空）"""
+    return [np.nanargmax(v), np.nanargmin(v)] if np.isfinite(v).any() else []
+
+
+def pixel_budget(ax, dpi: float = DPI, per_pixel: int = POINTS_PER_PIXEL) -> int:
+    """坐标轴在保存分辨率下的像素宽度 × 每像素点数"""
+    fig = ax.figure
+    width_px = ax.get_window_extent().width / fig.dpi * dpi
+    return max(int(width_px * per_pixel), 16)
+
+
+# ---------------------- 入口 ----------------------
+@traced("render")
+def decimate(x, y, budget: Optional[int] = None, ax=None, method: str = "auto",
+             dpi: float = DPI) -> Decimated:
+    """
+    按像素预算降采样一条曲线
+
+    参数:
+    x, y: 一维数组
+    budget: 保留点数上限；None时由ax的像素宽度决定（见pixel_budget），再无ax时为DEFAULT_BUDGET
+    ax: 曲线所在坐标轴
+    method: "lttb"、"minmax"，"auto"时x单调用lttb，否则用minmax
+    dpi: 保存图片的分辨率
+
+    返回:
+    Decimated；过零点过多（多于预算，即噪声在零附近来回跳动）时不再逐个保留
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if x.shape != y.shape or x.ndim != 1:
+        raise ValueError(f"x、y必须是等长一维数组：{x.shape} vs {y.shape}")
+    n = x.size
+    if budget is None:
+        budget = pixel_budget(ax, dpi) if ax is not None else DEFAULT_BUDGET
+    if n <= budget:
+        return Decimated(x=x, y=y, index=np.arange(n), n_in=n, method="none")
+
+    if method == "auto":
+        dx = np.diff(x[np.isfinite(x)])
+        method = "lttb" if np.all(dx >= 0) or np.all(dx <= 0) else "minmax"
+    if method == "lttb":
+        index = lttb(x, y, budget)
+        extra = [_crossings(y)]
+    elif method == "minmax":
+        index = minmax(x, y, max(budget // 4, 1))
+        extra = [_crossings(x), _crossings(y)]
+    else:
+        raise ValueError(f"未知的降采样方法：{method}")
+
+    keep = [index, [0, n - 1], _extrema(y), _extrema(x), _gaps(x, y)]
+    keep += [c for c in extra if c.size <= budget]
+    index = np.unique(np.concatenate(keep).astype(np.intp))
+    return Decimated(x=x[index], y=y[index], index=index, n_in=n, method=method)
+
+
+def plot_decimated(ax, x, y, *args, enabled: bool = True, budget: Optional[int] = None,
+                   method: str = "auto", **kwargs):
+    """
+    ax.plot 的降采样版本：enabled=False时原样绘制全部点
+
+    返回:
+    (ax.plot返回的Line2D列表, Decimated)
+    """
+    if enabled:
+        d = decimate(x, y, budget=budget, ax=ax, method=method)
+    else:
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        d = Decimated(x=x, y=y, index=np.arange(x.size), n_in=x.size, method="none")
+    return ax.plot(d.x, d.y, *args, **kwargs), d
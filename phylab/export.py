@@ -0,0 +1,211 @@
+"""
+图片导出：画布只渲染一次到内存中的RGBA缓冲区，后处理直接作用于该缓冲区，最后只编码一次
+
+- render: 用独立的Agg渲染器绘制，返回 (高, 宽, 4) 的uint8视图（不复制）；
+  默认按紧凑边界（同savefig的bbox_inches='tight'）裁剪，裁剪也是视图
+- 后处理函数接收并返回数组，如drop_alpha去掉透明通道（取切片，同样不复制）
+- encode: PNG/WebP用Pillow编码（可选OpenCV，按需导入）；PDF/SVG直接输出矢量图
+- Exporter: 在调用线程中渲染（matplotlib不是线程安全的），编码交给线程池并行完成
+
+相比 savefig 后再用 cv2.imread/cv2.imwrite 重新保存，每张图少一次PNG编码和一次解码，
+也不再需要为此导入OpenCV。
+"""
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from phylab.trace import traced
+
+PathLike = Union[str, Path]
+PostProcess = Callable[[np.ndarray], np.ndarray]
+
+DPI = 300
+PAD_INCHES = 0.1            # 紧凑边界的留白，同savefig默认值
+VECTOR_FORMATS = ("pdf", "svg", "eps", "ps")
+RASTER_FORMATS = ("png", "webp", "jpg", "jpeg", "tif", "tiff", "bmp")
+
+
+# ---------------------- 渲染 ----------------------
+@traced("render")
+def render(fig, dpi: float = DPI, tight: bool = True,
+           pad_inches: float = PAD_INCHES) -> np.ndarray:
+    """
+    把图形渲染为RGBA数组
+
+    参数:
+    fig: matplotlib Figure
+    dpi: 分辨率
+    tight: 是否裁剪到紧凑边界（超出画布的部分会被截掉）
+    pad_inches: 紧凑边界四周的留白
+
+    返回:
+    (高, 宽, 4) uint8数组，是渲染器缓冲区的视图；每次调用使用新的渲染器，
+    因此之后重绘该图形不会改写已返回的数组
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg, RendererAgg
+
+    if not isinstance(fig.canvas, FigureCanvasAgg):
+        FigureCanvasAgg(fig)
+    old_dpi = fig.dpi
+    fig.dpi = dpi
+    try:
+        width, height = fig.bbox.size
+        renderer = RendererAgg(int(round(width)), int(round(height)), dpi)
+        fig.draw(renderer)
+        image = np.asarray(renderer.buffer_rgba())
+        if tight:
+            bbox = fig.get_tightbbox(renderer).padded(pad_inches)
+            # 尺寸取整方式与savefig一致（截断），起点取最近的像素
+            h = image.shape[0]
+            x0 = int(round(bbox.x0 * dpi))
+            y0 = int(round(h - bbox.y1 * dpi))
+            x1 = x0 + int(bbox.width * dpi)
+            y1 = y0 + int(bbox.height * dpi)
+            image = image[max(y0, 0):min(y1, h), max(x0, 0):min(x1, image.shape[1])]
+    finally:
+        fig.dpi = old_dpi
+    return image
+
+
+# ---------------------- 后处理 ----------------------
+def drop_alpha(image: np.ndarray) -> np.ndarray:
+    """去掉透明通道（适用于不透明背景的图），返回视图"""
+    return image[..., :3]
+
+
+def flatten_alpha(image: np.ndarray, background=(255, 255, 255)) -> np.ndarray:
+    """把半透明像素合成到背景色上，返回RGB数组（需要计算，会生成新数组）"""
+    alpha = image[..., 3:4].astype(np.uint16)
+    bg = np.asarray(background, dtype=np.uint16)
+    rgb = (image[..., :3] * alpha + bg * (255 - alpha) + 127) // 255
+    return rgb.astype(np.uint8)
+
+
+def apply(image: np.ndarray, postprocess: Sequence[PostProcess] = ()) -> np.ndarray:
+    for step in postprocess:
+        image = step(image)
+    return image
+
+
+# ---------------------- 编码 ----------------------
+def _format_of(path: PathLike, fmt: Optional[str]) -> str:
+    fmt = (fmt or Path(path).suffix.lstrip(".") or "png").lower()
+    return "jpeg" if fmt == "jpg" else fmt
+
+
+@traced("save")
+def encode(image: np.ndarray, path: PathLike, fmt: Optional[str] = None,
+           backend: str = "pillow", **options) -> Path:
+    """
+    把RGB/RGBA数组编码写入文件
+
+    参数:
+    image: (高, 宽, 3或4) uint8数组
+    path: 输出路径
+    fmt: 格式，None时由扩展名决定
+    backend: "pillow"（默认）或"cv2"（需安装opencv-python，调用时才导入）
+    options: 传给编码器的参数，如PNG的compress_level、WebP的quality/lossless
+
+    返回:
+    输出路径
+    """
+    path = Path(path)
+    fmt = _format_of(path, fmt)
+    if fmt not in RASTER_FORMATS and fmt != "jpeg":
+        raise ValueError(f"不支持的位图格式：{fmt}")
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        if backend == "cv2":
+            import cv2
+
+            code = cv2.COLOR_RGBA2BGRA if image.shape[-1] == 4 else cv2.COLOR_RGB2BGR
+            ok, data = cv2.imencode(f".{fmt}", cv2.cvtColor(image, code),
+                                    [int(v) for kv in options.items() for v in kv])
+            if not ok:
+                raise ValueError(f"OpenCV无法编码为{fmt}")
+            tmp.write_bytes(data.tobytes())
+        elif backend == "pillow":
+            from PIL import Image
+
+            mode = "RGBA" if image.shape[-1] == 4 else "RGB"
+            if fmt == "jpeg" and mode == "RGBA":
+                image, mode = drop_alpha(image), "RGB"
+            # 连续内存时Pillow直接引用缓冲区；裁剪或去通道后的视图在这里才复制一次
+            Image.fromarray(np.ascontiguousarray(image), mode).save(tmp, format=fmt, **options)
+        else:
+            raise ValueError(f"未知的编码后端：{backend}")
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return path
+
+
+def export_figure(fig, path: PathLike, dpi: float = DPI, fmt: Optional[str] = None,
+                  postprocess: Sequence[PostProcess] = (), tight: bool = True,
+                  backend: str = "pillow", **options) -> Path:
+    """
+    导出一张图：位图格式渲染一次、后处理、编码一次；矢量格式直接由matplotlib输出
+
+    参数同render与encode；postprocess对矢量格式无效
+    """
+    fmt = _format_of(path, fmt)
+    if fmt in VECTOR_FORMATS:
+        fig.savefig(path, format=fmt, dpi=dpi, bbox_inches="tight" if tight else None)
+        return Path(path)
+    image = apply(render(fig, dpi=dpi, tight=tight), postprocess)
+    return encode(image, path, fmt, backend=backend, **options)
+
+
+class Exporter:
+    """
+    批量导出：调用线程中渲染，线程池中编码（Pillow/zlib编码时释放GIL，可真正并行）
+
+    用法:
+    with Exporter(workers=4) as ex:
+        for fig, path in ...:
+            ex.submit(fig, path)
+            plt.close(fig)      # 渲染已完成，图形可以立即关闭或复用
+    """
+
+    def __init__(self, workers: Optional[int] = None, dpi: float = DPI,
+                 postprocess: Sequence[PostProcess] = (), backend: str = "pillow", **options):
+        self.pool = ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1))
+        self.dpi = dpi
+        self.postprocess = tuple(postprocess)
+        self.backend = backend
+        self.options = options
+        self.futures: List[Future] = []
+
+    def submit(self, fig, path: PathLike, fmt: Optional[str] = None, tight: bool = True) -> Future:
+        fmt = _format_of(path, fmt)
+        if fmt in VECTOR_FORMATS:
+            # 矢量输出需要遍历图形对象，只能在当前线程完成
+            future: Future = Future()
+            future.set_result(export_figure(fig, path, self.dpi, fmt, tight=tight))
+        else:
+            image = apply(render(fig, dpi=self.dpi, tight=tight), self.postprocess)
+            future = self.pool.submit(encode, image, path, fmt, self.backend, **self.options)
+        self.futures.append(future)
+        return future
+
+    def wait(self) -> List[Path]:
+        """等待全部编码完成，返回输出路径；有编码失败时抛出第一个异常"""
+        paths = [f.result() for f in self.futures]
+        self.futures.clear()
+        return paths
+
+    def close(self) -> None:
+        try:
+            self.wait()
+        finally:
+            self.pool.shutdown()
+
+    def __enter__(self) -> "Exporter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,221 @@
+"""
+图形复用池：大量同样式的图（如lab01的校准曲线）反复绘制时不再每次新建图形
+
+- 按版式（尺寸、是否双Y轴）和样式函数缓存预先设置好的图形，样式函数只在新建时执行一次
+- 线条、散点等对象按名称复用，用set_data/set_offsets原地更新；本次没用到的对象会被移除
+- 标题、坐标轴标签、图例只在内容变化时才重设，tight_layout只在文字或坐标范围变化时重算
+- 图形不经过pyplot创建（不进入plt的全局图形列表），用完放回池中；
+  池中空闲图形超过上限时按最近最少使用淘汰并立即清空，内存占用与绘制次数无关
+
+用法:
+pool = FigurePool()
+with pool.figure(Layout(figsize=(10, 6))) as pf:
+    pf.line("data", x, y, marker="o", label="改装后电流")
+    pf.text("title", "校准曲线")
+    pf.finish()
+    export_figure(pf.fig, "a.png")
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+MAX_IDLE = 4  # 池中保留的空闲图形数
+
+
+@dataclass(frozen=True)
+class Layout:
+    """
+    图形版式
+
+    figsize: 图形尺寸 (英寸)
+    twin_y: 是否带共用x轴的右侧Y轴（如lab10 plot2的B-H与μ-H双Y轴图）
+    dpi: 屏幕分辨率（导出时另行指定）
+    """
+    figsize: Tuple[float, float] = (10, 6)
+    twin_y: bool = False
+    dpi: float = 100
+
+
+Style = Callable[["PooledFigure"], None]
+
+
+class PooledFigure:
+    """
+    池中的一张图形
+
+    fig: matplotlib Figure
+    ax: 主坐标轴
+    ax2: 右侧Y轴（twin_y=False时为None）
+    """
+
+    def __init__(self, layout: Layout, style: Optional[Style] = None):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.layout = layout
+        self.pool_key: Optional[tuple] = None
+        self.fig = Figure(figsize=layout.figsize, dpi=layout.dpi)
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot()
+        self.ax2 = self.ax.twinx() if layout.twin_y else None
+        self.artists: Dict[str, object] = {}
+        self._used: set = set()
+        self._texts: Dict[str, str] = {}
+        self._legend_key: Optional[tuple] = None
+        self._legend_used = False
+        self._limits: Optional[tuple] = None
+        self._layout_dirty = True
+        if style is not None:
+            style(self)
+
+    def _axes(self, right: bool):
+        if right and self.ax2 is None:
+            raise ValueError("该版式没有右侧Y轴，请使用Layout(twin_y=True)")
+        return self.ax2 if right else self.ax
+
+    # ---------------------- 图元 ----------------------
+    def begin(self) -> "PooledFigure":
+        """开始新一次绘制（FigurePool.figure会自动调用）"""
+        self._used.clear()
+        self._legend_used = False
+        return self
+
+    def line(self, name: str, x, y, right: bool = False, **props):
+        """按名称取出或新建Line2D并更新数据，props为线型、标记、标签等属性"""
+        artist = self.artists.get(name)
+        if artist is None:
+            (artist,) = self._axes(right).plot(x, y, **props)
+            self.artists[name] = artist
+        else:
+            artist.set_data(x, y)
+            if props:
+                artist.set(**props)
+        self._used.add(name)
+        return artist
+
+    def scatter(self, name: str, x, y, right: bool = False, **props):
+        """按名称取出或新建散点并更新位置"""
+        artist = self.artists.get(name)
+        if artist is None:
+            artist = self._axes(right).scatter(x, y, **props)
+            self.artists[name] = artist
+        else:
+            artist.set_offsets(np.column_stack([np.asarray(x, dtype=float), np.asarray(y, dtype=float)]))
+            if props:
+                artist.set(**props)
+        self._used.add(name)
+        return artist
+
+    def text(self, which: str, value: str, **props) -> None:
+        """
+        设置标题或坐标轴标签，内容不变时不做任何事
+
+        which: "title"、"xlabel"、"ylabel"，或右侧Y轴的"ylabel2"
+        """
+        if self._texts.get(which) == value:
+            return
+        setter = {"title": self.ax.set_title, "xlabel": self.ax.set_xlabel,
+                  "ylabel": self.ax.set_ylabel,
+                  "ylabel2": lambda v, **kw: self._axes(True).set_ylabel(v, **kw)}[which]
+        setter(value, **props)
+        self._texts[which] = value
+        self._layout_dirty = True
+
+    def legend(self, **kwargs) -> None:
+        """合并左右两轴的图例，只含本次绘制用到的图元；图例条目和参数不变时保留原图例"""
+        used = [(n, a) for n, a in self.artists.items()
+                if n in self._used and not str(a.get_label()).startswith("_")]
+        lines = [a for _, a in used]
+        key = tuple((n, a.get_label()) for n, a in used) + tuple(sorted(kwargs.items()))
+        self._legend_used = True
+        if key == self._legend_key:
+            return
+        self.ax.legend(lines, [a.get_label() for a in lines], **kwargs)
+        self._legend_key = key
+        self._layout_dirty = True
+
+    # ---------------------- 完成 ----------------------
+    def finish(self, autoscale: bool = True, tight: bool = True) -> "PooledFigure":
+        """
+        移除本次未使用的图元和图例，重算坐标范围；文字或范围有变化时才重新tight_layout
+        """
+        for name in [n for n in self.artists if n not in self._used]:
+            self.artists.pop(name).remove()
+            self._legend_key = None
+        if not self._legend_used and self.ax.get_legend() is not None:
+            self.ax.get_legend().remove()
+            self._legend_key = None
+            self._layout_dirty = True
+        axes = [ax for ax in (self.ax, self.ax2) if ax is not None]
+        if autoscale:
+            for ax in axes:
+                ax.relim()
+                ax.autoscale_view()
+        limits = tuple(ax.get_xlim() + ax.get_ylim() for ax in axes)
+        if limits != self._limits:
+            self._limits = limits
+            self._layout_dirty = True
+        if tight and self._layout_dirty:
+            self.fig.tight_layout()
+            self._layout_dirty = False
+        return self
+
+    def dispose(self) -> None:
+        """清空图形，释放全部图元"""
+        self.artists.clear()
+        self.fig.clear()
+
+
+class FigurePool:
+    """按 (版式, 样式函数) 缓存图形的池"""
+
+    def __init__(self, max_idle: int = MAX_IDLE):
+        self.max_idle = max_idle
+        self._idle: "OrderedDict[tuple, List[PooledFigure]]" = OrderedDict()
+        self.created = 0
+
+    def _n_idle(self) -> int:
+        return sum(len(v) for v in self._idle.values())
+
+    def acquire(self, layout: Layout, style: Optional[Style] = None) -> PooledFigure:
+        """取出一张空闲图形，没有时新建"""
+        key = (layout, style)
+        idle = self._idle.get(key)
+        if idle:
+            pf = idle.pop()
+            if not idle:
+                del self._idle[key]
+        else:
+            pf = PooledFigure(layout, style)
+            pf.pool_key = key
+            self.created += 1
+        return pf.begin()
+
+    def release(self, pf: PooledFigure) -> None:
+        """放回池中；空闲图形过多时淘汰最久未用的"""
+        self._idle.setdefault(pf.pool_key, []).append(pf)
+        self._idle.move_to_end(pf.pool_key)
+        while self._n_idle() > self.max_idle:
+            key, idle = next(iter(self._idle.items()))
+            idle.pop(0).dispose()
+            if not idle:
+                del self._idle[key]
+
+    @contextmanager
+    def figure(self, layout: Layout, style: Optional[Style] = None) -> Iterator[PooledFigure]:
+        """with块内使用图形，结束时自动放回池中"""
+        pf = self.acquire(layout, style)
+        try:
+            yield pf
+        finally:
+            self.release(pf)
+
+    def close(self) -> None:
+        """清空全部空闲图形"""
+        for idle in self._idle.values():
+            for pf in idle:
+                pf.dispose()
+        self._idle.clear()
@@ -0,0 +1,483 @@
+"""
+磁滞回线（lab10）分析：剩磁Br、矫顽力Hc、磁滞损耗、基本磁化曲线
+
+- 对任意长度的H、B采样序列（可包含多个连续周期）做向量化的过零检测，
+  在相邻采样点之间插值求出每个 H=0 与 B=0 的交点，不要求某个采样点恰好为0
+- 对成批的回线（二维数组或不等长列表，可为内存映射）分块计算闭合面积、
+  峰值Bm/Hm和每周期损耗，并可对整批数据做Steinmetz拟合
+- 由逐级增大励磁的一族回线批量提取顶点，得到基本磁化曲线、磁导率μ=B/H、
+  微分磁导率dB/dH，并在单调三次插值曲线上求最大磁导率
+"""
+from dataclasses import dataclass
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+from phylab.trace import traced
+
+CHUNK_SAMPLES = 1 << 22  # 分块计算时每块处理的采样点数上限
+
+
+@dataclass
+class Crossings:
+    """
+    某一通道的全部过零点
+
+    position: 交点在采样序列中的分数序号（如12.4表示位于第12、13个采样点之间）
+    value: 另一通道在交点处的插值
+    direction: 过零方向，+1为该通道由负变正（递增），-1为由正变负（递减）
+    """
+    position: np.ndarray
+    value: np.ndarray
+    direction: np.ndarray
+
+    def __len__(self) -> int:
+        return self.position.size
+
+
+@dataclass
+class LoopCrossings:
+    """
+    磁滞回线的特征交点
+
+    remanence: H=0的交点，value为对应的B（剩磁）
+    coercivity: B=0的交点，value为对应的H（矫顽力）
+    """
+    remanence: Crossings
+    coercivity: Crossings
+
+    @property
+    def Br_positive(self) -> float:
+        """正向剩磁：H=0且B>0处B的平均值（多周期取平均）"""
+        v = self.remanence.value
+        return float(np.mean(v[v > 0])) if np.any(v > 0) else np.nan
+
+    @property
+    def Br_negative(self) -> float:
+        """反向剩磁：H=0且B<0处B的平均值"""
+        v = self.remanence.value
+        return float(np.mean(v[v < 0])) if np.any(v < 0) else np.nan
+
+    @property
+    def Hc_positive(self) -> float:
+        """正向矫顽力：B由正变负（下降支，H<0）时|H|的平均值"""
+        c = self.coercivity
+        sel = c.direction < 0
+        return float(np.mean(np.abs(c.value[sel]))) if np.any(sel) else np.nan
+
+    @property
+    def Hc_negative(self) -> float:
+        """反向矫顽力：B由负变正（上升支，H>0）时|H|的平均值"""
+        c = self.coercivity
+        sel = c.direction > 0
+        return float(np.mean(np.abs(c.value[sel]))) if np.any(sel) else np.nan
+
+    @property
+    def Br_average(self) -> float:
+        return (abs(self.Br_positive) + abs(self.Br_negative)) / 2
+
+    @property
+    def Hc_average(self) -> float:
+        return (self.Hc_positive + self.Hc_negative) / 2
+
+
+def _sign_changes(y: np.ndarray):
+    """
+    找出y的全部变号位置，返回 (左侧非零点序号, 右侧非零点序号, 方向)
+
+    恰好为0的采样点不单独计数：只比较相邻两个非零采样点的符号，
+    因此 +,0,- 记为一次过零，而 +,0,+（相切）不计
+    """
+    nz = np.flatnonzero(y)
+    s = np.sign(y[nz])
+    change = s[:-1] != s[1:]
+    return nz[:-1][change], nz[1:][change], s[1:][change].astype(np.int8)
+
+
+def _lagrange4(u: np.ndarray):
+    """节点为 -1,0,1,2 的三次拉格朗日插值基函数值及其导数"""
+    w = np.stack([-u * (u - 1) * (u - 2) / 6,
+                  (u + 1) * (u - 1) * (u - 2) / 2,
+                  -(u + 1) * u * (u - 2) / 2,
+                  (u + 1) * u * (u - 1) / 6])
+    dw = np.stack([-(3 * u ** 2 - 6 * u + 2) / 6,
+                   (3 * u ** 2 - 4 * u - 1) / 2,
+                   -(3 * u ** 2 - 2 * u - 2) / 2,
+                   (3 * u ** 2 - 1) / 6])
+    return w, dw
+
+
+def zero_crossings(y, other, order: int = 1) -> Crossings:
+    """
+    求y的全部过零点，并在交点处插值另一通道
+
+    参数:
+    y: 检测过零的通道（如H）
+    other: 需要在交点处取值的通道（如B）
+    order: 插值阶数，1为线性插值，3为局部三次（4点拉格朗日）插值
+
+    返回:
+    Crossings
+    """
+    y = np.asarray(y, dtype=float)
+    other = np.asarray(other, dtype=float)
+    if y.shape != other.shape or y.ndim != 1:
+        raise ValueError(f"两个通道必须是等长一维数组：{y.shape} vs {other.shape}")
+    if order not in (1, 3):
+        raise ValueError("order只能为1（线性）或3（三次）")
+
+    left, right, direction = _sign_changes(y)
+    adjacent = right - left == 1
+    # 相邻两点变号：线性插值；中间夹着恰为0的采样点：取这段0的中点
+    yl, yr = y[left], y[right]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frac = np.where(adjacent, yl / (yl - yr), 0.0)
+    position = np.where(adjacent, left + frac, (left + right) / 2)
+
+    n = y.size
+    i = np.minimum(np.floor(position).astype(np.intp), n - 2) if n > 1 else np.zeros(0, np.intp)
+    t = position - i
+    value = other[i] + t * (other[i + 1] - other[i])
+
+    if order == 3 and n >= 4:
+        # 以线性结果为初值，对局部三次插值多项式做牛顿迭代求根
+        base = np.clip(left - 1, 0, n - 4)
+        idx = base[None, :] + np.arange(4)[:, None]
+        lo, hi = left - base - 1, right - base - 1
+        u = position - base - 1
+        ys = y[idx]
+        # 只对相邻两点变号、且4点中没有恰为0的采样点的交点用三次插值：
+        # 0的连续段比4点模板更长时，三次多项式在模板之外是外推，不可靠
+        refine = adjacent & np.all(ys != 0, axis=0)
+        for _ in range(4):
+            w, dw = _lagrange4(u)
+            f = np.sum(w * ys, axis=0)
+            df = np.sum(dw * ys, axis=0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                step = np.where(refine & (df != 0), f / df, 0.0)
+            u = u - step
+        # 根跑出中间区间（多项式在区间内无根或迭代发散）时保留线性结果
+        refine &= np.isfinite(u) & (u >= lo) & (u <= hi)
+        u = np.where(refine, u, position - base - 1)
+        w, _ = _lagrange4(u)
+        position = np.where(refine, base + 1 + u, position)
+        value = np.where(refine, np.sum(w * other[idx], axis=0), value)
+
+    return Crossings(position=position, value=value, direction=direction)
+
+
+@traced("fit")
+def loop_crossings(H, B, order: int = 1) -> LoopCrossings:
+    """
+    求磁滞回线的剩磁（H=0处的B）与矫顽力（B=0处的H）
+
+    参数:
+    H, B: 采样序列，可包含多个连续周期；单个闭合回线请先首尾相接
+    order: 插值阶数，见zero_crossings
+
+    返回:
+    LoopCrossings
+    """
+    return LoopCrossings(remanence=zero_crossings(H, B, order),
+                         coercivity=zero_crossings(B, H, order))
+
+
+# ---------------------- 批量回线：闭合面积与损耗 ----------------------
+@dataclass
+class LoopBatch:
+    """
+    一批磁滞回线的计算结果（每个数组长度均为回线数）
+
+    loss: 闭合回线面积，即单位体积每周期的磁滞损耗（J/m³）
+    Bm, Hm: 峰值磁感应强度与磁场强度（半峰峰值，不受直流偏置影响）
+    power: 损耗功率密度 loss·f（W/m³），未给出频率时为None
+    """
+    loss: np.ndarray
+    Bm: np.ndarray
+    Hm: np.ndarray
+    power: Optional[np.ndarray] = None
+
+
+def _closed_area_2d(H: np.ndarray, B: np.ndarray) -> np.ndarray:
+    """每行一条回线，首尾相接后用梯形公式求 |∮B dH|"""
+    Hn = np.roll(H, -1, axis=1)
+    Bn = np.roll(B, -1, axis=1)
+    return np.abs(0.5 * np.einsum("ij,ij->i", B + Bn, Hn - H))
+
+
+def _closed_area_flat(H: np.ndarray, B: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """多条回线首尾拼接成一维数组，starts为各回线起点；每条回线末点连回起点"""
+    nxt = np.arange(1, H.size + 1)
+    ends = np.r_[starts[1:], H.size]
+    nxt[ends - 1] = starts
+    segment = 0.5 * (B + B[nxt]) * (H[nxt] - H)
+    return np.abs(np.add.reduceat(segment, starts))
+
+
+def _half_range_flat(x: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    return (np.maximum.reduceat(x, starts) - np.minimum.reduceat(x, starts)) / 2
+
+
+@traced("fit")
+def loop_batch(H: Union[np.ndarray, Sequence[np.ndarray]],
+               B: Union[np.ndarray, Sequence[np.ndarray]],
+               frequency=None,
+               chunk_samples: int = CHUNK_SAMPLES) -> LoopBatch:
+    """
+    批量计算磁滞回线的损耗与峰值
+
+    参数:
+    H, B: 二维数组（回线数 × 采样点数，可为np.memmap），或由一维数组组成的不等长列表；
+          每条回线为一个完整周期，无需手动首尾相接
+    frequency: 励磁频率（Hz），标量或每条回线一个值；给出时计算损耗功率密度
+    chunk_samples: 每块处理的采样点数上限，用于控制内存占用
+
+    返回:
+    LoopBatch
+    """
+    ragged = not (isinstance(H, np.ndarray) and H.ndim == 2)
+    if ragged:
+        if len(H) != len(B):
+            raise ValueError(f"H与B的回线数不一致：{len(H)} vs {len(B)}")
+        n_loops = len(H)
+    else:
+        if H.shape != np.shape(B):
+            raise ValueError(f"H与B形状不一致：{H.shape} vs {np.shape(B)}")
+        n_loops = H.shape[0]
+
+    loss = np.empty(n_loops)
+    Bm = np.empty(n_loops)
+    Hm = np.empty(n_loops)
+    i = 0
+    while i < n_loops:
+        if ragged:
+            # 按采样点数累积凑成一块（至少一条回线）
+            j, total = i, 0
+            while j < n_loops and (j == i or total + len(H[j]) <= chunk_samples):
+                if len(H[j]) != len(B[j]) or len(H[j]) < 2:
+                    raise ValueError(f"第{j}条回线的H、B长度不一致或少于2个点")
+                total += len(H[j])
+                j += 1
+            lengths = np.array([len(h) for h in H[i:j]])
+            starts = np.r_[0, np.cumsum(lengths[:-1])]
+            h = np.concatenate([np.asarray(x, dtype=float) for x in H[i:j]])
+            b = np.concatenate([np.asarray(x, dtype=float) for x in B[i:j]])
+            loss[i:j] = _closed_area_flat(h, b, starts)
+            Bm[i:j] = _half_range_flat(b, starts)
+            Hm[i:j] = _half_range_flat(h, starts)
+        else:
+            j = min(n_loops, i + max(1, chunk_samples // max(H.shape[1], 1)))
+            h = np.asarray(H[i:j], dtype=float)
+            b = np.asarray(B[i:j], dtype=float)
+            loss[i:j] = _closed_area_2d(h, b)
+            Bm[i:j] = (b.max(axis=1) - b.min(axis=1)) / 2
+            Hm[i:j] = (h.max(axis=1) - h.min(axis=1)) / 2
+        i = j
+
+    power = None if frequency is None else loss * np.broadcast_to(np.asarray(frequency, dtype=float), loss.shape)
+    return LoopBatch(loss=loss, Bm=Bm, Hm=Hm, power=power)
+
+
+def loop_loss(H, B) -> float:
+    """单条回线的磁滞损耗（J/m³），回线无需首尾相接"""
+    return float(loop_batch(np.asarray(H, dtype=float)[None, :],
+                            np.asarray(B, dtype=float)[None, :]).loss[0])
+
+
+@dataclass
+class SteinmetzFit:
+    """
+    Steinmetz拟合结果：loss = k · f^alpha · Bm^beta
+
+    未给出频率时alpha为None，即每周期损耗 loss = k · Bm^beta（经典Steinmetz公式，k即η）
+    r2: 对数坐标下的决定系数
+    """
+    k: float
+    beta: float
+    alpha: Optional[float]
+    r2: float
+
+    def __call__(self, Bm, frequency=None):
+        value = self.k * np.asarray(Bm, dtype=float) ** self.beta
+        if self.alpha is not None:
+            value = value * np.asarray(frequency, dtype=float) ** self.alpha
+        return value
+
+
+@traced("fit")
+def fit_steinmetz(Bm, loss, frequency=None) -> SteinmetzFit:
+    """
+    在对数坐标下线性最小二乘拟合Steinmetz公式
+
+    参数:
+    Bm: 各回线峰值磁感应强度（T）
+    loss: 各回线损耗（每周期损耗J/m³；给出frequency时通常为功率密度W/m³）
+    frequency: 各回线励磁频率（Hz），None表示只拟合Bm的幂次
+    """
+    Bm = np.asarray(Bm, dtype=float)
+    loss = np.asarray(loss, dtype=float)
+    cols = [np.ones_like(Bm), np.log(Bm)]
+    if frequency is not None:
+        cols.append(np.log(np.broadcast_to(np.asarray(frequency, dtype=float), Bm.shape)))
+    A = np.column_stack(cols)
+    y = np.log(loss)
+    if A.shape[0] <= A.shape[1]:
+        raise ValueError(f"Steinmetz拟合至少需要{A.shape[1] + 1}条回线")
+    coef, *_ = np.linalg.lstsq(A, y, rcond=None)
+    resid = y - A @ coef
+    ss_tot = np.sum((y - y.mean()) ** 2)
+    r2 = 1 - np.dot(resid, resid) / ss_tot if ss_tot != 0 else 0.0
+    return SteinmetzFit(k=float(np.exp(coef[0])), beta=float(coef[1]),
+                        alpha=float(coef[2]) if frequency is not None else None,
+                        r2=float(r2))
+
+
+# ---------------------- 基本磁化曲线 ----------------------
+MU0 = 4e-7 * np.pi
+
+
+@dataclass
+class LoopTips:
+    """
+    一批回线的顶点（每个数组长度均为回线数）
+
+    Hm: 半峰峰值磁场强度 (max H − min H)/2
+    Bm: H取最大、最小值处B之差的一半，即回线两个顶点的B（不受直流偏置影响）
+    """
+    Hm: np.ndarray
+    Bm: np.ndarray
+
+
+def _tips_2d(h: np.ndarray, b: np.ndarray):
+    rows = np.arange(h.shape[0])
+    hi, lo = h.argmax(axis=1), h.argmin(axis=1)
+    return (h[rows, hi] - h[rows, lo]) / 2, (b[rows, hi] - b[rows, lo]) / 2
+
+
+def _tips_flat(h: np.ndarray, b: np.ndarray, starts: np.ndarray):
+    # 各段最大/最小值所在的第一个位置：与段内极值相等的位置中取最小序号
+    seg = np.repeat(np.arange(starts.size), np.diff(np.r_[starts, h.size]))
+    idx = np.arange(h.size)
+    h_max = np.maximum.reduceat(h, starts)
+    h_min = np.minimum.reduceat(h, starts)
+    hi = np.minimum.reduceat(np.where(h == h_max[seg], idx, h.size), starts)
+    lo = np.minimum.reduceat(np.where(h == h_min[seg], idx, h.size), starts)
+    return (h_max - h_min) / 2, (b[hi] - b[lo]) / 2
+
+
+@traced("fit")
+def loop_tips(H: Union[np.ndarray, Sequence[np.ndarray]],
+              B: Union[np.ndarray, Sequence[np.ndarray]],
+              chunk_samples: int = CHUNK_SAMPLES) -> LoopTips:
+    """
+    批量提取回线顶点 (Hm, Bm)，用于由逐级增大励磁的一族回线得到基本磁化曲线
+
+    参数:
+    H, B: 二维数组（回线数 × 采样点数，可为np.memmap），或由一维数组组成的不等长列表
+    chunk_samples: 每块处理的采样点数上限
+
+    返回:
+    LoopTips
+    """
+    ragged = not (isinstance(H, np.ndarray) and H.ndim == 2)
+    n_loops = len(H) if ragged else H.shape[0]
+    if (len(B) if ragged else np.shape(B)[0]) != n_loops:
+        raise ValueError(f"H与B的回线数不一致：{n_loops} vs {len(B)}")
+
+    Hm = np.empty(n_loops)
+    Bm = np.empty(n_loops)
+    i = 0
+    while i < n_loops:
+        if ragged:
+            j, total = i, 0
+            while j < n_loops and (j == i or total + len(H[j]) <= chunk_samples):
+                if len(H[j]) != len(B[j]) or len(H[j]) < 2:
+                    raise ValueError(f"第{j}条回线的H、B长度不一致或少于2个点")
+                total += len(H[j])
+                j += 1
+            lengths = np.array([len(h) for h in H[i:j]])
+            starts = np.r_[0, np.cumsum(lengths[:-1])]
+            h = np.concatenate([np.asarray(x, dtype=float) for x in H[i:j]])
+            b = np.concatenate([np.asarray(x, dtype=float) for x in B[i:j]])
+            Hm[i:j], Bm[i:j] = _tips_flat(h, b, starts)
+        else:
+            j = min(n_loops, i + max(1, chunk_samples // max(H.shape[1], 1)))
+            Hm[i:j], Bm[i:j] = _tips_2d(np.asarray(H[i:j], dtype=float), np.asarray(B[i:j], dtype=float))
+        i = j
+    return LoopTips(Hm=Hm, Bm=Bm)
+
+
+@dataclass
+class NormalCurve:
+    """
+    基本磁化曲线（各回线顶点的连线）及磁导率
+
+    H, B: 按H排序后的顶点（重复的H取平均，不含原点）
+    mu, mu_diff: 顶点处的磁导率 B/H 与微分磁导率 dB/dH（H/m）
+    H_fine, B_fine: 过原点与各顶点的单调三次插值曲线（PCHIP）
+    mu_fine, mu_diff_fine: 插值曲线上的 B/H 与 dB/dH；H=0处的 B/H 取其极限，即起始磁导率
+    H_mu_max, B_mu_max, mu_max: 插值曲线上磁导率最大的点（该处 dB/dH = B/H）
+    """
+    H: np.ndarray
+    B: np.ndarray
+    mu: np.ndarray
+    mu_diff: np.ndarray
+    H_fine: np.ndarray
+    B_fine: np.ndarray
+    mu_fine: np.ndarray
+    mu_diff_fine: np.ndarray
+    H_mu_max: float
+    B_mu_max: float
+    mu_max: float
+
+    @property
+    def mu_r_max(self) -> float:
+        """最大相对磁导率 μmax/μ0"""
+        return self.mu_max / MU0
+
+
+@traced("fit")
+def normal_curve(Hm, Bm, points: int = 1000) -> NormalCurve:
+    """
+    由回线顶点求基本磁化曲线、磁导率 μ = B/H、微分磁导率 dB/dH 及最大磁导率
+
+    参数:
+    Hm, Bm: 各回线顶点（见loop_tips），顺序任意
+    points: 插值曲线的点数
+
+    返回:
+    NormalCurve
+    """
+    from scipy.interpolate import PchipInterpolator  # 只在求磁化曲线时用到
+
+    Hm = np.asarray(Hm, dtype=float)
+    Bm = np.asarray(Bm, dtype=float)
+    ok = np.isfinite(Hm) & np.isfinite(Bm) & (Hm > 0)
+    H, counts = np.unique(Hm[ok], return_counts=True)
+    if H.size < 2:
+        raise ValueError("求基本磁化曲线至少需要两条不同励磁的回线")
+    order = np.argsort(Hm[ok], kind="stable")
+    B = np.add.reduceat(Bm[ok][order], np.r_[0, np.cumsum(counts[:-1])]) / counts
+
+    spline = PchipInterpolator(np.r_[0.0, H], np.r_[0.0, B])
+    slope = spline.derivative()
+    H_fine = np.linspace(0.0, H[-1], points)
+    B_fine = spline(H_fine)
+    mu_diff_fine = slope(H_fine)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mu_fine = np.where(H_fine > 0, B_fine / H_fine, mu_diff_fine)
+
+    # μ(H) 的极大值满足 dB/dH − B/H 由正变负：在网格最大值两侧找变号并线性插值
+    i = int(np.argmax(mu_fine))
+    g = mu_diff_fine - mu_fine
+    H_peak = H_fine[i]
+    for a in (i - 1, i):
+        if 0 < a and a + 1 < points and g[a] > 0 >= g[a + 1]:
+            H_peak = H_fine[a] + (H_fine[a + 1] - H_fine[a]) * g[a] / (g[a] - g[a + 1])
+            break
+    B_peak = float(spline(H_peak))
+    mu_peak = B_peak / H_peak if H_peak > 0 else float(mu_fine[0])
+
+    return NormalCurve(H=H, B=B, mu=B / H, mu_diff=slope(H), H_fine=H_fine, B_fine=B_fine,
+                       mu_fine=mu_fine, mu_diff_fine=mu_diff_fine,
+                       H_mu_max=float(H_peak), B_mu_max=B_peak, mu_max=float(mu_peak))
@@ -0,0 +1,103 @@
+"""
+光速测量（lab02）的Δs-Δt'加权拟合与光速计算
+
+排序、重复点计权、加权最小二乘、协方差、R²和c/σc全部为向量化运算，
+整体复杂度由一次排序决定（O(n log n)），可直接处理10⁶量级的自动扫描数据。
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from phylab.regression import LinearFit, weighted_linfit
+from phylab.trace import traced
+
+C_TRUE = 2.998e8   # 光速准确值（m/s）
+C_FACTOR = 1e7     # 1/k（cm/ns）换算为 m/s 的系数
+
+
+@dataclass
+class LightSpeedFit:
+    """
+    Δs-Δt'加权拟合与光速计算结果
+
+    delta_s, delta_t: 排序后的Δs（cm）与Δt'（ns）
+    weights: 每个数据点的权重（该Δs值出现的次数）
+    unique_s, counts: 不重复的Δs值及其出现次数
+    line: 直线拟合结果 Δt' = k·Δs + b
+    c_meas, sigma_c: 光速测量值及其标准误差（m/s）
+    rel_uncertainty, rel_deviation: 相对不确定度、与准确值的相对偏差（%）
+    """
+    delta_s: np.ndarray
+    delta_t: np.ndarray
+    weights: np.ndarray
+    unique_s: np.ndarray
+    counts: np.ndarray
+    line: LinearFit
+    c_true: float
+    c_meas: float
+    sigma_c: float
+    rel_uncertainty: float
+    rel_deviation: float
+
+    @property
+    def fitted(self) -> np.ndarray:
+        """排序后各Δs处的拟合值Δt'"""
+        return self.line(self.delta_s)
+
+
+def duplicate_weights(sorted_values: np.ndarray):
+    """
+    对已排序（升序或降序）数组按取值计数，返回 (每个点的权重, 不重复值, 各值出现次数)
+
+    数据已排好序，只需找出相邻值变化的位置，O(n)完成，无需再调用np.unique排序
+    """
+    n = sorted_values.size
+    starts = np.flatnonzero(np.r_[True, sorted_values[1:] != sorted_values[:-1]])
+    counts = np.diff(np.r_[starts, n])
+    return np.repeat(counts, counts), sorted_values[starts], counts
+
+
+@traced("fit")
+def fit_light_speed(delta_s, delta_t,
+                    sort_ascending: bool = True,
+                    c_true: float = C_TRUE,
+                    c_factor: float = C_FACTOR) -> LightSpeedFit:
+    """
+    Δs-Δt'加权线性拟合并计算光速（重复的Δs点以出现次数为权重）
+
+    参数:
+    delta_s: 光程差Δs（cm）
+    delta_t: 时间差Δt'（ns）
+    sort_ascending: 按Δs升序（False为降序）排列结果数组
+    c_true: 光速准确值（m/s）
+    c_factor: 1/k 换算为光速的系数，默认 cm/ns → m/s
+
+    返回:
+    LightSpeedFit
+    """
+    delta_s = np.asarray(delta_s, dtype=float).ravel()
+    delta_t = np.asarray(delta_t, dtype=float).ravel()
+    if delta_s.size != delta_t.size:
+        raise ValueError(f"delta_s数据长度（{delta_s.size}）与delta_t'数据长度（{delta_t.size}）不匹配")
+
+    order = np.argsort(delta_s, kind="stable")
+    if not sort_ascending:
+        order = order[::-1]
+    s_sorted = delta_s[order]
+    t_sorted = delta_t[order]
+
+    weights, unique_s, counts = duplicate_weights(s_sorted)
+
+    line = weighted_linfit(s_sorted, t_sorted, weights)
+    if line.k == 0:
+        raise ValueError("拟合斜率为0，无法计算光速")
+
+    c_meas = c_factor / line.k
+    sigma_c = line.sigma_k / line.k ** 2 * c_factor
+    rel_uncertainty = sigma_c / abs(c_meas) * 100
+    rel_deviation = (c_meas - c_true) / c_true * 100
+
+    return LightSpeedFit(delta_s=s_sorted, delta_t=t_sorted, weights=weights,
+                         unique_s=unique_s, counts=counts, line=line, c_true=c_true,
+                         c_meas=c_meas, sigma_c=sigma_c,
+                         rel_uncertainty=rel_uncertainty, rel_deviation=rel_deviation)
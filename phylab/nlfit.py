@@ -0,0 +1,292 @@
+"""
+批量曲线拟合：模型定义 + 向量化的Levenberg–Marquardt求解器
+
+- 模型提供解析雅可比矩阵；对参数呈线性的模型（如柯西色散公式）直接用
+  闭式最小二乘（批量QR分解）求解，不做迭代
+- 按雅可比矩阵的列范数自动缩放参数，λ以米为单位时 b、c 相差约30个数量级也能稳定求解
+- 多组独立数据（等长，缺测点可令sigma=inf）在一次调用中同时拟合，
+  返回每组的参数、协方差及拟合诊断信息
+
+数组约定：x、y 形状为 (组数, 点数)，参数 p 形状为 (组数, 参数个数)。
+"""
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+
+from phylab.trace import traced
+
+Array = np.ndarray
+
+
+@dataclass(frozen=True)
+class Model:
+    """
+    拟合模型
+
+    name: 模型名
+    params: 参数名
+    func: f(x, p) -> y，x为(组数, 点数)，p为(组数, 参数个数)
+    jac: 解析雅可比 J(x, p) -> (组数, 点数, 参数个数)；None时使用前向差分
+    basis: 模型对参数线性时的基函数 X(x) -> (组数, 点数, 参数个数)，满足 y = X·p
+    p0: 初值估计 p0(x, y) -> (组数, 参数个数)，非线性模型未给出初值时使用
+    """
+    name: str
+    params: Sequence[str]
+    func: Callable[[Array, Array], Array]
+    jac: Optional[Callable[[Array, Array], Array]] = None
+    basis: Optional[Callable[[Array], Array]] = None
+    p0: Optional[Callable[[Array, Array], Array]] = None
+
+    @property
+    def linear(self) -> bool:
+        return self.basis is not None
+
+
+def linear_model(name: str, params: Sequence[str],
+                 basis: Callable[[Array], Array]) -> Model:
+    """由基函数构造线性模型，func与jac自动导出"""
+    return Model(name=name, params=tuple(params),
+                 func=lambda x, p: np.einsum("bnk,bk->bn", basis(x), p),
+                 jac=lambda x, p: basis(x),
+                 basis=basis)
+
+
+# ---------------------- 内置模型 ----------------------
+# 柯西色散公式 n(λ) = a + b/λ² + c/λ⁴，对 a、b、c 线性
+CAUCHY = linear_model(
+    "cauchy", ("a", "b", "c"),
+    lambda lam: np.stack([np.ones_like(lam), lam ** -2.0, lam ** -4.0], axis=-1))
+
+
+def _sellmeier_func(lam, p):
+    l2 = lam ** 2
+    return np.sqrt(1 + p[:, :1] * l2 / (l2 - p[:, 1:2]))
+
+
+def _sellmeier_jac(lam, p):
+    l2 = lam ** 2
+    d = l2 - p[:, 1:2]
+    n = np.sqrt(1 + p[:, :1] * l2 / d)
+    return np.stack([l2 / d / (2 * n), p[:, :1] * l2 / d ** 2 / (2 * n)], axis=-1)
+
+
+def _sellmeier_p0(lam, n):
+    # 紫外共振波长取可见光波长的1/5（约0.1μm，与λ的单位无关），B由长波端折射率估计
+    C = (0.2 * np.median(lam, axis=1)) ** 2
+    l2 = lam[:, -1] ** 2
+    B = (n[:, -1] ** 2 - 1) * (l2 - C) / l2
+    return np.stack([B, C], axis=-1)
+
+
+# 单项Sellmeier公式 n² = 1 + B·λ²/(λ² − C)，对C非线性
+SELLMEIER = Model("sellmeier", ("B", "C"), _sellmeier_func, _sellmeier_jac, p0=_sellmeier_p0)
+
+
+def polynomial(degree: int) -> Model:
+    """degree次多项式 y = p0 + p1·x + … ，参数按升幂排列"""
+    powers = np.arange(degree + 1)
+    return linear_model(f"poly{degree}", [f"p{j}" for j in powers],
+                        lambda x: x[..., None] ** powers)
+
+
+def _power_factor_func(C, p):
+    q = (C - p[:, 1:2]) / p[:, 2:3]
+    return p[:, :1] / np.sqrt(1 + q ** 2)
+
+
+def _power_factor_jac(C, p):
+    A, G = p[:, :1], p[:, 2:3]
+    q = (C - p[:, 1:2]) / G
+    d = 1 + q ** 2
+    return np.stack([d ** -0.5, A * q / (G * d ** 1.5), A * q ** 2 / (G * d ** 1.5)], axis=-1)
+
+
+def _power_factor_p0(C, y):
+    # 1/cos²φ = (1 + (C − C0)²/G²)/A² 是C的二次式，先对它做线性拟合再换算
+    a0, a1, a2 = fit_batch(polynomial(2), C, 1 / y ** 2).params.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        C0 = -a1 / (2 * a2)
+        A = 1 / np.sqrt(a0 - a1 ** 2 / (4 * a2))
+        G = 1 / (A * np.sqrt(a2))
+    ok = (a2 > 0) & np.isfinite(A) & np.isfinite(G)
+    # 二次式开口向下（数据中没有峰）时退回到最大测量点与扫描范围的一半
+    peak = np.argmax(y, axis=1)
+    rows = np.arange(y.shape[0])
+    C0 = np.where(ok, C0, C[rows, peak])
+    A = np.where(ok, A, y[rows, peak])
+    G = np.where(ok, G, np.ptp(C, axis=1) / 2)
+    return np.stack([A, C0, G], axis=-1)
+
+
+# 感性负载并联电容的功率因数 cosφ = A/√(1 + ((C − C0)/G)²)：
+# C0 为电容电纳与负载感性电纳抵消的补偿电容，G 为负载电导折算的电容（半宽），
+# A 为峰值功率因数（谐波等非正弦因素使其小于1）
+POWER_FACTOR = Model("power_factor", ("A", "C0", "G"), _power_factor_func, _power_factor_jac,
+                     p0=_power_factor_p0)
+
+
+# ---------------------- 拟合结果 ----------------------
+@dataclass
+class BatchFit:
+    """
+    批量拟合结果（第一维为数据组）
+
+    params: 参数 (组数, 参数个数)
+    cov: 参数协方差 (组数, 参数个数, 参数个数)，按残差缩放（同curve_fit默认行为）
+    chi2: 加权残差平方和
+    dof: 自由度（有效点数 − 参数个数）
+    r2: 决定系数
+    n_iter: 迭代次数（线性模型为0）
+    converged: 是否收敛
+    cond: 缩放后正规矩阵的条件数
+    """
+    model: Model
+    params: Array
+    cov: Array
+    chi2: Array
+    dof: Array
+    r2: Array
+    n_iter: Array
+    converged: Array
+    cond: Array
+
+    @property
+    def stderr(self) -> Array:
+        return np.sqrt(np.diagonal(self.cov, axis1=1, axis2=2))
+
+    def __call__(self, x) -> Array:
+        """用拟合参数计算模型值，x为(组数, 点数)或各组共用的一维数组"""
+        x = np.broadcast_to(np.asarray(x, dtype=float), (self.params.shape[0], np.shape(x)[-1]))
+        return self.model.func(x, self.params)
+
+
+def _as_batch(a, shape=None) -> Array:
+    a = np.asarray(a, dtype=float)
+    a = a[None, :] if a.ndim == 1 else a
+    return a if shape is None else np.broadcast_to(a, shape)
+
+
+def _numeric_jac(model: Model, x: Array, p: Array) -> Array:
+    f0 = model.func(x, p)
+    J = np.empty(f0.shape + (p.shape[1],))
+    for j in range(p.shape[1]):
+        h = 1e-7 * np.maximum(np.abs(p[:, j]), 1e-12)
+        dp = p.copy()
+        dp[:, j] += h
+        J[..., j] = (model.func(x, dp) - f0) / h[:, None]
+    return J
+
+
+def _summary(model, x, y, w, p, n_iter, converged, cond, A_inv_scaled, scale):
+    """由参数计算残差、协方差与诊断量"""
+    r = (y - model.func(x, p)) * w
+    chi2 = np.einsum("bn,bn->b", r, r)
+    n_eff = np.count_nonzero(w, axis=1)
+    k = p.shape[1]
+    dof = n_eff - k
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s2 = np.where(dof > 0, chi2 / dof, np.inf)
+        cov = A_inv_scaled / (scale[:, :, None] * scale[:, None, :]) * s2[:, None, None]
+        yw = np.where(w > 0, y, 0.0)
+        y_mean = yw.sum(axis=1) / n_eff
+        ss_tot = np.sum(np.where(w > 0, (y - y_mean[:, None]) ** 2, 0.0), axis=1)
+        ss_res = np.sum(np.where(w > 0, (y - model.func(x, p)) ** 2, 0.0), axis=1)
+        r2 = np.where(ss_tot > 0, 1 - ss_res / ss_tot, 0.0)
+    return BatchFit(model=model, params=p, cov=cov, chi2=chi2, dof=dof, r2=r2,
+                    n_iter=n_iter, converged=converged, cond=cond)
+
+
+def _fit_linear(model, x, y, w):
+    X = model.basis(x) * w[..., None]
+    scale = np.linalg.norm(X, axis=1)           # 列范数缩放，消除参数量级差异
+    scale = np.where(scale > 0, scale, 1.0)
+    Q, R = np.linalg.qr(X / scale[:, None, :])
+    z = np.linalg.solve(R, np.einsum("bnk,bn->bk", Q, y * w)[..., None])[..., 0]
+    p = z / scale
+    Rinv = np.linalg.inv(R)
+    A_inv = Rinv @ np.swapaxes(Rinv, 1, 2)
+    cond = np.linalg.cond(R) ** 2
+    b = x.shape[0]
+    return _summary(model, x, y, w, p, np.zeros(b, int), np.ones(b, bool), cond, A_inv, scale)
+
+
+def _fit_lm(model, x, y, w, p, max_iter, ftol, xtol):
+    jac = model.jac or (lambda xx, pp: _numeric_jac(model, xx, pp))
+    b, k = p.shape
+    lam = np.full(b, 1e-3)
+    r = (y - model.func(x, p)) * w
+    cost = np.einsum("bn,bn->b", r, r)
+    active = np.ones(b, bool)
+    n_iter = np.zeros(b, int)
+    eye = np.eye(k)
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        idx = np.flatnonzero(active)
+        J = jac(x[idx], p[idx]) * w[idx, :, None]
+        A = np.swapaxes(J, 1, 2) @ J
+        g = np.einsum("bnk,bn->bk", J, r[idx])
+        # Marquardt缩放：阻尼项与 diag(JᵀJ) 成正比，相当于自动按参数量级缩放
+        D = np.maximum(np.diagonal(A, axis1=1, axis2=2), 1e-300)
+        step = np.linalg.solve(A + lam[idx, None, None] * D[:, :, None] * eye, g[..., None])[..., 0]
+        p_new = p[idx] + step
+        r_new = (y[idx] - model.func(x[idx], p_new)) * w[idx]
+        cost_new = np.einsum("bn,bn->b", r_new, r_new)
+        better = np.isfinite(cost_new) & (cost_new <= cost[idx])
+
+        acc = idx[better]
+        rel_drop = (cost[acc] - cost_new[better]) / np.maximum(cost[acc], 1e-300)
+        small_step = np.all(np.abs(step[better]) <= xtol * (np.abs(p_new[better]) + xtol), axis=1)
+        p[acc] = p_new[better]
+        r[acc] = r_new[better]
+        cost[acc] = cost_new[better]
+        lam[acc] /= 10
+        lam[idx[~better]] *= 10
+        n_iter[idx] += 1
+        done = np.zeros(b, bool)
+        done[acc] = (rel_drop <= ftol) | small_step
+        done[idx[~better]] = lam[idx[~better]] > 1e16   # 阻尼过大仍无法下降，视为已到极小值
+        active &= ~done
+
+    J = jac(x, p) * w[..., None]
+    A = np.swapaxes(J, 1, 2) @ J
+    scale = np.sqrt(np.maximum(np.diagonal(A, axis1=1, axis2=2), 1e-300))
+    As = A / (scale[:, :, None] * scale[:, None, :])
+    cond = np.linalg.cond(As)
+    A_inv = np.linalg.pinv(As)
+    return _summary(model, x, y, w, p, n_iter, ~active, cond, A_inv, scale)
+
+
+@traced("fit")
+def fit_batch(model: Model, x, y, sigma=None, p0=None,
+              max_iter: int = 200, ftol: float = 1e-12, xtol: float = 1e-12) -> BatchFit:
+    """
+    对多组独立数据同时拟合同一模型
+
+    参数:
+    model: Model（如CAUCHY）
+    x, y: (组数, 点数) 数组；一维时视为一组。x可为各组共用的一维数组
+    sigma: 测量标准差，形状可广播到y；inf表示该点不参与拟合
+    p0: 初值 (组数, 参数个数) 或各组共用的一维数组；线性模型不需要
+    max_iter, ftol, xtol: LM迭代次数上限与收敛判据（代价相对下降量、参数相对步长）
+
+    返回:
+    BatchFit
+    """
+    y = _as_batch(y)
+    x = np.ascontiguousarray(_as_batch(x, y.shape))
+    w = np.ones_like(y) if sigma is None else 1.0 / _as_batch(sigma, y.shape)
+    k = len(model.params)
+    if np.any(np.count_nonzero(w, axis=1) < k):
+        raise ValueError(f"每组数据的有效点数不能少于参数个数（{k}）")
+
+    if model.linear:
+        return _fit_linear(model, x, y, w)
+
+    if p0 is None:
+        if model.p0 is None:
+            raise ValueError(f"非线性模型{model.name}需要提供初值p0")
+        p0 = model.p0(x, y)
+    p = np.array(np.broadcast_to(np.asarray(p0, dtype=float), (y.shape[0], k)))
+    return _fit_lm(model, x, y, w, p, max_iter, ftol, xtol)
@@ -0,0 +1,106 @@
+"""
+均匀场平台区检测（lab11 亥姆霍兹线圈轴向扫描）
+
+给定B(x)与容差（相对峰值），找出与峰值相差不超过容差的最宽连续区间，
+并给出区间内的平均场和纹波。全部为线性时间的向量化运算，可一次处理一批扫描。
+"""
+import warnings
+from dataclasses import dataclass
+from typing import Union
+
+import numpy as np
+
+from phylab.trace import traced
+
+Number = Union[float, np.ndarray]
+
+
+@dataclass
+class Plateau:
+    """
+    平台区检测结果；输入为一条扫描时各字段为标量，为一批扫描时为数组
+
+    x_start, x_end: 平台区两端的坐标（均为采样点，闭区间）
+    start, end: 两端采样点序号（闭区间）
+    没有平台区的扫描（如全部为NaN）各字段为NaN，此时批量结果的start、end为浮点数组
+    peak: 扫描的峰值
+    mean: 平台区内平均场
+    ripple: 平台区内峰峰值（最大值-最小值）
+    ripple_rel: 纹波相对平均场的比例
+    """
+    x_start: Number
+    x_end: Number
+    start: Number
+    end: Number
+    peak: Number
+    mean: Number
+    ripple: Number
+    ripple_rel: Number
+
+    @property
+    def width(self) -> Number:
+        return self.x_end - self.x_start
+
+
+@traced("fit")
+def find_plateaus(x, B, tol: float = 0.01) -> Plateau:
+    """
+    检测均匀场平台区
+
+    参数:
+    x: 采样坐标，一维（各扫描共用）或与B同形状，需单调递增
+    B: 一条扫描（一维）或一批扫描（二维：扫描数 × 采样点数）
+    tol: 相对容差，|B - peak| ≤ tol·|peak| 的点视为均匀；NaN视为缺测，不属于任何平台区
+
+    返回:
+    Plateau；多个等宽区间时取最靠前的一个
+    """
+    B = np.asarray(B, dtype=float)
+    single = B.ndim == 1
+    B2 = np.atleast_2d(B)
+    n_scans, n = B2.shape
+    x2 = np.broadcast_to(np.asarray(x, dtype=float), B2.shape)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # 全为NaN的扫描峰值记为NaN
+        peak = np.nanmax(B2, axis=1)
+    inside = np.abs(B2 - peak[:, None]) <= tol * np.abs(peak[:, None])
+
+    # 在两侧补False后差分，+1为区间起点，-1为区间终点的下一个位置
+    edges = np.diff(np.pad(inside.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+    rows_s, starts = np.nonzero(edges == 1)
+    _, stops = np.nonzero(edges == -1)  # 与起点按行、按顺序一一对应
+    ends = stops - 1
+    width = x2[rows_s, ends] - x2[rows_s, starts]
+
+    # 每行取最宽区间（宽度相同时取最靠前），再按行号散布回全长数组
+    order = np.lexsort((starts, -width, rows_s))
+    rows_u, first = np.unique(rows_s[order], return_index=True)
+    best = order[first]
+    found = np.zeros(n_scans, dtype=bool)
+    found[rows_u] = True
+    start = np.zeros(n_scans, dtype=np.intp)
+    end = np.full(n_scans, -1, dtype=np.intp)  # 未找到的行为空区间，下面的掩码全为False
+    start[rows_u], end[rows_u] = starts[best], ends[best]
+
+    cols = np.arange(n)
+    mask = (cols >= start[:, None]) & (cols <= end[:, None])
+    count = end - start + 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(found, np.where(mask, B2, 0.0).sum(axis=1) / count, np.nan)
+        hi = np.where(mask, B2, -np.inf).max(axis=1)
+        lo = np.where(mask, B2, np.inf).min(axis=1)
+        ripple = np.where(found, hi - lo, np.nan)
+        ripple_rel = ripple / np.abs(mean)
+
+    rows = np.arange(n_scans)
+    x_start = np.where(found, x2[rows, start], np.nan)
+    x_end = np.where(found, x2[rows, np.maximum(end, 0)], np.nan)
+    if not found.all():
+        start = np.where(found, start, np.nan)
+        end = np.where(found, end, np.nan)
+    result = Plateau(x_start=x_start, x_end=x_end, start=start, end=end, peak=peak, mean=mean,
+                     ripple=ripple, ripple_rel=ripple_rel)
+    if single:
+        result = Plateau(**{k: v[0].item() for k, v in vars(result).items()})
+    return result
@@ -0,0 +1,223 @@
+"""
+多组扫描数据的批量多项式拟合与极大值定位
+
+- 各组共用同一组自变量（如同一套电容档位）时，只对一个范德蒙德矩阵做一次QR分解，
+  所有组的系数由同一次三角回代得到；自变量不同或有缺测点（NaN）时逐组批量求解（nlfit.fit_batch）
+- 自变量先线性映射到[-1, 1]再构造范德蒙德矩阵，高次多项式也不会病态
+- 极大值由导数多项式的根（批量求伴随矩阵特征值）解析求出，只取测量范围内的极大值点；
+  位置与峰值的置信区间按参数协方差一阶传递，取t分布分位数
+- resonance_peaks 对 nlfit.POWER_FACTOR 等以峰位为参数的物理模型给出同样格式的结果
+
+用法：
+    from phylab.polyfit import poly_batch
+    fit = poly_batch(C, cos_phi, degree=3)   # cos_phi为 (组数, 点数) 或一维
+    peaks = fit.peaks()                      # peaks.x、peaks.x_interval ...
+"""
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+from phylab.nlfit import BatchFit, fit_batch, polynomial
+from phylab.trace import traced
+
+Array = np.ndarray
+CONFIDENCE = 0.95
+
+
+# ---------------------- 结果 ----------------------
+@dataclass
+class Peaks:
+    """
+    各组的极大值（没有落在测量范围内的极大值时为NaN）
+
+    x, y: 极大值位置与极大值
+    x_err, y_err: 标准误差
+    x_interval, y_interval: 置信区间 (下限, 上限)
+    confidence: 置信水平
+    """
+    x: Array
+    y: Array
+    x_err: Array
+    y_err: Array
+    x_interval: Tuple[Array, Array]
+    y_interval: Tuple[Array, Array]
+    confidence: float
+
+
+def _t_quantile(dof: Array, confidence: float) -> Array:
+    """双侧t分布分位数；scipy较重，用到时才导入"""
+    from scipy.special import stdtrit
+    with np.errstate(invalid="ignore"):
+        return stdtrit(np.where(dof > 0, dof, np.nan), (1 + confidence) / 2)
+
+
+def _peaks(x, y, x_err, y_err, dof, confidence) -> Peaks:
+    t = _t_quantile(dof, confidence)
+    return Peaks(x=x, y=y, x_err=x_err, y_err=y_err,
+                 x_interval=(x - t * x_err, x + t * x_err),
+                 y_interval=(y - t * y_err, y + t * y_err), confidence=confidence)
+
+
+def _polyval(c: Array, u: Array) -> Array:
+    """各组分别求多项式的值：c为 (组数, 阶数+1) 升幂系数，u的第一维为组"""
+    out = np.zeros(np.shape(u)) + c[:, -1].reshape((-1,) + (1,) * (np.ndim(u) - 1))
+    for j in range(c.shape[1] - 2, -1, -1):
+        out = out * u + c[:, j].reshape((-1,) + (1,) * (np.ndim(u) - 1))
+    return out
+
+
+def _deriv(c: Array) -> Array:
+    return c[:, 1:] * np.arange(1, c.shape[1])
+
+
+def _real_roots(d: Array) -> Array:
+    """各组导数多项式的根 (组数, 次数)，复根为NaN"""
+    m, deg = d.shape[0], d.shape[1] - 1
+    roots = np.full((m, deg), np.nan + 0j)
+    lead = np.abs(d[:, -1]) > 1e-12 * np.abs(d).max(axis=1)
+    if deg > 0 and lead.any():
+        comp = np.zeros((int(lead.sum()), deg, deg))
+        comp[:, np.arange(1, deg), np.arange(deg - 1)] = 1
+        comp[:, :, -1] = -d[lead, :-1] / d[lead, -1:]
+        roots[lead] = np.linalg.eigvals(comp)
+    for i in np.flatnonzero(~lead):  # 最高次系数为0时降次求根（极少出现）
+        r = np.polynomial.polynomial.polyroots(np.trim_zeros(d[i], "b")) if d[i].any() else []
+        roots[i, :len(r)] = r
+    real = np.abs(roots.imag) <= 1e-8 * (1 + np.abs(roots.real))
+    return np.where(real, roots.real, np.nan)
+
+
+@dataclass
+class PolyFit:
+    """
+    批量多项式拟合结果（第一维为数据组）
+
+    coef: 以 u = (x − center)/scale 为自变量的升幂系数 (组数, 阶数+1)
+    cov: 系数协方差 (组数, 阶数+1, 阶数+1)，按残差缩放
+    chi2, dof, r2: 加权残差平方和、自由度、决定系数
+    center, scale: 自变量映射到[-1, 1]所用的中心与半宽
+    """
+    coef: Array
+    cov: Array
+    chi2: Array
+    dof: Array
+    r2: Array
+    center: float
+    scale: float
+
+    @property
+    def degree(self) -> int:
+        return self.coef.shape[1] - 1
+
+    def _u(self, x) -> Array:
+        return (np.asarray(x, dtype=float) - self.center) / self.scale
+
+    def __call__(self, x) -> Array:
+        """各组在共用自变量x处的拟合值 (组数, 点数)"""
+        u = np.broadcast_to(self._u(x), (self.coef.shape[0], np.size(x)))
+        return _polyval(self.coef, u)
+
+    def band(self, x, confidence: float = CONFIDENCE) -> Tuple[Array, Array]:
+        """拟合曲线的置信带 (下限, 上限)，形状同 self(x)"""
+        V = self._u(np.ravel(x))[:, None] ** np.arange(self.degree + 1)
+        var = np.einsum("nk,mkl,nl->mn", V, self.cov, V)
+        t = _t_quantile(self.dof, confidence)[:, None]
+        y = self(np.ravel(x))
+        return y - t * np.sqrt(var), y + t * np.sqrt(var)
+
+    def peaks(self, confidence: float = CONFIDENCE) -> Peaks:
+        """
+        各组在测量范围内的极大值点（导数为0且二阶导数为负，多个时取函数值最大者）
+
+        位置 u* 满足 p'(u*) = 0，对系数的偏导数为 −j·u*^(j−1)/p''(u*)；
+        峰值对系数的偏导数为 u*^j（p'(u*) = 0，u*的变化不影响一阶结果）
+        """
+        c = self.coef
+        d = _deriv(c)
+        r = _real_roots(d)
+        curv = _polyval(_deriv(d), r) if d.shape[1] > 1 else np.zeros_like(r)
+        ok = (np.abs(r) <= 1) & (curv < 0)
+        value = np.where(ok, _polyval(c, r), -np.inf)
+        best = np.argmax(value, axis=1)
+        rows = np.arange(c.shape[0])
+        found = ok[rows, best]
+        u = np.where(found, r[rows, best], np.nan)
+        curv = curv[rows, best]
+
+        j = np.arange(c.shape[1])
+        powers = u[:, None] ** j
+        with np.errstate(divide="ignore", invalid="ignore"):
+            g = -j * np.where(j > 0, u[:, None] ** np.maximum(j - 1, 0), 0.0) / curv[:, None]
+        u_var = np.einsum("mk,mkl,ml->m", g, self.cov, g)
+        y_var = np.einsum("mk,mkl,ml->m", powers, self.cov, powers)
+        return _peaks(self.center + self.scale * u, _polyval(c, u), self.scale * np.sqrt(u_var),
+                      np.sqrt(y_var), self.dof, confidence)
+
+
+# ---------------------- 拟合 ----------------------
+@traced("fit")
+def poly_batch(x, y, degree: int, sigma=None) -> PolyFit:
+    """
+    对多组数据同时做degree次多项式最小二乘拟合
+
+    参数:
+    x: 各组共用的一维自变量，或与y同形状的二维数组
+    y: (组数, 点数)，一维时视为一组；NaN表示缺测
+    degree: 多项式次数
+    sigma: 测量标准差，可广播到y的形状；None为等权
+
+    返回:
+    PolyFit
+    """
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    x = np.asarray(x, dtype=float)
+    lo, hi = np.nanmin(x), np.nanmax(x)
+    center, scale = (hi + lo) / 2, ((hi - lo) / 2 or 1.0)
+    u = (x - center) / scale
+    k = degree + 1
+    shared_w = sigma is None or np.ndim(sigma) <= 1
+
+    if x.ndim == 1 and shared_w and np.isfinite(y).all():
+        # 共用自变量与权重：一个范德蒙德矩阵、一次QR分解，所有组一起回代
+        w = np.broadcast_to(1.0 if sigma is None else 1 / np.asarray(sigma, dtype=float), u.shape)
+        V = u[:, None] ** np.arange(k)
+        Q, R = np.linalg.qr(V * w[:, None])
+        coef = np.linalg.solve(R, Q.T @ (y * w).T).T
+        resid = y - coef @ V.T
+        chi2 = np.einsum("mn,mn->m", resid * w, resid * w)
+        dof = np.full(y.shape[0], u.size - k)
+        Rinv = np.linalg.inv(R)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            s2 = np.where(dof > 0, chi2 / dof, np.inf)
+            ss_tot = np.sum((y - y.mean(axis=1, keepdims=True)) ** 2, axis=1)
+            r2 = np.where(ss_tot > 0, 1 - np.sum(resid ** 2, axis=1) / ss_tot, 0.0)
+        cov = (Rinv @ Rinv.T)[None] * s2[:, None, None]
+        return PolyFit(coef=coef, cov=cov, chi2=chi2, dof=dof, r2=r2, center=center, scale=scale)
+
+    # 各组自变量或权重不同、或有缺测点：逐组QR分解（仍是一次批量调用）
+    u = np.broadcast_to(u, y.shape)
+    missing = ~(np.isfinite(u) & np.isfinite(y))
+    sig = np.broadcast_to(1.0 if sigma is None else np.asarray(sigma, dtype=float), y.shape)
+    fit: BatchFit = fit_batch(polynomial(degree), np.where(missing, 0.0, u), np.where(missing, 0.0, y),
+                              sigma=np.where(missing, np.inf, sig))
+    return PolyFit(coef=fit.params, cov=fit.cov, chi2=fit.chi2, dof=fit.dof, r2=fit.r2,
+                   center=center, scale=scale)
+
+
+def resonance_peaks(fit: BatchFit, confidence: float = CONFIDENCE,
+                    x_param: str = "C0", y_param: str = "A") -> Peaks:
+    """
+    峰位与峰值本身就是模型参数时（如nlfit.POWER_FACTOR的C0与A），按Peaks格式给出结果
+
+    参数:
+    fit: fit_batch的结果；未收敛的组为NaN
+    x_param, y_param: 峰位与峰值对应的参数名
+    """
+    names = list(fit.model.params)
+    i, j = names.index(x_param), names.index(y_param)
+    err = fit.stderr
+    bad = ~fit.converged
+    nan_if_bad = lambda a: np.where(bad, np.nan, a)
+    return _peaks(nan_if_bad(fit.params[:, i]), nan_if_bad(fit.params[:, j]),
+                  nan_if_bad(err[:, i]), nan_if_bad(err[:, j]), fit.dof, confidence)
@@ -0,0 +1,305 @@
+"""
+直线拟合 y = k·x + b 的公共实现
+
+全部基于加权求和的闭式解，一次遍历数据即可得到斜率、截距、协方差和R²，
+不需要像 np.polyfit(..., cov=True) 那样重复拟合。
+
+- weighted_linfit: 单条数据
+- linfit_batch: 二维数组中的多条数据一次向量化拟合（NaN视为缺测）
+- RunningLinearFit: Welford式增量累加器，每来一个点O(1)更新，用于实时读数
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from phylab.trace import traced
+
+
+@dataclass
+class LinearFit:
+    """
+    直线拟合结果
+
+    k, b: 斜率与截距
+    sigma_k, sigma_b: 斜率与截距的标准误差
+    cov: 参数协方差矩阵，顺序为 (k, b)，与np.polyfit(cov=True)一致
+    r2: 决定系数R²（按未加权残差计算）
+    n: 数据点数
+    """
+    k: float
+    b: float
+    sigma_k: float
+    sigma_b: float
+    cov: np.ndarray
+    r2: float
+    n: int
+
+    def __call__(self, x):
+        return self.k * np.asarray(x, dtype=float) + self.b
+
+
+@traced("fit")
+def weighted_linfit(x, y, w: Optional[np.ndarray] = None) -> LinearFit:
+    """
+    加权最小二乘直线拟合，结果与 np.polyfit(x, y, 1, w=w, cov=True) 相同
+
+    参数:
+    x, y: 一维数据
+    w: 权重，None表示等权；与np.polyfit相同，作用于未平方的残差（即最小化 Σ(w·r)²）
+
+    返回:
+    LinearFit
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if x.shape != y.shape or x.ndim != 1:
+        raise ValueError(f"x与y必须是等长一维数组：{x.shape} vs {y.shape}")
+    n = x.size
+    if n <= 2:
+        raise ValueError("直线拟合估计不确定度至少需要3个数据点")
+    w2 = np.ones_like(x) if w is None else np.asarray(w, dtype=float) ** 2
+
+    # 以加权均值为中心求和，避免大数相减的精度损失
+    sw = w2.sum()
+    x_mean = np.dot(w2, x) / sw
+    y_mean = np.dot(w2, y) / sw
+    dx = x - x_mean
+    dy = y - y_mean
+    sxx = np.dot(w2 * dx, dx)
+    if sxx == 0:
+        raise ValueError("x取值全部相同，无法拟合斜率")
+    k = np.dot(w2 * dx, dy) / sxx
+    b = y_mean - k * x_mean
+
+    residuals = dy - k * dx
+    s2 = np.dot(w2 * residuals, residuals) / (n - 2)  # 与np.polyfit的协方差缩放一致
+    var_k = s2 / sxx
+    cov = np.array([[var_k, -x_mean * var_k],
+                    [-x_mean * var_k, s2 / sw + x_mean ** 2 * var_k]])
+
+    yc = y - y.mean()
+    ss_tot = np.dot(yc, yc)
+    ss_res = np.dot(residuals, residuals)  # residuals即 y - (k·x + b)
+    r2 = 1 - ss_res / ss_tot if ss_tot != 0 else 0.0
+
+    return LinearFit(k=float(k), b=float(b),
+                     sigma_k=float(np.sqrt(cov[0, 0])), sigma_b=float(np.sqrt(cov[1, 1])),
+                     cov=cov, r2=float(r2), n=n)
+
+
+# ---------------------- 批量拟合 ----------------------
+@dataclass
+class BatchLinearFit:
+    """
+    多条数据的直线拟合结果，各字段为长度等于数据条数的数组
+
+    k, b: 斜率与截距
+    sigma_k, sigma_b: 斜率与截距的标准误差
+    cov_kb: 斜率与截距的协方差
+    r2: 决定系数R²（按未加权残差计算）
+    n: 每条数据的有效点数
+    """
+    k: np.ndarray
+    b: np.ndarray
+    sigma_k: np.ndarray
+    sigma_b: np.ndarray
+    cov_kb: np.ndarray
+    r2: np.ndarray
+    n: np.ndarray
+
+    def __len__(self) -> int:
+        return self.k.size
+
+    def __getitem__(self, i: int) -> LinearFit:
+        """取出第i条数据的结果"""
+        var_k, var_b, c = self.sigma_k[i] ** 2, self.sigma_b[i] ** 2, self.cov_kb[i]
+        return LinearFit(k=float(self.k[i]), b=float(self.b[i]),
+                         sigma_k=float(self.sigma_k[i]), sigma_b=float(self.sigma_b[i]),
+                         cov=np.array([[var_k, c], [c, var_b]]),
+                         r2=float(self.r2[i]), n=int(self.n[i]))
+
+    def __call__(self, x):
+        """x为各条数据共用的一维数组或(条数, 点数)数组，返回(条数, 点数)"""
+        x = np.asarray(x, dtype=float)
+        return self.k[:, None] * x + self.b[:, None]
+
+
+@traced("fit")
+def linfit_batch(x, y, w: Optional[np.ndarray] = None) -> BatchLinearFit:
+    """
+    对二维数组的每一行分别做直线拟合，单行结果与weighted_linfit相同
+
+    参数:
+    x: 各行共用的一维数组，或与y同形状的二维数组
+    y: (条数, 点数)，NaN表示该点缺测（各条数据长度不同时用NaN补齐）
+    w: 权重，可广播到y的形状，含义同weighted_linfit
+
+    返回:
+    BatchLinearFit；有效点数不足3或x全部相同的行，结果为NaN
+    """
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    x = np.broadcast_to(np.asarray(x, dtype=float), y.shape)
+    valid = np.isfinite(x) & np.isfinite(y)
+    w2 = np.ones(y.shape) if w is None else np.broadcast_to(np.asarray(w, dtype=float) ** 2, y.shape)
+    w2 = np.where(valid, w2, 0.0)
+    x = np.where(valid, x, 0.0)
+    y = np.where(valid, y, 0.0)
+    n = valid.sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sw = w2.sum(axis=1)
+        x_mean = np.einsum("ij,ij->i", w2, x) / sw
+        y_mean = np.einsum("ij,ij->i", w2, y) / sw
+        dx = np.where(valid, x - x_mean[:, None], 0.0)
+        dy = np.where(valid, y - y_mean[:, None], 0.0)
+        sxx = np.einsum("ij,ij,ij->i", w2, dx, dx)
+        k = np.einsum("ij,ij,ij->i", w2, dx, dy) / sxx
+        b = y_mean - k * x_mean
+
+        residuals = dy - k[:, None] * dx
+        s2 = np.einsum("ij,ij,ij->i", w2, residuals, residuals) / (n - 2)
+        var_k = s2 / sxx
+        var_b = s2 / sw + x_mean ** 2 * var_k
+
+        y_plain_mean = y.sum(axis=1) / n
+        yc = np.where(valid, y - y_plain_mean[:, None], 0.0)
+        ss_tot = np.einsum("ij,ij->i", yc, yc)
+        ss_res = np.einsum("ij,ij->i", residuals, residuals)
+        r2 = np.where(ss_tot != 0, 1 - ss_res / ss_tot, 0.0)
+
+    bad = (n <= 2) | ~(sxx > 0)
+    nan_if_bad = lambda a: np.where(bad, np.nan, a)
+    return BatchLinearFit(k=nan_if_bad(k), b=nan_if_bad(b),
+                          sigma_k=nan_if_bad(np.sqrt(var_k)), sigma_b=nan_if_bad(np.sqrt(var_b)),
+                          cov_kb=nan_if_bad(-x_mean * var_k), r2=nan_if_bad(r2), n=n)
+
+
+# ---------------------- 增量拟合 ----------------------
+Shape = Union[int, Tuple[int, ...]]
+
+
+class RunningLinearFit:
+    """
+    直线拟合的增量累加器（Welford算法，等权）
+
+    只保存点数、均值和中心化二阶矩，每加入一个点O(1)更新，
+    任意时刻可读出斜率、截距、R²和标准误差，不需要保留或重算历史数据。
+    shape不为()时同时跟踪多路数据（如多个样品同时测R-t），各路独立更新。
+    """
+
+    def __init__(self, shape: Shape = ()):
+        self.n = np.zeros(shape, dtype=np.int64)
+        self.mean_x = np.zeros(shape)
+        self.mean_y = np.zeros(shape)
+        self.sxx = np.zeros(shape)
+        self.sxy = np.zeros(shape)
+        self.syy = np.zeros(shape)
+
+    def update(self, x, y) -> "RunningLinearFit":
+        """
+        加入一个点（多路时为每路一个点）
+
+        参数:
+        x, y: 标量或可广播到累加器形状的数组；含NaN的通道本次跳过
+        """
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        ok = np.isfinite(x) & np.isfinite(y)
+        n = self.n + ok
+        safe_n = np.maximum(n, 1)
+        dx = np.where(ok, x - self.mean_x, 0.0)
+        dy = np.where(ok, y - self.mean_y, 0.0)
+        self.mean_x = self.mean_x + dx / safe_n
+        self.mean_y = self.mean_y + dy / safe_n
+        # 新旧均值各取一次的乘积，保证中心化二阶矩数值稳定
+        self.sxx = self.sxx + np.where(ok, dx * (x - self.mean_x), 0.0)
+        self.sxy = self.sxy + np.where(ok, dx * (y - self.mean_y), 0.0)
+        self.syy = self.syy + np.where(ok, dy * (y - self.mean_y), 0.0)
+        self.n = n
+        return self
+
+    def extend(self, x, y) -> "RunningLinearFit":
+        """
+        一次加入一段数据（最后一维为点），先求这一段的统计量再合并，等价于逐点update
+        """
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        ok = np.isfinite(x) & np.isfinite(y)
+        other = RunningLinearFit(np.shape(self.n))
+        other.n = np.broadcast_to(ok.sum(axis=-1), np.shape(self.n)).astype(np.int64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cnt = np.maximum(ok.sum(axis=-1), 1)
+            mx = np.where(ok, x, 0.0).sum(axis=-1) / cnt
+            my = np.where(ok, y, 0.0).sum(axis=-1) / cnt
+        dx = np.where(ok, x - mx[..., None], 0.0)
+        dy = np.where(ok, y - my[..., None], 0.0)
+        other.mean_x, other.mean_y = mx, my
+        other.sxx = (dx * dx).sum(axis=-1)
+        other.sxy = (dx * dy).sum(axis=-1)
+        other.syy = (dy * dy).sum(axis=-1)
+        return self.merge(other)
+
+    def merge(self, other: "RunningLinearFit") -> "RunningLinearFit":
+        """合并另一个累加器（Chan等人的并行合并公式），返回self"""
+        n = self.n + other.n
+        safe_n = np.maximum(n, 1)
+        dx = other.mean_x - self.mean_x
+        dy = other.mean_y - self.mean_y
+        f = self.n * other.n / safe_n
+        self.mean_x = self.mean_x + dx * other.n / safe_n
+        self.mean_y = self.mean_y + dy * other.n / safe_n
+        self.sxx = self.sxx + other.sxx + dx * dx * f
+        self.sxy = self.sxy + other.sxy + dx * dy * f
+        self.syy = self.syy + other.syy + dy * dy * f
+        self.n = n
+        return self
+
+    # 以下读数在点数不足（斜率需2点、误差需3点）时为NaN
+    @property
+    def k(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.sxx > 0, self.sxy / self.sxx, np.nan)[()]
+
+    @property
+    def b(self):
+        return self.mean_y - self.k * self.mean_x
+
+    @property
+    def r2(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r2 = np.where(self.syy > 0, self.sxy ** 2 / (self.sxx * self.syy), 0.0)
+            return np.where(self.sxx > 0, r2, np.nan)[()]
+
+    @property
+    def _s2(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ss_res = np.maximum(self.syy - self.k * self.sxy, 0.0)
+            return np.where(self.n > 2, ss_res / (self.n - 2), np.nan)
+
+    @property
+    def sigma_k(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.sqrt(self._s2 / self.sxx)[()]
+
+    @property
+    def sigma_b(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.sqrt(self._s2 / self.n + self.mean_x ** 2 * self._s2 / self.sxx)[()]
+
+    @property
+    def alpha(self):
+        """电阻温度系数 α = k / b（R = R0(1 + αt)，b即0℃时的电阻R0）"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (self.k / self.b)[()]
+
+    def result(self) -> LinearFit:
+        """当前拟合结果（单路时使用）"""
+        if np.ndim(self.n) != 0:
+            raise ValueError("多路累加器请直接读取k、b、r2等数组属性")
+        if self.n <= 2:
+            raise ValueError("直线拟合估计不确定度至少需要3个数据点")
+        var_k = float(self.sigma_k) ** 2
+        cov = np.array([[var_k, -self.mean_x * var_k],
+                        [-self.mean_x * var_k, float(self.sigma_b) ** 2]])
+        return LinearFit(k=float(self.k), b=float(self.b),
+                         sigma_k=float(self.sigma_k), sigma_b=float(self.sigma_b),
+                         cov=cov, r2=float(self.r2), n=int(self.n))
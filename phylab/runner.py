@@ -0,0 +1,251 @@
+"""
+并行绘图入口：自动发现各实验目录下的绘图脚本，分发到常驻进程池中执行
+
+每个工作进程启动时只导入一次matplotlib/numpy/scipy等库，
+之后连续执行多个绘图任务，避免每个脚本单独冷启动解释器。
+
+任务划分规则：
+- 脚本定义了顶层函数 plot_jobs() 时，它应返回 {任务名: 无参绘图函数}，
+  每个任务单独分发（例如lab01的六张校准曲线）
+- 其余脚本整体作为一个任务，以 __main__ 身份运行
+
+用法（在仓库根目录下执行）:
+    python -m phylab.runner              # 重新生成全部实验图片
+    python -m phylab.runner lab10 lab11  # 只运行目录名包含lab10或lab11的脚本
+    python -m phylab.runner -j 4         # 指定进程数
+    python -m phylab.runner --list       # 只列出任务，不执行
+    python -m phylab.runner --trace t.jsonl  # 记录各脚本load/fit/render/save阶段的耗时（见phylab.trace）
+"""
+import argparse
+import ast
+import importlib
+import importlib.util
+import os
+import runpy
+import sys
+import time
+import traceback
+import unicodedata
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from phylab import trace
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+JOBS_FUNC = "plot_jobs"
+
+# 工作进程预热时导入的库；缺失的可选库直接跳过
+WARM_MODULES = ("numpy", "matplotlib.pyplot", "matplotlib.ticker",
+                "scipy.special", "openpyxl", "phylab.runtime")
+
+
+@dataclass(frozen=True)
+class PlotJob:
+    """一个绘图任务：name为None表示整体运行脚本，否则为plot_jobs()中的任务名"""
+    script: Path
+    name: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        try:
+            rel = self.script.relative_to(REPO_ROOT)
+        except ValueError:
+            rel = self.script
+        return f"{rel.as_posix()}::{self.name}" if self.name else rel.as_posix()
+
+
+@dataclass
+class JobResult:
+    """任务执行结果，seconds为工作进程内的耗时（秒）"""
+    job: PlotJob
+    seconds: float
+    ok: bool
+    error: str = ""
+
+
+# ---------------------- 任务发现（主进程，不导入脚本） ----------------------
+def discover_scripts(root: Path = REPO_ROOT,
+                     patterns: Sequence[str] = ()) -> List[Path]:
+    """
+    查找 root 下所有 lab*/ 目录中的 .py 脚本
+
+    参数:
+    root: 仓库根目录
+    patterns: 目录名过滤关键字，为空时返回全部脚本
+    """
+    scripts = sorted(p for p in Path(root).glob("lab*/*.py") if p.is_file())
+    if patterns:
+        scripts = [p for p in scripts if any(k in p.parent.name for k in patterns)]
+    return scripts
+
+
+def defines_plot_jobs(script: Path) -> bool:
+    """静态检查脚本是否定义了顶层函数 plot_jobs()，避免在主进程中执行脚本"""
+    source = Path(script).read_text(encoding="utf-8")
+    tree = ast.parse(source, filename=str(script))
+    return any(isinstance(node, ast.FunctionDef) and node.name == JOBS_FUNC
+               for node in tree.body)
+
+
+# ---------------------- 工作进程 ----------------------
+_MODULE_CACHE: Dict[Path, object] = {}
+
+
+def _warm_up() -> None:
+    """进程池初始化函数：强制Agg后端并预先导入重量级库"""
+    os.environ["MPLBACKEND"] = "Agg"
+    os.environ["PHYLAB_HEADLESS"] = "1"
+    trace.enable()  # 设置了PHYLAB_TRACE时在本进程中重新打开输出文件
+    for name in WARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+    # 无界面后端下plt.show()的提示与缺字体告警对批量出图没有意义
+    warnings.filterwarnings("ignore", message=".*non-interactive.*")
+    warnings.filterwarnings("ignore", message=".*findfont.*")
+    warnings.filterwarnings("ignore", message=".*Glyph.*missing.*")
+
+
+@contextmanager
+def _chdir(path: Path):
+    """脚本均以相对路径读写数据和图片，执行任务时切换到脚本所在目录"""
+    old = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(old)
+
+
+def _load_module(script: Path):
+    """按路径导入脚本（不触发 __main__ 分支），同一进程内只导入一次"""
+    module = _MODULE_CACHE.get(script)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(
+            f"_phylab_job_{len(_MODULE_CACHE)}", script)
+        module = importlib.util.module_from_spec(spec)
+        with _chdir(script.parent):
+            spec.loader.exec_module(module)
+        _MODULE_CACHE[script] = module
+    return module
+
+
+def list_script_jobs(script: Path) -> List[str]:
+    """在工作进程中列出脚本 plot_jobs() 提供的任务名"""
+    return list(getattr(_load_module(script), JOBS_FUNC)())
+
+
+def run_job(job: PlotJob) -> JobResult:
+    """在工作进程中执行单个任务，异常不会中断其他任务"""
+    import matplotlib.pyplot as plt
+
+    start = time.perf_counter()
+    ok, error = True, ""
+    try:
+        with _chdir(job.script.parent), trace.span(job.label, cat="script"):
+            if job.name is None:
+                runpy.run_path(str(job.script), run_name="__main__")
+            else:
+                getattr(_load_module(job.script), JOBS_FUNC)()[job.name]()
+    except (Exception, SystemExit):
+        ok, error = False, traceback.format_exc(limit=-3)
+    finally:
+        plt.close("all")  # 工作进程常驻，必须释放本任务创建的全部图形
+    return JobResult(job, time.perf_counter() - start, ok, error)
+
+
+# ---------------------- 调度（主进程） ----------------------
+def collect_jobs(scripts: Iterable[Path], pool: ProcessPoolExecutor) -> List[PlotJob]:
+    """把脚本展开为任务列表；含 plot_jobs() 的脚本由工作进程列出子任务"""
+    scripts = list(scripts)
+    listing = {s: pool.submit(list_script_jobs, s)
+               for s in scripts if defines_plot_jobs(s)}
+    jobs = []
+    for script in scripts:
+        try:
+            names = listing[script].result() if script in listing else [None]
+        except Exception:
+            names = [None]  # 导入失败时整体运行，由run_job报告具体错误
+        jobs.extend(PlotJob(script, name) for name in names)
+    return jobs
+
+
+def run_all(scripts: Sequence[Path],
+            workers: Optional[int] = None) -> Tuple[List[JobResult], float]:
+    """
+    并行执行全部绘图任务
+
+    参数:
+    scripts: 脚本路径列表（见discover_scripts）
+    workers: 进程数，None时使用CPU核数
+
+    返回:
+    (按提交顺序排列的任务结果, 总墙钟时间/秒)
+    """
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_up) as pool:
+        jobs = collect_jobs(scripts, pool)
+        futures = [pool.submit(run_job, job) for job in jobs]
+        results = [f.result() for f in futures]
+    return results, time.perf_counter() - start
+
+
+def _display_width(text: str) -> int:
+    """终端显示宽度：中文等全角字符占两列"""
+    return sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text)
+
+
+def print_report(results: Sequence[JobResult], wall: float) -> None:
+    """控制台输出每个任务的耗时与总耗时"""
+    width = max([_display_width(r.job.label) for r in results] + [10])
+    print("=" * (width + 20))
+    for r in results:
+        status = "OK" if r.ok else "FAILED"
+        pad = " " * (width - _display_width(r.job.label))
+        print(f"{r.job.label}{pad}  {r.seconds:8.3f} s  {status}")
+    print("-" * (width + 20))
+    busy = sum(r.seconds for r in results)
+    failed = [r for r in results if not r.ok]
+    print(f"任务数：{len(results)} | 失败：{len(failed)}")
+    print(f"任务耗时合计：{busy:.3f} s | 总墙钟时间：{wall:.3f} s")
+    print("=" * (width + 20))
+    for r in failed:
+        print(f"\n[{r.job.label}]\n{r.error}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="并行重新生成各实验的图片")
+    parser.add_argument("patterns", nargs="*", help="实验目录名过滤关键字，如 lab10")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="进程数，默认为CPU核数")
+    parser.add_argument("--list", action="store_true", help="只列出任务，不执行")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="分阶段计时输出文件（.json为Chrome trace，其余为JSON Lines）")
+    args = parser.parse_args(argv)
+    if args.trace:
+        Path(args.trace).unlink(missing_ok=True)
+        trace.enable(args.trace)
+
+    scripts = discover_scripts(REPO_ROOT, args.patterns)
+    if not scripts:
+        print("未找到绘图脚本")
+        return 1
+    if args.list:
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=_warm_up) as pool:
+            for job in collect_jobs(scripts, pool):
+                print(job.label)
+        return 0
+
+    results, wall = run_all(scripts, args.jobs)
+    print_report(results, wall)
+    if args.trace:
+        print(f"计时记录：{args.trace}（python -m phylab.trace summary {args.trace}）")
+    return 0 if all(r.ok for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""
+绘图脚本的快速启动运行时：延迟导入、无界面后端、缓存的中文字体配置
+
+- lazy(name): 返回延迟导入的模块，第一次访问其属性时才真正导入，并记录耗时
+- configure(rc=..., cjk=...): 立即配置后端、字体与rcParams
+- pyplot(rc=..., cjk=...): 延迟导入的matplotlib.pyplot，真正导入时依次：
+  必要时切换到Agg后端 → 应用缓存的中文字体配置 → 应用脚本自己的rcParams。
+  脚本因此可以先处理数据，只在开始画图时才付出导入matplotlib的代价
+- 中文字体：按CJK_FONTS的顺序找第一个已安装的字体，结果连同matplotlib版本和字体列表缓存的
+  修改时间写入 ~/.cache/phylab/fonts.json，之后启动直接读取；
+  找不到任何中文字体时退回默认字体，不再对每段文字报"findfont: Font family 'SimHei' not found"
+- 无界面模式：环境变量 PHYLAB_HEADLESS=1（phylab.runner会设置），
+  或Linux下没有 DISPLAY/WAYLAND_DISPLAY 时强制使用Agg后端
+
+命令行：报告脚本各模块的导入耗时，以及第一次用到pyplot之前花在导入上的时间
+python -m phylab.runtime "lab08-11.20 用双臂电桥测低电阻/plot.py"
+"""
+import importlib
+import os
+import sys
+import time
+import types
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+# 按优先级排列的中文字体（Windows、macOS、Linux常见字体）
+CJK_FONTS = ("SimHei", "Microsoft YaHei", "PingFang SC", "Heiti SC", "Arial Unicode MS",
+             "Noto Sans CJK SC", "Source Han Sans SC", "WenQuanYi Zen Hei", "WenQuanYi Micro Hei")
+CACHE_FILE = Path(os.environ.get("PHYLAB_CACHE", Path.home() / ".cache" / "phylab")) / "fonts.json"
+IMPORT_MARK = "phylab.runtime: first use of matplotlib.pyplot"
+STARTUP_TARGET_MS = 150.0
+
+IMPORT_TIMES: Dict[str, float] = {}  # 经lazy导入的模块及其导入耗时（秒）
+
+
+# ---------------------- 延迟导入 ----------------------
+class LazyModule(types.ModuleType):
+    """
+    第一次访问属性时才导入的模块代理
+
+    before_load: 导入前执行一次的无参回调
+    on_load: 导入完成后按顺序执行一次的回调，参数为真正的模块
+    """
+
+    def __init__(self, name: str, on_load: Sequence[Callable[[types.ModuleType], None]] = (),
+                 before_load: Sequence[Callable[[], None]] = ()):
+        super().__init__(name)
+        self.__dict__["_lazy_before_load"] = list(before_load)
+        self.__dict__["_lazy_on_load"] = list(on_load)
+        self.__dict__["_lazy_module"] = None
+
+    def _lazy_load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            for callback in self.__dict__["_lazy_before_load"]:
+                callback()
+            start = time.perf_counter()
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_lazy_module"] = module
+            for callback in self.__dict__["_lazy_on_load"]:
+                callback(module)
+            IMPORT_TIMES[self.__name__] = time.perf_counter() - start
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._lazy_load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._lazy_load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._lazy_load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy(name: str) -> types.ModuleType:
+    """延迟导入模块；已经导入过的直接返回真正的模块"""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+# ---------------------- 后端与字体 ----------------------
+def is_headless() -> bool:
+    if os.environ.get("PHYLAB_HEADLESS") == "1":
+        return True
+    return sys.platform.startswith("linux") and not (
+        os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def use_headless_backend() -> None:
+    """无界面时强制Agg后端；须在导入pyplot之前调用才能避免加载GUI后端"""
+    if not is_headless():
+        return
+    os.environ["MPLBACKEND"] = "Agg"
+    if "matplotlib" in sys.modules:
+        sys.modules["matplotlib"].use("Agg", force=True)
+    import warnings
+    warnings.filterwarnings("ignore", message=".*non-interactive.*")
+
+
+def _font_cache_key() -> dict:
+    import matplotlib
+
+    lists = sorted(Path(matplotlib.get_cachedir()).glob("fontlist-*.json"))
+    return {"matplotlib": matplotlib.__version__,
+            "fontlist_mtime": [p.stat().st_mtime_ns for p in lists]}
+
+
+def resolve_cjk_font(candidates: Sequence[str] = CJK_FONTS,
+                     use_cache: bool = True) -> Optional[str]:
+    """
+    返回第一个已安装的中文字体名，都没有时返回None
+
+    结果按 (matplotlib版本, 字体列表缓存修改时间) 缓存，安装新字体后会自动重新查找
+    """
+    import json
+
+    key = _font_cache_key()
+    key["candidates"] = list(candidates)
+    if use_cache:
+        try:
+            cached = json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+            if cached.get("key") == key:
+                return cached.get("family")
+        except (OSError, ValueError):
+            pass
+
+    from matplotlib import font_manager
+
+    installed = {f.name for f in font_manager.fontManager.ttflist}
+    family = next((name for name in candidates if name in installed), None)
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = CACHE_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"key": key, "family": family}, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, CACHE_FILE)
+    except OSError:
+        pass
+    return family
+
+
+def configure_fonts(cjk: bool = True) -> Optional[str]:
+    """
+    设置中文字体并关闭unicode负号（中文字体多数没有该字形），返回使用的字体名
+
+    找不到中文字体时保留默认字体，并屏蔽缺字形告警（中文会显示为方框，但不影响出图）
+    """
+    if not cjk:
+        return None
+    import matplotlib
+
+    rc = matplotlib.rcParams
+    rc["axes.unicode_minus"] = False
+    family = resolve_cjk_font()
+    if family is None:
+        import warnings
+        warnings.filterwarnings("ignore", message=".*Glyph.*missing.*")
+        return None
+    rc["font.family"] = ["sans-serif"]
+    rc["font.sans-serif"] = [family] + [f for f in rc["font.sans-serif"] if f != family]
+    return family
+
+
+def configure(rc: Optional[dict] = None, cjk: bool = True) -> None:
+    """
+    立即完成后端、字体与rcParams配置（只导入matplotlib，不导入pyplot）
+
+    用于不经过pyplot画图的脚本（如使用phylab.figpool的lab01）
+    """
+    use_headless_backend()
+    import matplotlib
+
+    configure_fonts(cjk)
+    matplotlib.rcParams.update(rc or {})
+
+
+def pyplot(rc: Optional[dict] = None, cjk: bool = True) -> types.ModuleType:
+    """
+    返回延迟导入的matplotlib.pyplot
+
+    参数:
+    rc: 真正导入后要设置的rcParams（代替脚本开头的 plt.rcParams[...] = ...）
+    cjk: 是否配置中文字体
+    """
+    if "matplotlib.pyplot" in sys.modules:
+        configure(rc, cjk)
+        return sys.modules["matplotlib.pyplot"]
+
+    def mark():
+        if os.environ.get("PHYLAB_IMPORT_MARK") == "1":
+            print(IMPORT_MARK, file=sys.stderr, flush=True)
+
+    def on_load(plt):
+        configure(rc, cjk)
+
+    use_headless_backend()
+    return LazyModule("matplotlib.pyplot", on_load=[on_load], before_load=[mark])
+
+
+# ---------------------- 导入耗时报告 ----------------------
+# 报告相关的标准库在函数内导入，不拖慢脚本启动
+_IMPORTTIME = r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)"
+
+
+def profile_script(script: Path, headless: bool = True) -> dict:
+    """
+    用 python -X importtime 运行脚本，汇总顶层导入的耗时
+
+    返回:
+    {"modules": [(模块, 累计耗时ms)], "before_plot_ms": 首次使用pyplot前的导入耗时,
+     "total_import_ms": 全部导入耗时, "wall_ms": 总运行时间, "returncode": 返回码}
+    """
+    import re
+    import subprocess
+
+    script = Path(script).resolve()
+    env = dict(os.environ, PHYLAB_IMPORT_MARK="1")
+    if headless:
+        env["PHYLAB_HEADLESS"] = "1"
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", script.name], cwd=script.parent,
+                          env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                          text=True, encoding="utf-8", errors="replace")
+    wall = (time.perf_counter() - start) * 1000
+
+    modules: List[tuple] = []
+    before_plot = None
+    total = 0.0
+    for line in proc.stderr.splitlines():
+        if line.startswith(IMPORT_MARK) and before_plot is None:
+            before_plot = total
+            continue
+        m = re.match(_IMPORTTIME, line)
+        if m and len(m.group(3)) == 1:  # 缩进1格为顶层导入
+            cumulative = int(m.group(2)) / 1000
+            modules.append((m.group(4), cumulative))
+            total += cumulative
+    return {"modules": modules, "before_plot_ms": total if before_plot is None else before_plot,
+            "total_import_ms": total, "wall_ms": wall, "returncode": proc.returncode}
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="报告实验脚本的模块导入耗时")
+    parser.add_argument("scripts", nargs="+", help="脚本路径")
+    parser.add_argument("--top", type=int, default=10, help="列出耗时最多的前N个顶层导入")
+    args = parser.parse_args(argv)
+
+    status = 0
+    for script in args.scripts:
+        report = profile_script(Path(script))
+        print(f"== {script}")
+        for name, ms in sorted(report["modules"], key=lambda m: -m[1])[:args.top]:
+            print(f"  {ms:9.1f} ms  {name}")
+        ok = report["before_plot_ms"] <= STARTUP_TARGET_MS
+        print(f"  开始处理数据前的导入耗时：{report['before_plot_ms']:.1f} ms"
+              f"（目标 {STARTUP_TARGET_MS:.0f} ms，{'达标' if ok else '未达标'}）")
+        print(f"  全部导入 {report['total_import_ms']:.1f} ms，总运行 {report['wall_ms']:.0f} ms，"
+              f"返回码 {report['returncode']}")
+        status |= report["returncode"] != 0
+    return int(status)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
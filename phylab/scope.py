@@ -0,0 +1,342 @@
+"""
+示波器双通道波形（lab09）的频率、频率比与李萨如图形相位分析
+
+- 采集文件按内存映射打开：二进制（交错存放的各通道采样）与.npy直接映射，
+  CSV先流式转换为.npy（缓存在文件所在目录的 .phylab_cache/scope/ 下）再映射
+- 频率分两遍流式计算，每次只读入一块，内存占用与采样点数无关：
+  1. 各块加Hann窗做FFT，功率谱逐块累加，在峰值附近做对数抛物线（高斯）插值，得到亚bin精度的粗估计
+  2. 以粗估计频率对每块做单频DFT，由各块相位随时间的线性漂移求出残余频差（相位法精修）
+- 两通道频率之比取最接近的小整数比 f_y:f_x = p:q，给出李萨如图形的交点数
+  N_x = 2p（与水平线）、N_y = 2q（与竖直线），相位 q·φ_y − p·φ_x 与图形翻动频率 |q·f_y − p·f_x|
+- comparison_row / lissajous_row 直接给出实验报告 table_1、table_2 中的各列
+
+用法（在仓库根目录下执行）:
+    python -m phylab.scope lissajous 1-1.bin 1-2.bin --rate 1e6       # 李萨如图形测频率（table_2）
+    python -m phylab.scope compare y1.csv y2.csv --waves 1 2          # 比较法（table_1）
+    python -m phylab.scope lissajous cap.bin --rate 1e6 --dtype int16 --channels 2
+"""
+import argparse
+import io
+import sys
+from dataclasses import dataclass
+from fractions import Fraction
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from phylab.trace import traced
+
+PathLike = Union[str, Path]
+CHUNK = 1 << 18                 # 每块采样点数（FFT长度）
+CSV_LINES = 1 << 16             # CSV转换时每次解析的行数
+CACHE_DIRNAME = ".phylab_cache"
+MAX_DENOMINATOR = 6             # 频率比的最大分母（李萨如图形一般不超过3:2、3:1）
+
+
+# ---------------------- 采集文件 ----------------------
+@dataclass
+class Capture:
+    """
+    一次多通道采集
+
+    data: (采样点数, 通道数) 数组，通常为只读的np.memmap
+    sample_rate: 采样率（Hz）
+    path: 原始文件
+    columns: 各通道在data中的列号（CSV含时间列时跳过该列），None表示按顺序
+    """
+    data: np.ndarray
+    sample_rate: float
+    path: Optional[Path] = None
+    columns: Optional[List[int]] = None
+
+    @property
+    def n_samples(self) -> int:
+        return self.data.shape[0]
+
+    @property
+    def duration(self) -> float:
+        return self.n_samples / self.sample_rate
+
+
+def _is_numeric(line: str) -> bool:
+    s = line.lstrip()
+    return bool(s) and (s[0].isdigit() or s[0] in "+-.")
+
+
+def _csv_to_npy(path: Path, target: Path) -> None:
+    """两遍流式转换：先数行数分配.npy内存映射，再按块解析写入"""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        first = next((line for line in f if _is_numeric(line)), None)
+        if first is None:
+            raise ValueError(f"{path}中没有数值行")
+        n_rows = 1 + sum(1 for line in f if _is_numeric(line))
+    delimiter = "," if "," in first else None
+    n_cols = len(first.split(delimiter))
+
+    tmp = target.with_suffix(".tmp.npy")
+    out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float64, shape=(n_rows, n_cols))
+    row = 0
+    with open(path, encoding="utf-8", errors="replace") as f:
+        lines = (line for line in f if _is_numeric(line))
+        while True:
+            block = [line for _, line in zip(range(CSV_LINES), lines)]
+            if not block:
+                break
+            values = np.loadtxt(io.StringIO("".join(block)), delimiter=delimiter, ndmin=2)
+            out[row:row + values.shape[0]] = values
+            row += values.shape[0]
+    out.flush()
+    del out
+    tmp.replace(target)
+
+
+def open_capture(path: PathLike, sample_rate: Optional[float] = None, channels: int = 2,
+                 dtype: str = "int16", offset: int = 0, time_column: Optional[int] = None,
+                 cache_dir: Optional[PathLike] = None) -> Capture:
+    """
+    以内存映射方式打开采集文件
+
+    参数:
+    path: .npy（(点数, 通道数)）、.csv/.txt（每行一个时刻）或其他二进制文件（各通道交错存放）
+    sample_rate: 采样率（Hz）；None时由time_column列的采样间隔求出
+    channels, dtype, offset: 二进制文件的通道数、采样类型与文件头字节数
+    time_column: CSV中的时间列序号（秒），该列不计入通道
+    cache_dir: CSV转换结果的缓存目录，None时为文件所在目录下的 .phylab_cache/scope/
+
+    返回:
+    Capture
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".npy":
+        data = np.load(path, mmap_mode="r")
+    elif suffix in (".csv", ".txt"):
+        root = Path(cache_dir) if cache_dir else path.parent / CACHE_DIRNAME / "scope"
+        st = path.stat()
+        target = root / f"{path.stem}-{st.st_size:x}-{st.st_mtime_ns:x}.npy"
+        if not target.exists():
+            root.mkdir(parents=True, exist_ok=True)
+            _csv_to_npy(path, target)
+        data = np.load(target, mmap_mode="r")
+    else:
+        itemsize = np.dtype(dtype).itemsize * channels
+        n = (path.stat().st_size - offset) // itemsize
+        data = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(n, channels))
+    data = data.reshape(data.shape[0], -1)
+
+    columns = None
+    if time_column is not None:
+        if sample_rate is None:
+            t = np.asarray(data[:min(data.shape[0], CHUNK), time_column], dtype=float)
+            sample_rate = 1.0 / np.median(np.diff(t))
+        columns = [i for i in range(data.shape[1]) if i != time_column]  # 不做花式索引，避免复制整个文件
+    if not sample_rate or sample_rate <= 0:
+        raise ValueError(f"{path}：需要给出采样率sample_rate或时间列time_column")
+    return Capture(data=data, sample_rate=float(sample_rate), path=path, columns=columns)
+
+
+# ---------------------- 频率估计 ----------------------
+@dataclass
+class Tone:
+    """
+    某一通道的主频分量
+
+    frequency: 频率（Hz，相位法精修后）
+    coarse: 功率谱插值得到的粗估计（Hz）
+    amplitude: 幅值（与采样同单位）
+    phase: t=0 时刻的相位（rad，余弦基准）
+    resolution: FFT的bin宽度（Hz）
+    """
+    frequency: float
+    coarse: float
+    amplitude: float
+    phase: float
+    resolution: float
+
+    @property
+    def period(self) -> float:
+        return 1.0 / self.frequency
+
+
+def _blocks(n: int, size: int) -> Iterator[int]:
+    """完整块的起点；采样点数不足一块时只有一块"""
+    return iter(range(0, max(n - size, 0) + 1, size))
+
+
+def _read(capture: Capture, start: int, size: int, channels: Sequence[int]) -> np.ndarray:
+    cols = [capture.columns[c] for c in channels] if capture.columns else list(channels)
+    block = np.asarray(capture.data[start:start + size], dtype=float)[:, cols]
+    return block - block.mean(axis=0)
+
+
+@traced("fit")
+def tones(capture: Capture, channels: Sequence[int] = (0, 1), chunk: int = CHUNK,
+          f_min: float = 0.0) -> List[Tone]:
+    """
+    流式估计各通道的主频
+
+    参数:
+    capture: 采集（见open_capture）
+    channels: 通道序号
+    chunk: 每块采样点数，决定粗估计的bin宽度 sample_rate/chunk
+    f_min: 只在不低于该频率的范围内找峰（排除工频或直流漂移）
+
+    返回:
+    与channels对应的Tone列表
+    """
+    n = capture.n_samples
+    size = min(chunk, n)
+    fs = capture.sample_rate
+    window = np.hanning(size)
+    starts = list(_blocks(n, size))
+
+    power = np.zeros((size // 2 + 1, len(channels)))
+    for s in starts:
+        spec = np.fft.rfft(_read(capture, s, size, channels) * window[:, None], axis=0)
+        power += spec.real ** 2 + spec.imag ** 2
+
+    # 对数抛物线插值：Hann窗主瓣近似高斯，峰值偏移 δ = (ln P₋ − ln P₊)/(2(ln P₋ − 2ln P₀ + ln P₊))
+    lo = max(1, int(np.ceil(f_min * size / fs)))
+    k = lo + np.argmax(power[lo:-1], axis=0)
+    cols = np.arange(len(channels))
+    lp = np.log(np.maximum(power[[k - 1, k, k + 1], cols], 1e-300))
+    denom = lp[0] - 2 * lp[1] + lp[2]
+    delta = np.where(denom < 0, 0.5 * (lp[0] - lp[2]) / np.where(denom < 0, denom, 1.0), 0.0)
+    coarse = (k + delta) * fs / size
+
+    # 相位法精修：各块在粗估计频率处的相位 θᵢ = φ + 2π·Δf·tᵢ，对tᵢ线性拟合求Δf
+    basis = np.exp(-2j * np.pi * np.outer(np.arange(size) / fs, coarse)) * window[:, None]
+    z = np.empty((len(starts), len(channels)), dtype=complex)
+    for i, s in enumerate(starts):
+        z[i] = np.einsum("nc,nc->c", _read(capture, s, size, channels), basis)
+    t = np.asarray(starts, dtype=float) / fs
+    theta = np.unwrap(np.angle(z) - 2 * np.pi * coarse * t[:, None], axis=0)
+    if len(starts) > 1:
+        slope, phase = np.polyfit(t, theta, 1)
+    else:
+        slope, phase = np.zeros(len(channels)), theta[0]
+    freq = coarse + slope / (2 * np.pi)
+    phase = phase - slope * size / fs / 2  # 频差使块内相位平均值相对块起点偏移 π·Δf·T
+    amplitude = 2 * np.abs(z).mean(axis=0) / window.sum()
+    return [Tone(frequency=float(f), coarse=float(c), amplitude=float(a),
+                 phase=float(np.angle(np.exp(1j * p))), resolution=fs / size)
+            for f, c, a, p in zip(freq, coarse, amplitude, phase)]
+
+
+# ---------------------- 李萨如图形与报告表格 ----------------------
+@dataclass
+class Lissajous:
+    """
+    李萨如图形（x通道接扫描/参考信号f_x，y通道接被测信号f_y）
+
+    p, q: 频率比 f_y:f_x ≈ p:q（互质）
+    N_x, N_y: 图形与水平线、竖直线的最多交点数（2p、2q），f_y = f_x·N_x/N_y
+    phase: 相位 q·φ_y − p·φ_x（rad，0~2π），频率比严格成立时与时间起点无关
+    drift: 图形翻动频率 |q·f_y − p·f_x|（Hz）
+    """
+    f_x: float
+    f_y: float
+    p: int
+    q: int
+    phase: float
+    drift: float
+
+    @property
+    def N_x(self) -> int:
+        return 2 * self.p
+
+    @property
+    def N_y(self) -> int:
+        return 2 * self.q
+
+    @property
+    def ratio(self) -> str:
+        return f"{self.p}:{self.q}"
+
+    @property
+    def f_y_from_ratio(self) -> float:
+        """按交点数由f_x推算的f_y（即报告中的"计算f_y"）"""
+        return self.f_x * self.N_x / self.N_y
+
+
+def lissajous(tone_x: Tone, tone_y: Tone, max_denominator: int = MAX_DENOMINATOR) -> Lissajous:
+    """由两通道的主频与相位求李萨如图形参数"""
+    r = Fraction(tone_y.frequency / tone_x.frequency).limit_denominator(max_denominator)
+    p, q = r.numerator, r.denominator
+    phase = float(np.mod(q * tone_y.phase - p * tone_x.phase, 2 * np.pi))
+    return Lissajous(f_x=tone_x.frequency, f_y=tone_y.frequency, p=p, q=q, phase=phase,
+                     drift=abs(q * tone_y.frequency - p * tone_x.frequency))
+
+
+def comparison_row(tone_y: Tone, waves: int) -> Tuple[int, float, float]:
+    """比较法（table_1）的一行：(波形个数n, 信号频率f_y, 扫描频率f_x = f_y/n)"""
+    return waves, tone_y.frequency, tone_y.frequency / waves
+
+
+def lissajous_row(fig: Lissajous) -> Tuple[str, int, int, float, float]:
+    """李萨如图形法（table_2）的一列：(频率比, N_y, N_x, 读出f_x, 计算f_y)"""
+    return fig.ratio, fig.N_y, fig.N_x, fig.f_x, fig.f_y_from_ratio
+
+
+def relative_error(measured, nominal: float) -> float:
+    """多次测量平均值相对标称值的误差"""
+    return abs(float(np.mean(measured)) - nominal) / nominal
+
+
+# ---------------------- 命令行 ----------------------
+def _typst_cells(values, fmt: str = "") -> str:
+    return ",".join(f"[{v:{fmt}}]" for v in values)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="示波器采集文件的频率与李萨如图形分析")
+    parser.add_argument("mode", choices=("lissajous", "compare"), help="lissajous: table_2；compare: table_1")
+    parser.add_argument("files", nargs="+", help="采集文件（.bin/.npy/.csv）")
+    parser.add_argument("--rate", type=float, default=None, help="采样率（Hz）")
+    parser.add_argument("--dtype", default="int16", help="二进制文件的采样类型")
+    parser.add_argument("--channels", type=int, default=2, help="二进制文件的通道数")
+    parser.add_argument("--time-column", type=int, default=None, help="CSV的时间列序号")
+    parser.add_argument("-x", type=int, default=0, help="x通道（参考信号）序号")
+    parser.add_argument("-y", type=int, default=1, help="y通道（被测信号）序号")
+    parser.add_argument("--waves", type=int, nargs="*", default=None, help="compare模式下各文件的波形个数n")
+    parser.add_argument("--nominal", type=float, default=None, help="标称频率（Hz），给出时计算相对误差")
+    args = parser.parse_args(argv)
+
+    rows = []
+    for i, name in enumerate(args.files):
+        cap = open_capture(name, args.rate, args.channels, args.dtype, time_column=args.time_column)
+        if args.mode == "compare":
+            (tone,) = tones(cap, (args.y,))
+            rows.append(comparison_row(tone, args.waves[i] if args.waves else i + 1))
+            print(f"{name}: f_y = {tone.frequency:.4f} Hz（粗估计 {tone.coarse:.4f} Hz，"
+                  f"bin宽 {tone.resolution:.3g} Hz），{cap.n_samples}点")
+        else:
+            tx, ty = tones(cap, (args.x, args.y))
+            fig = lissajous(tx, ty)
+            rows.append(lissajous_row(fig))
+            print(f"{name}: f_x = {fig.f_x:.4f} Hz，f_y = {fig.f_y:.4f} Hz，f_y:f_x = {fig.ratio}，"
+                  f"N_y = {fig.N_y}，N_x = {fig.N_x}，相位 {np.degrees(fig.phase):.1f}°，"
+                  f"翻动 {fig.drift:.3g} Hz")
+
+    print("\ntypst表格单元：")
+    if args.mode == "compare":
+        for n, fy, fx in rows:
+            print(f"      [{n}],[{fy:.1f}],[{fx:.1f}],")
+        measured = [r[2] for r in rows]
+    else:
+        cols = list(zip(*rows))
+        print(f"      [频率比$f_y:f_x$],{_typst_cells(cols[0])},")
+        print(f"      [垂直交点数$N_y$],{_typst_cells(cols[1])},")
+        print(f"      [水平交点数$N_x$],{_typst_cells(cols[2])},")
+        print(f"      [读出$f_x(H z)$],{_typst_cells(cols[3], '.3f')},")
+        print(f"      [计算$f_y(H z)$],{_typst_cells(cols[4], '.3f')}")
+        measured = cols[4]
+    print(f"平均值：{np.mean(measured):.3f} Hz")
+    if args.nominal:
+        print(f"相对误差：{relative_error(measured, args.nominal):.3%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
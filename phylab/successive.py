@@ -0,0 +1,116 @@
+"""
+逐差法：等间距测量序列的批量处理
+
+- 把每组序列的前后两段通过 np.lib.stride_tricks.as_strided 排成 (…, 2, 对数) 的视图，
+  一次相减得到全部 y[i+span] − y[i]，不复制输入（内存映射数组同样适用）
+- 每对相隔的间隔数span（分组大小）与对数任意，默认前后各半：12个读数为 L₇−L₁ … L₁₂−L₆，
+  20个读数为 s₁₁−s₁ … s₂₀−s₁₀；奇数个读数时舍去最后一个
+- 输入可为 (组数, 点数) 乃至更高维的数组，成千上万组学生数据一次调用处理完；NaN视为缺测，不计入该组
+- 返回平均逐差、A类不确定度、单位间隔的变化率（斜率）以及由斜率得到的导出量（不确定度一阶传递）
+
+用法：
+    from phylab.successive import successive_diff
+    r = successive_diff(L, derived={"lambda": lambda s: 2 * s})   # 每行相位差π，相邻读数相隔λ/2
+    print(r.mean, r.u_a, r.derived["lambda"], r.u_derived["lambda"])
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+from phylab.trace import traced
+
+Array = np.ndarray
+Derived = Dict[str, Callable[[Array], Array]]
+
+
+@dataclass
+class SuccessiveDiff:
+    """
+    逐差法结果（除diffs外，形状为输入去掉最后一维）
+
+    diffs: 各对差值 y[i+span] − y[i]，(…, 对数)
+    mean: 平均逐差（相隔span个间隔）
+    u_a: 平均逐差的A类不确定度 s/√n
+    n: 每组有效的差值个数
+    span: 每对相隔的间隔数
+    step: 相邻读数之间自变量的增量（如砝码质量、圈数号的变化）
+    slope, u_slope: 单位自变量的平均变化 mean/(span·step) 及其A类不确定度
+    derived, u_derived: {名称: 由slope得到的导出量}及一阶传递的不确定度
+    """
+    diffs: Array
+    mean: Array
+    u_a: Array
+    n: Array
+    span: int
+    step: float
+    slope: Array
+    u_slope: Array
+    derived: Dict[str, Array]
+    u_derived: Dict[str, Array]
+
+
+def pair_view(y: Array, span: int, pairs: int) -> Array:
+    """
+    不复制数据的逐差视图：view[..., 0, i] = y[..., i]，view[..., 1, i] = y[..., i + span]
+
+    参数:
+    y: 数组，最后一维为测量序列
+    span: 每对相隔的间隔数
+    pairs: 对数，要求 span + pairs ≤ 点数
+    """
+    n = y.shape[-1]
+    if span < 1 or pairs < 1 or span + pairs > n:
+        raise ValueError(f"逐差的间隔与对数不合适：{n}个点，span={span}，pairs={pairs}")
+    s = y.strides[-1]
+    return as_strided(y, shape=y.shape[:-1] + (2, pairs), strides=y.strides[:-1] + (span * s, s),
+                      writeable=False)
+
+
+def _propagate(f: Callable[[Array], Array], x: Array, u: Array):
+    """f(x)及按中心差商传递的不确定度 |f'(x)|·u"""
+    h = 1e-6 * np.maximum(np.abs(x), 1e-300)
+    return f(x), np.abs(f(x + h) - f(x - h)) / (2 * h) * u
+
+
+@traced("fit")
+def successive_diff(y, span: Optional[int] = None, pairs: Optional[int] = None, step: float = 1.0,
+                    derived: Optional[Derived] = None) -> SuccessiveDiff:
+    """
+    逐差法处理一组或多组等间距测量序列
+
+    参数:
+    y: 测量序列，最后一维为读数（按自变量等间距排列）
+    span: 每对相隔的间隔数（分组大小），None时为点数的一半
+    pairs: 参与计算的对数，None时为 min(span, 点数 − span)
+    step: 相邻读数之间自变量的增量，可为负（如牛顿环圈数号递减）
+    derived: {名称: f(slope)}，如波长 λ = 2·slope、转换系数 K = m₀g/slope
+
+    返回:
+    SuccessiveDiff
+    """
+    y = np.asarray(y)
+    if not np.issubdtype(y.dtype, np.floating):
+        y = y.astype(float)
+    n = y.shape[-1]
+    span = n // 2 if span is None else int(span)
+    pairs = min(span, n - span) if pairs is None else int(pairs)
+    view = pair_view(y, span, pairs)
+    diffs = view[..., 1, :] - view[..., 0, :]
+
+    ok = np.isfinite(diffs)
+    count = ok.sum(axis=-1)
+    filled = np.where(ok, diffs, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = filled.sum(axis=-1) / count
+        resid = np.where(ok, diffs - mean[..., None], 0.0)
+        u_a = np.sqrt(np.einsum("...i,...i->...", resid, resid) / (count * (count - 1)))
+    scale = span * step
+    slope, u_slope = mean / scale, u_a / abs(scale)
+
+    values, errors = {}, {}
+    for name, f in (derived or {}).items():
+        values[name], errors[name] = _propagate(f, slope, u_slope)
+    return SuccessiveDiff(diffs=diffs, mean=mean, u_a=u_a, n=count, span=span, step=step,
+                          slope=slope, u_slope=u_slope, derived=values, u_derived=errors)
@@ -0,0 +1,362 @@
+"""
+分阶段计时：嵌套的span（上下文管理器/装饰器）与顺序的stage标记，输出JSON Lines或Chrome trace
+
+- 环境变量 PHYLAB_TRACE=文件路径 时启用（phylab.runner --trace 会设置），未启用时
+  span()返回共享的空上下文、traced装饰的函数只多一次全局变量判断，开销可忽略
+- 每个span结束时写出一条事件：名称、类别（load/fit/render/save/script…）、开始时间与耗时（μs）、
+  进程与线程号，args中记录嵌套深度、父span、最外层span、进程峰值内存（MB）、
+  pyplot中打开的图形数与累计新建的图形数
+- 文件以追加方式写入，每条事件一次write，多个工作进程可写同一文件
+- 格式：扩展名为 .json 时为Chrome trace（JSON数组格式，可直接拖入 chrome://tracing 或
+  Perfetto），否则为每行一条事件的JSON Lines；两种格式的事件内容相同
+- 启用后首次计时时给matplotlib的 Figure.savefig、Figure.tight_layout 与 Agg 的 draw 加上计时
+
+脚本中的用法：
+    from phylab.trace import stage
+    stage("load")      # 之后的代码计入load，直到下一个stage或外层span结束
+    ...
+    stage("fit")
+
+命令行：
+    python -m phylab.trace summary trace.jsonl        # 按类别与名称汇总耗时
+    python -m phylab.trace chrome trace.jsonl -o trace.json
+"""
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+ENV = "PHYLAB_TRACE"
+STAGES = ("load", "fit", "render", "save")
+
+# 时间戳以纪元为零点（μs），不同进程的事件可以对齐
+_EPOCH_OFFSET = time.time() - time.perf_counter()
+
+
+class _Tracer:
+    def __init__(self, path: str, fmt: str):
+        self.path = path
+        self.fmt = fmt
+        self.pid = os.getpid()
+        self.local = threading.local()
+        self.figures_created = 0
+        self.instrumented = False
+        self.atexit = False
+        self._fd: Optional[int] = None
+
+    def stack(self) -> List["_Span"]:
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def write(self, event: dict) -> None:
+        if self._fd is None:
+            if self.fmt == "chrome":
+                try:  # 第一个创建文件的进程写入数组开头；结尾的"]"可省略
+                    fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+                    os.write(fd, b"[\n")
+                    os.close(fd)
+                except FileExistsError:
+                    pass
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        line = json.dumps(event, ensure_ascii=False)
+        os.write(self._fd, (line + (",\n" if self.fmt == "chrome" else "\n")).encode("utf-8"))
+
+
+_TRACER: Optional[_Tracer] = None
+
+
+def enabled() -> bool:
+    return _TRACER is not None
+
+
+def enable(path: Optional[str] = None, fmt: Optional[str] = None) -> bool:
+    """
+    启用计时（默认取环境变量PHYLAB_TRACE），返回是否已启用
+
+    参数:
+    path: 输出文件；None且未设置环境变量时不启用
+    fmt: "jsonl" 或 "chrome"，None时按扩展名判断（.json为chrome）
+    """
+    global _TRACER
+    path = path or os.environ.get(ENV)
+    if not path:
+        return False
+    path = os.path.abspath(path)
+    if _TRACER is not None and _TRACER.path == path and _TRACER.pid == os.getpid():
+        return True
+    fmt = fmt or ("chrome" if path.endswith(".json") else "jsonl")
+    _TRACER = _Tracer(path, fmt)
+    os.environ[ENV] = path  # 子进程继承
+    _TRACER.write({"name": "process_name", "ph": "M", "pid": _TRACER.pid, "tid": 0,
+                   "args": {"name": " ".join(os.path.basename(a) for a in sys.argv[:2]) or "python"}})
+    return True
+
+
+def disable() -> None:
+    global _TRACER
+    _TRACER = None
+
+
+# ---------------------- 资源统计 ----------------------
+def peak_rss_mb() -> Optional[float]:
+    """进程峰值常驻内存（MB），不支持的平台返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def _figures_open() -> Optional[int]:
+    plt = sys.modules.get("matplotlib.pyplot")
+    return len(plt.get_fignums()) if plt is not None else None
+
+
+# ---------------------- span ----------------------
+class _Span:
+    __slots__ = ("name", "cat", "args", "start", "stage")
+
+    def __init__(self, name: str, cat: str, args: dict, stage: bool = False):
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self) -> "_Span":
+        tracer = _TRACER
+        if tracer is not None:
+            if not tracer.instrumented:
+                _instrument_matplotlib(tracer)
+            tracer.stack().append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        end = time.perf_counter()
+        tracer = _TRACER
+        if tracer is None:
+            return
+        stack = tracer.stack()
+        if self not in stack:
+            return
+        # 结束本span时一并结束其中未结束的stage
+        while stack[-1] is not self:
+            stack[-1].__exit__(None, None, None)
+        stack.pop()
+        args = dict(self.args)
+        args.update(depth=len(stack), parent=stack[-1].name if stack else None,
+                    root=stack[0].name if stack else self.name,
+                    peak_rss_mb=peak_rss_mb(), figures_open=_figures_open(),
+                    figures_created=tracer.figures_created)
+        if exc and exc[0] is not None:
+            args["error"] = exc[0].__name__
+        tracer.write({"name": self.name, "cat": self.cat, "ph": "X",
+                      "ts": round((_EPOCH_OFFSET + self.start) * 1e6, 1),
+                      "dur": round((end - self.start) * 1e6, 1),
+                      "pid": tracer.pid, "tid": threading.get_ident(), "args": args})
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+
+_NULL = _NullSpan()
+
+
+def span(name: str, cat: str = "stage", **args):
+    """
+    计时上下文：with span("fit", cat="fit", n=len(x)): ...
+
+    未启用时返回共享的空上下文
+    """
+    if _TRACER is None:
+        return _NULL
+    return _Span(name, cat, args)
+
+
+def traced(cat: str = "stage", name: Optional[str] = None) -> Callable:
+    """函数装饰器：每次调用计为一个span（是否启用在调用时判断）"""
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*a, **kw):
+            if _TRACER is None:
+                return func(*a, **kw)
+            with _Span(label, cat, {}):
+                return func(*a, **kw)
+        return wrapper
+    return decorate
+
+
+def stage(name: str, cat: Optional[str] = None, **args) -> None:
+    """
+    顺序阶段标记：结束当前层上一个stage并开始新的stage，无需缩进代码块
+
+    所在的外层span（如phylab.runner中每个脚本的span）结束时，最后一个stage随之结束；
+    直接运行脚本时在解释器退出时结束
+    """
+    tracer = _TRACER
+    if tracer is None:
+        return
+    stack = tracer.stack()
+    if stack and stack[-1].stage:
+        stack[-1].__exit__(None, None, None)
+    if not stack and not tracer.atexit:
+        import atexit
+        atexit.register(end_stages)
+        tracer.atexit = True
+    _Span(name, cat or (name if name in STAGES else "stage"), args, stage=True).__enter__()
+
+
+def end_stages() -> None:
+    """结束当前线程中所有未结束的stage"""
+    tracer = _TRACER
+    if tracer is None:
+        return
+    stack = tracer.stack()
+    while stack and stack[-1].stage:
+        stack[-1].__exit__(None, None, None)
+
+
+# ---------------------- matplotlib ----------------------
+def _instrument_matplotlib(tracer: _Tracer) -> None:
+    """已导入matplotlib时给保存、布局与绘制加上计时（每个进程一次）"""
+    if "matplotlib.figure" not in sys.modules:
+        return
+    tracer.instrumented = True
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    if getattr(Figure.savefig, "_phylab_traced", False):
+        return
+    for owner, attr, cat in ((Figure, "savefig", "save"), (Figure, "tight_layout", "render"),
+                             (FigureCanvasAgg, "draw", "render")):
+        wrapped = traced(cat, name=f"{owner.__name__}.{attr}")(getattr(owner, attr))
+        wrapped._phylab_traced = True
+        setattr(owner, attr, wrapped)
+
+    init = Figure.__init__
+
+    @functools.wraps(init)
+    def counting_init(self, *a, **kw):
+        if _TRACER is not None:
+            _TRACER.figures_created += 1
+        init(self, *a, **kw)
+    Figure.__init__ = counting_init
+
+
+# ---------------------- 读取与汇总 ----------------------
+def read_events(path: str) -> List[dict]:
+    """读取两种格式的输出文件，只返回计时事件（ph为"X"）"""
+    events = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip().rstrip(",")
+            if line in ("", "[", "]"):
+                continue
+            event = json.loads(line)
+            if event.get("ph") == "X":
+                events.append(event)
+    return events
+
+
+def summarize(events: List[dict]) -> Dict[str, Dict[str, dict]]:
+    """
+    汇总耗时
+
+    返回:
+    {"by_name": {"类别/名称": {"count", "total_ms", "max_ms"}},
+     "by_root": {最外层span: {类别: 自身耗时ms}}}（自身耗时不含子span）
+    """
+    by_name: Dict[str, dict] = {}
+    by_root: Dict[str, Dict[str, float]] = {}
+    children: Dict[tuple, float] = {}
+    for e in events:
+        a = e.get("args", {})
+        if a.get("parent") is not None:
+            key = (e["pid"], e["tid"], a["root"], a["parent"], a["depth"] - 1)
+            children[key] = children.get(key, 0.0) + e["dur"]
+    for e in events:
+        a = e.get("args", {})
+        ms = e["dur"] / 1000
+        s = by_name.setdefault(f"{e['cat']}/{e['name']}", {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        s["count"] += 1
+        s["total_ms"] += ms
+        s["max_ms"] = max(s["max_ms"], ms)
+        own = ms - children.get((e["pid"], e["tid"], a.get("root"), e["name"], a.get("depth")), 0.0) / 1000
+        root = by_root.setdefault(a.get("root", e["name"]), {})
+        root[e["cat"]] = root.get(e["cat"], 0.0) + max(own, 0.0)
+    return {"by_name": by_name, "by_root": by_root}
+
+
+def to_chrome(src: str, dst: str) -> int:
+    """JSON Lines转为Chrome trace（含进程名元数据事件），返回事件数"""
+    with open(src, encoding="utf-8") as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    with open(dst, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+    return len(events)
+
+
+def _pad(text: str, width: int) -> str:
+    """按终端显示宽度（中文占两列）截断并补齐"""
+    import unicodedata
+
+    cells = [2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text]
+    while sum(cells) > width:
+        text, cells = text[1:], cells[1:]
+    return text + " " * (width - sum(cells))
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="分阶段计时结果的汇总与格式转换")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("summary", help="按类别与名称汇总耗时")
+    p.add_argument("trace")
+    p.add_argument("--top", type=int, default=20)
+    p = sub.add_parser("chrome", help="JSON Lines转为Chrome trace")
+    p.add_argument("trace")
+    p.add_argument("-o", "--output", required=True)
+    args = parser.parse_args(argv)
+
+    if args.command == "chrome":
+        print(f"写出{to_chrome(args.trace, args.output)}条事件：{args.output}")
+        return 0
+    events = read_events(args.trace)
+    result = summarize(events)
+    print(f"{_pad('类别/名称', 60)} {'次数':>6s} {'合计ms':>10s} {'最长ms':>10s}")
+    rows = sorted(result["by_name"].items(), key=lambda kv: -kv[1]["total_ms"])
+    for key, s in rows[:args.top]:
+        print(f"{_pad(key, 60)} {s['count']:6d} {s['total_ms']:10.1f} {s['max_ms']:10.1f}")
+    print("\n各脚本按类别的自身耗时（ms）：")
+    cats = sorted({c for r in result["by_root"].values() for c in r})
+    print(_pad("", 60) + " " + " ".join(f"{c:>9s}" for c in cats))
+    for root, r in sorted(result["by_root"].items()):
+        print(_pad(root, 60) + " " + " ".join(f"{r.get(c, 0.0):9.1f}" for c in cats))
+    peaks = [e["args"].get("peak_rss_mb") for e in events if e["args"].get("peak_rss_mb")]
+    if peaks:
+        print(f"\n峰值内存：{max(peaks):.1f} MB")
+    return 0
+
+
+if os.environ.get(ENV):
+    enable()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,378 @@
+"""
+实验报告 (labN.typ) 中 table(...) 数据表的解析与持久化索引
+
+- 解析：按括号/方括号配对找出每个 #figure(table(...)) 块，按 columns 的个数把单元格分行，
+  表格的键取标签（如 <table_3>）或标题（caption），两者都没有时为 "#序号"
+- 数值化：去掉 $...$ 公式标记；"s_1 = 0.765" 取等号后的值；"14,00" 视为 14.00；
+  "2.2%" 记为 0.022；"335degree 49acute" 换算为十进制角度；空单元格、"/"等文本记为NaN
+- 表格方向：每一行第一格都是文字且其余单元格有数值时视为"按行排列"（如lab11：每行一个物理量，
+  数据分几段折行，同名行依次拼接，折行补齐用的空单元格舍去）；否则第一行为表头、按列排列
+- 索引：每个typ文件对应 .phylab_cache/typst/ 下的一个meta文件和若干 .npz，
+  记录文件的修改时间、大小和内容哈希；只有内容确实变化的文件才会重新解析。
+  脚本按 (实验, 表格) 取数时只检查该实验的一个typ文件，与实验总数无关
+
+用法:
+t = load_table("lab11", "table_3")
+x, b = t["轴向距离$x(c m)$"], t["磁感应强度$B(mu T)$"]
+
+命令行：列出全部数据表（必要时更新索引）
+python -m phylab.typst_tables [lab11 ...]
+"""
+import json
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from phylab.trace import traced
+from phylab.xlsx_cache import CACHE_DIRNAME, atomic_write, file_digest, write_meta
+
+PathLike = Union[str, Path]
+
+ROOT = Path(__file__).resolve().parents[1]
+INDEX_DIRNAME = "typst"
+TYPST_GLOB = "lab*/lab*.typ"        # 只收录实验报告，不含预习报告 labNPreview.typ
+FORMAT_VERSION = 1                  # 解析规则变化时加一，旧索引随之失效
+
+
+@dataclass
+class Table:
+    """
+    一张数据表
+
+    lab: 实验名（typ文件名，如"lab11"）
+    key: 表格的键（标签、标题或"#序号"）
+    label: 标签（不含尖括号），没有时为None
+    caption: 标题文本，没有时为None
+    orient: "columns"（首行为表头）或"rows"（每行第一格为名称）
+    columns: {名称: float数组}，按表中顺序；非数值单元格为NaN
+    """
+    lab: str
+    key: str
+    label: Optional[str] = None
+    caption: Optional[str] = None
+    orient: str = "columns"
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __getitem__(self, name: Union[str, int]) -> np.ndarray:
+        """按名称或位置取列"""
+        if isinstance(name, int):
+            return list(self.columns.values())[name]
+        try:
+            return self.columns[name]
+        except KeyError:
+            raise KeyError(f"{self.lab}的表格'{self.key}'没有列'{name}'，可选：{list(self.columns)}")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.columns)
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+
+# ---------------------- 源码扫描 ----------------------
+_PAIRS = {"(": ")", "[": "]"}
+
+
+def _match(src: str, start: int) -> int:
+    """src[start]为左括号，返回配对右括号之后的位置（跳过字符串、方括号内容与转义字符）"""
+    stack = [_PAIRS[src[start]]]
+    i = start + 1
+    while stack:
+        if i >= len(src):
+            raise ValueError(f"第{src.count(chr(10), 0, start) + 1}行的括号没有闭合")
+        c = src[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == '"' and stack[-1] == ")":
+            i = src.index('"', i + 1)
+        elif c in _PAIRS:
+            stack.append(_PAIRS[c])
+        elif c == stack[-1]:
+            stack.pop()
+        i += 1
+    return i
+
+
+def _split_args(body: str) -> Tuple[Dict[str, str], List[str]]:
+    """把函数调用的参数拆为 (具名参数, 位置参数)，参数内的括号与方括号整体保留"""
+    named: Dict[str, str] = {}
+    positional: List[str] = []
+    i, n = 0, len(body)
+    while i < n:
+        while i < n and body[i] in " \t\r\n,":
+            i += 1
+        if i >= n:
+            break
+        m = re.match(r"([A-Za-z_][\w-]*)\s*:", body[i:])
+        name = None
+        if m and not body[i:].startswith("["):
+            name = m.group(1)
+            i += m.end()
+            while i < n and body[i] in " \t\r\n":
+                i += 1
+        j = i
+        while j < n and body[j] != ",":
+            j = _match(body, j) if body[j] in _PAIRS else j + 1
+        value = body[i:j].strip()
+        if name:
+            named[name] = value
+        else:
+            positional.append(value)
+        i = j + 1
+    return named, positional
+
+
+def _column_count(spec: str) -> int:
+    spec = spec.strip()
+    if spec.isdigit():
+        return int(spec)
+    if spec.startswith("("):
+        return len([s for s in spec[1:-1].split(",") if s.strip()])
+    return 1  # 如 columns: auto
+
+
+def _iter_tables(src: str) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    """依次给出 (table参数, 标签, 标题)"""
+    for m in re.finditer(r"(?<![\w.])table\(", src):
+        open_at = m.end() - 1
+        end = _match(src, open_at)
+        label = caption = None
+        # 所在的 #figure(...) 提供标题与标签
+        fig = src.rfind("#figure(", 0, m.start())
+        if fig >= 0:
+            fig_end = _match(src, fig + len("#figure"))
+            if fig_end >= end:
+                named, _ = _split_args(src[fig + len("#figure("):fig_end - 1])
+                if "caption" in named:
+                    caption = _cell_text(named["caption"]) or None
+                lm = re.match(r"\s*<([\w:.-]+)>", src[fig_end:])
+                label = lm.group(1) if lm else None
+        yield src[open_at + 1:end - 1], label, caption
+
+
+# ---------------------- 单元格 ----------------------
+_ANGLE = re.compile(r"(-?)(\d+(?:\.\d+)?)degree(?:(\d+(?:\.\d+)?)acute(?!\.))?"
+                    r"(?:(\d+(?:\.\d+)?)acute\.double)?")
+
+
+def _cell_text(cell: str) -> str:
+    """[内容] → 内容"""
+    cell = cell.strip()
+    if cell.startswith("[") and cell.endswith("]"):
+        cell = cell[1:-1]
+    return cell.strip()
+
+
+def parse_number(text: str) -> float:
+    """
+    把单元格文本转为数值，无法识别时返回NaN
+
+    例: "1.348" → 1.348，"$s_11 - s_1 = 3.655$" → 3.655，"14,00" → 14.0，
+    "2.2%" → 0.022，"$335degree 49acute$" → 335.8167（度）
+    """
+    s = text.replace("$", "").replace("−", "-").strip()
+    if "=" in s:
+        s = s.rsplit("=", 1)[1].strip()
+    percent = s.endswith("%")
+    if percent:
+        s = s[:-1].strip()
+    if re.fullmatch(r"-?\d+,\d+", s):
+        s = s.replace(",", ".")
+    try:
+        value = float(s)
+    except ValueError:
+        m = _ANGLE.fullmatch(re.sub(r"\s+", "", s))
+        if not m:
+            return np.nan
+        deg, minute, second = (float(g) if g else 0.0 for g in m.groups()[1:])
+        return (-1.0 if m.group(1) else 1.0) * (deg + minute / 60 + second / 3600)
+    return value / 100 if percent else value
+
+
+# ---------------------- 表格 ----------------------
+def _unique(name: str, taken) -> str:
+    out, k = name, 2
+    while out in taken:
+        out, k = f"{name}#{k}", k + 1
+    return out
+
+
+def parse_table(args: str, lab: str = "", key: str = "",
+                label: Optional[str] = None, caption: Optional[str] = None) -> Table:
+    """解析 table(...) 的参数部分（不含外层括号）"""
+    named, cells = _split_args(args)
+    cells = [_cell_text(c) for c in cells if c.startswith("[")]
+    ncol = _column_count(named.get("columns", "1"))
+    rows = [cells[i:i + ncol] for i in range(0, len(cells), ncol)]
+    rows = [r + [""] * (ncol - len(r)) for r in rows if any(r)]
+    table = Table(lab=lab, key=key, label=label, caption=caption)
+    if not rows:
+        return table
+
+    numbers = [[parse_number(c) for c in r] for r in rows]
+    text_first = all(r[0] and np.isnan(v[0]) for r, v in zip(rows, numbers))
+    if len(rows) > 1 and text_first and not np.isnan([v[1:] for v in numbers]).all():
+        # 按行排列：同名行（折行的各段）依次拼接，折行补齐的空单元格舍去
+        table.orient = "rows"
+        values: Dict[str, List[float]] = {}
+        for r, v in zip(rows, numbers):
+            values.setdefault(r[0], []).extend(x for c, x in zip(r[1:], v[1:]) if c)
+    else:
+        header = rows[0]
+        values = {}
+        for j, name in enumerate(header):
+            values[_unique(name or f"#{j + 1}", values)] = [v[j] for v in numbers[1:]]
+    table.columns = {name: np.array(v, dtype=float) for name, v in values.items()}
+    return table
+
+
+def parse_typst(src: str, lab: str = "") -> List[Table]:
+    """解析typ源码中的全部数据表；重复的键依次加后缀"#2"、"#3"…"""
+    tables: List[Table] = []
+    keys: set = set()
+    for n, (args, label, caption) in enumerate(_iter_tables(src), 1):
+        key = _unique(label or caption or f"#{n}", keys)
+        keys.add(key)
+        tables.append(parse_table(args, lab, key, label, caption))
+    return tables
+
+
+# ---------------------- 持久化索引 ----------------------
+def _index_dir(cache_dir: Optional[PathLike]) -> Path:
+    return Path(cache_dir) if cache_dir else ROOT / CACHE_DIRNAME / INDEX_DIRNAME
+
+
+def _lab_files(root: Path) -> Dict[str, Path]:
+    return {p.stem: p for p in sorted(root.glob(TYPST_GLOB))}
+
+
+def _read_meta(meta_path: Path) -> dict:
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return meta if meta.get("version") == FORMAT_VERSION else {}
+
+
+def _refresh(path: Path, index: Path) -> dict:
+    """保证某个typ文件的索引是最新的，返回其meta"""
+    sys.audit("phylab.input", str(path))  # 命中索引时不读源文件，为phylab.build补记依赖
+    lab = path.stem
+    meta_path = index / f"{lab}.json"
+    meta = _read_meta(meta_path)
+    stat = path.stat()
+    if meta.get("path") == str(path) and meta.get("size") == stat.st_size:
+        if meta.get("mtime_ns") == stat.st_mtime_ns:
+            return meta
+        # 修改时间变了（如重新检出）但内容未变时沿用索引
+        if meta.get("sha1") == file_digest(path):
+            meta["mtime_ns"] = stat.st_mtime_ns
+            write_meta(meta_path, meta)
+            return meta
+
+    digest = file_digest(path)
+    tables = parse_typst(path.read_text(encoding="utf-8"), lab)
+    index.mkdir(parents=True, exist_ok=True)
+    entries = []
+    for n, t in enumerate(tables):
+        filename = f"{lab}-{digest[:8]}-{n}.npz"
+        arrays = {f"c{j}": a for j, a in enumerate(t.columns.values())}
+        atomic_write(index / filename, lambda f, a=arrays: np.savez(f, **a))
+        entries.append({"key": t.key, "label": t.label, "caption": t.caption,
+                        "orient": t.orient, "columns": list(t.columns),
+                        "shape": [len(a) for a in t.columns.values()], "file": filename})
+    old_files = {e["file"] for e in meta.get("tables", [])} if meta.get("path") == str(path) else set()
+    meta = {"version": FORMAT_VERSION, "path": str(path), "lab": lab,
+            "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha1": digest,
+            "tables": entries}
+    write_meta(meta_path, meta)
+    for stale in old_files - {e["file"] for e in entries}:
+        (index / stale).unlink(missing_ok=True)
+    return meta
+
+
+def build_index(root: PathLike = ROOT, cache_dir: Optional[PathLike] = None) -> Dict[str, dict]:
+    """
+    更新全部实验报告的索引（只重新解析内容有变化的文件），返回 {实验名: meta}
+    """
+    index = _index_dir(cache_dir)
+    return {lab: _refresh(path, index) for lab, path in _lab_files(Path(root)).items()}
+
+
+def _resolve(lab: PathLike, root: Path, index: Path) -> Path:
+    lab_path = Path(lab)
+    if lab_path.suffix == ".typ":
+        return lab_path.resolve()
+    meta = _read_meta(index / f"{lab}.json")
+    if meta and Path(meta["path"]).exists():
+        return Path(meta["path"])
+    path = _lab_files(root).get(str(lab))
+    if path is None:
+        raise FileNotFoundError(f"找不到实验'{lab}'的报告（{root / TYPST_GLOB}）")
+    return path
+
+
+@traced("load")
+def load_table(lab: PathLike, key: Union[str, int],
+               root: PathLike = ROOT, cache_dir: Optional[PathLike] = None) -> Table:
+    """
+    从索引读取一张数据表（typ文件变化时先重新解析该文件）
+
+    参数:
+    lab: 实验名（如"lab11"）或typ文件路径
+    key: 表格的键（标签如"table_3"、标题，或"#序号"），也可为从0开始的序号
+    root: 仓库根目录
+    cache_dir: 索引目录，None时使用 仓库根目录/.phylab_cache/typst/
+
+    返回:
+    Table
+    """
+    index = _index_dir(cache_dir)
+    meta = _refresh(_resolve(lab, Path(root), index), index)
+    entries = meta["tables"]
+    if isinstance(key, int):
+        entry = entries[key]
+    else:
+        entry = next((e for e in entries if key in (e["key"], e["label"], e["caption"])), None)
+        if entry is None:
+            raise KeyError(f"{meta['lab']}中没有表格'{key}'，可选：{[e['key'] for e in entries]}")
+    with np.load(index / entry["file"]) as data:
+        columns = {name: data[f"c{j}"] for j, name in enumerate(entry["columns"])}
+    return Table(lab=meta["lab"], key=entry["key"], label=entry["label"],
+                 caption=entry["caption"], orient=entry["orient"], columns=columns)
+
+
+def list_tables(lab: Optional[PathLike] = None, root: PathLike = ROOT,
+                cache_dir: Optional[PathLike] = None) -> List[Tuple[str, str, List[str]]]:
+    """列出 (实验名, 表格键, 列名) ；lab为None时列出全部实验"""
+    index = _index_dir(cache_dir)
+    if lab is None:
+        metas = list(build_index(root, cache_dir).values())
+    else:
+        metas = [_refresh(_resolve(lab, Path(root), index), index)]
+    return [(m["lab"], e["key"], e["columns"]) for m in metas for e in m["tables"]]
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="列出实验报告中的数据表")
+    parser.add_argument("labs", nargs="*", help="实验名（如lab11），默认全部")
+    args = parser.parse_args(argv)
+    for lab in args.labs or [None]:
+        for name, key, columns in list_tables(lab):
+            table = load_table(name, key)
+            print(f"{name} {key} [{table.orient}]")
+            for col in columns:
+                a = table[col]
+                print(f"  {col}: {len(a)}个，有效{np.count_nonzero(~np.isnan(a))}个")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
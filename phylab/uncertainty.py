@@ -0,0 +1,471 @@
+"""
+不确定度传递：分块向量化的蒙特卡洛法（GUM补充文件1）与一阶解析法（GUM不确定度传播律）
+
+- 输入量用分布描述：Normal（正态）、Uniform（均匀，仪器分辨力、允差）、Triangular、
+  StudentT（A类评定，见type_a）、MultiNormal（相关输入，如直线拟合的(k, b)及其协方差），
+  分布相加表示同一量的多个误差来源，如 type_a(读数) + resolution(0, 0.1)
+- 测量模型是普通的NumPy表达式：func(**输入) 的每个参数第一维为抽样序号，
+  返回数组（或{名称: 数组}），第一维同样为抽样序号
+- 10⁶~10⁷次抽样按固定大小分块计算，只累积均值/方差与定宽直方图，内存占用与抽样次数无关；
+  包含区间由直方图插值得到（落在直方图范围外的少量尾部样本单独保存）
+- 解析法在名义值处用中心差分求灵敏系数，合成标准不确定度 u² = Σ J·Σ·Jᵀ；某一输入贡献超过
+  一半方差时，包含因子取该输入分布的包含因子（如均匀分布 √3·p），否则按正态取z；两种方法的包含区间端点相差超过 tol·u 时在结果中注明（GUM-S1第8章的验证方法）
+
+用法：
+    from phylab.uncertainty import Normal, propagate, resolution
+    r = propagate(lambda k: 1e7 / k, {"k": Normal(3.3e-2, 2e-4)}, n=10**6)
+    print(r)          # 平均值 ± 标准不确定度 [包含区间]
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from statistics import NormalDist
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from phylab.trace import traced
+
+CHUNK_ELEMENTS = 1 << 22  # 每块抽样的输入元素总数上限，用于控制内存占用
+BINS = 1 << 14            # 每个输出量的直方图分箱数
+COVERAGE = 0.95
+TOLERANCE = 0.05          # 两种方法包含区间端点之差的容许值（以标准不确定度为单位）
+DOMINANT = 0.5            # 单个输入的方差贡献超过此比例时，解析法的包含因子取该输入分布的包含因子
+
+Array = np.ndarray
+
+
+# ---------------------- 输入分布 ----------------------
+class Distribution(ABC):
+    """
+    输入量分布的抽象基类：value为最佳估计值，std为标准不确定度，sample返回 (n, *shape) 的抽样；
+    子类必须实现std与sample，否则构造时即抛出TypeError
+    """
+    value: Array
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return np.shape(self.value)
+
+    @property
+    @abstractmethod
+    def std(self) -> Array:
+        ...
+
+    @property
+    def covariance(self) -> Array:
+        """展平后各元素的协方差矩阵（默认各元素互不相关）"""
+        return np.diag(np.ravel(self.std) ** 2)
+
+    @abstractmethod
+    def sample(self, rng: np.random.Generator, n: int) -> Array:
+        ...
+
+    def coverage_factor(self, coverage: float) -> float:
+        """包含概率为coverage的对称区间半宽与标准差之比（默认按正态分布）"""
+        return NormalDist().inv_cdf((1 + coverage) / 2)
+
+    def __add__(self, other: "Distribution") -> "Sum":
+        return Sum((self, other))
+
+
+@dataclass(frozen=True, eq=False)
+class Normal(Distribution):
+    """正态分布，sigma为标准差"""
+    value: Array
+    sigma: Array
+
+    @property
+    def std(self) -> Array:
+        return np.broadcast_to(np.asarray(self.sigma, dtype=float), self.shape)
+
+    def sample(self, rng, n):
+        return self.value + self.std * rng.standard_normal((n,) + self.shape)
+
+
+@dataclass(frozen=True, eq=False)
+class Uniform(Distribution):
+    """均匀分布 [value − half_width, value + half_width]，标准差 a/√3"""
+    value: Array
+    half_width: Array
+
+    @property
+    def std(self) -> Array:
+        return np.broadcast_to(np.asarray(self.half_width, dtype=float) / np.sqrt(3), self.shape)
+
+    def coverage_factor(self, coverage):
+        return np.sqrt(3) * coverage
+
+    def sample(self, rng, n):
+        return self.value + self.half_width * rng.uniform(-1.0, 1.0, (n,) + self.shape)
+
+
+@dataclass(frozen=True, eq=False)
+class Triangular(Distribution):
+    """对称三角分布，半宽为half_width，标准差 a/√6"""
+    value: Array
+    half_width: Array
+
+    @property
+    def std(self) -> Array:
+        return np.broadcast_to(np.asarray(self.half_width, dtype=float) / np.sqrt(6), self.shape)
+
+    def coverage_factor(self, coverage):
+        return np.sqrt(6) * (1 - np.sqrt(1 - coverage))
+
+    def sample(self, rng, n):
+        shape = (n,) + self.shape
+        return self.value + self.half_width * (rng.uniform(0, 1, shape) - rng.uniform(0, 1, shape))
+
+
+@dataclass(frozen=True, eq=False)
+class StudentT(Distribution):
+    """缩放平移的t分布：value + scale·t(dof)，dof > 2 时标准差为 scale·√(dof/(dof−2))"""
+    value: Array
+    scale: Array
+    dof: int
+
+    @property
+    def std(self) -> Array:
+        factor = np.sqrt(self.dof / (self.dof - 2)) if self.dof > 2 else np.inf
+        return np.broadcast_to(np.asarray(self.scale, dtype=float) * factor, self.shape)
+
+    def coverage_factor(self, coverage):
+        if self.dof <= 2:
+            return np.inf
+        from scipy.special import stdtrit
+        return float(stdtrit(self.dof, (1 + coverage) / 2)) * np.sqrt((self.dof - 2) / self.dof)
+
+    def sample(self, rng, n):
+        return self.value + self.scale * rng.standard_t(self.dof, (n,) + self.shape)
+
+
+@dataclass(frozen=True, eq=False)
+class MultiNormal(Distribution):
+    """多元正态分布（相关输入），value为一维数组，cov为协方差矩阵"""
+    value: Array
+    cov: Array
+
+    def __post_init__(self):
+        object.__setattr__(self, "value", np.asarray(self.value, dtype=float))
+        object.__setattr__(self, "cov", np.asarray(self.cov, dtype=float))
+        if self.value.ndim != 1 or self.cov.shape != (self.value.size,) * 2:
+            raise ValueError(f"MultiNormal需要一维均值与对应的方阵：{self.value.shape} vs {self.cov.shape}")
+
+    @property
+    def std(self) -> Array:
+        return np.sqrt(np.diag(self.cov))
+
+    @property
+    def covariance(self) -> Array:
+        return self.cov
+
+    def sample(self, rng, n):
+        return rng.multivariate_normal(self.value, self.cov, size=n, method="cholesky")
+
+
+@dataclass(frozen=True, eq=False)
+class Sum(Distribution):
+    """若干独立分布之和（如A类分量加上零均值的分辨力分量）"""
+    parts: Tuple[Distribution, ...]
+
+    @property
+    def value(self) -> Array:
+        return sum(np.asarray(p.value, dtype=float) for p in self.parts)
+
+    @property
+    def std(self) -> Array:
+        return np.sqrt(sum(np.asarray(p.std) ** 2 for p in self.parts))
+
+    @property
+    def covariance(self) -> Array:
+        return sum(p.covariance for p in self.parts)
+
+    def sample(self, rng, n):
+        return sum(p.sample(rng, n) for p in self.parts)
+
+    def __add__(self, other):
+        return Sum(self.parts + (other,))
+
+
+def type_a(samples, axis: int = -1) -> StudentT:
+    """
+    A类评定：重复测量的平均值，按GUM-S1取t分布（自由度n−1，缩放为 s/√n）
+
+    参数:
+    samples: 重复测量值，axis所在维为重复次数
+    """
+    x = np.asarray(samples, dtype=float)
+    n = x.shape[axis]
+    if n < 2:
+        raise ValueError("A类评定至少需要2次重复测量")
+    return StudentT(value=x.mean(axis=axis), scale=x.std(axis=axis, ddof=1) / np.sqrt(n), dof=n - 1)
+
+
+def type_b(value, half_width, dist: str = "uniform") -> Distribution:
+    """B类评定：已知误差限（允差、最大允许误差）的量，dist为"uniform"或"triangular\""""
+    if dist == "uniform":
+        return Uniform(value, half_width)
+    if dist == "triangular":
+        return Triangular(value, half_width)
+    raise ValueError(f"未知的分布：{dist}")
+
+
+def resolution(value, step) -> Uniform:
+    """仪器分辨力（读数的最小分度）引入的均匀分布，半宽为分度的一半"""
+    return Uniform(value, np.asarray(step, dtype=float) / 2)
+
+
+# ---------------------- 结果 ----------------------
+@dataclass
+class Propagation:
+    """
+    一个输出量的不确定度传递结果（数组形状与测量模型的单个输出相同）
+
+    mean, std: 蒙特卡洛抽样的平均值与标准不确定度
+    interval: 概率对称的包含区间 (下限, 上限)，包含概率为coverage
+    value, analytic_std: 名义输入处的模型值与一阶解析法的合成标准不确定度
+    analytic_interval: 解析法的包含区间 value ± k·analytic_std，k为主导输入分布的包含因子，
+                       没有主导输入时按正态取z
+    budget: 各输入量对解析合成不确定度的贡献 {输入名: |J|·u}
+    n: 有效抽样次数（模型值非有限的抽样不计入，个数见n_invalid）
+    notes: 两种方法不一致之处的说明，为空表示在容许范围内一致
+    """
+    mean: Array
+    std: Array
+    interval: Tuple[Array, Array]
+    coverage: float
+    value: Array
+    analytic_std: Array
+    analytic_interval: Tuple[Array, Array]
+    budget: Dict[str, Array]
+    n: int
+    n_invalid: int = 0
+    notes: List[str] = field(default_factory=list)
+
+    @property
+    def agree(self) -> bool:
+        return not self.notes
+
+    def __str__(self) -> str:
+        if np.ndim(self.mean) == 0:
+            lo, hi = self.interval
+            return (f"{self.mean:.6g} ± {self.std:.3g} "
+                    f"[{lo:.6g}, {hi:.6g}]（{self.coverage:.0%}，解析 ± {self.analytic_std:.3g}）")
+        return f"Propagation(shape={np.shape(self.mean)}, n={self.n})"
+
+
+# ---------------------- 流式统计 ----------------------
+class _Accumulator:
+    """按块累积k个输出量的均值、方差（Chan合并公式）与定宽直方图"""
+
+    def __init__(self, k: int, bins: int):
+        self.k = k
+        self.bins = bins
+        self.count = np.zeros(k, dtype=np.int64)
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.lo: Optional[Array] = None
+        self.width: Optional[Array] = None
+        self.hist = np.zeros((k, bins), dtype=np.int64)
+        self.tails: List[List[Array]] = [[] for _ in range(k)]
+
+    def add(self, values: Array) -> None:
+        finite = np.isfinite(values)
+        n_b = finite.sum(axis=0)
+        v = np.where(finite, values, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_b = np.where(n_b > 0, v.sum(axis=0) / np.maximum(n_b, 1), 0.0)
+            m2_b = np.where(finite, (values - mean_b) ** 2, 0.0).sum(axis=0)
+        n_a = self.count
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.mean = np.where(n > 0, self.mean + delta * n_b / np.maximum(n, 1), 0.0)
+            self.m2 = self.m2 + m2_b + np.where(n > 0, delta ** 2 * n_a * n_b / np.maximum(n, 1), 0.0)
+        self.count = n
+
+        if self.lo is None:
+            # 第一块确定直方图范围：覆盖本块全部样本及均值±8σ
+            std = np.sqrt(m2_b / np.maximum(n_b - 1, 1))
+            vmin = np.where(finite, values, np.inf).min(axis=0)
+            vmax = np.where(finite, values, -np.inf).max(axis=0)
+            lo = np.minimum(vmin, mean_b - 8 * std)
+            hi = np.maximum(vmax, mean_b + 8 * std)
+            span = np.where(hi > lo, hi - lo, np.maximum(np.abs(lo), 1.0) * 1e-12)
+            self.lo = lo - 1e-9 * span
+            self.width = span * (1 + 2e-9) / self.bins
+
+        idx = np.floor((values - self.lo) / self.width)
+        inside = finite & (idx >= 0) & (idx < self.bins)
+        flat = (np.arange(self.k) * self.bins + np.where(inside, idx, 0).astype(np.intp))[inside]
+        self.hist += np.bincount(flat, minlength=self.k * self.bins).reshape(self.k, self.bins)
+        outside = finite & ~inside
+        for j in np.flatnonzero(outside.any(axis=0)):
+            self.tails[j].append(values[outside[:, j], j])
+
+    def quantile(self, j: int, p: float) -> float:
+        """第j个输出量的p分位数：尾部样本精确排序，直方图内线性插值"""
+        n = int(self.count[j])
+        if n == 0:
+            return np.nan
+        tails = np.sort(np.concatenate(self.tails[j])) if self.tails[j] else np.zeros(0)
+        below = tails[tails < self.lo[j]]
+        above = tails[tails >= self.lo[j]]
+        target = p * (n - 1)
+        if target < below.size:
+            return float(below[int(target)])
+        cum = np.cumsum(self.hist[j])
+        rest = target - below.size
+        if rest < cum[-1]:
+            b = int(np.searchsorted(cum, rest, side="right"))
+            before = cum[b - 1] if b > 0 else 0
+            frac = (rest - before + 0.5) / self.hist[j, b]
+            return float(self.lo[j] + (b + min(frac, 1.0)) * self.width[j])
+        return float(above[min(int(rest - cum[-1]), above.size - 1)])
+
+
+# ---------------------- 传递 ----------------------
+def _split_inputs(inputs: Dict[str, object]):
+    dists = {k: v for k, v in inputs.items() if isinstance(v, Distribution)}
+    consts = {k: v for k, v in inputs.items() if not isinstance(v, Distribution)}
+    return dists, consts
+
+
+def _flatten_output(out, m: int):
+    """把模型输出整理为 (m, k) 的二维数组，并返回各输出的 (名称, 形状, 列切片)"""
+    items = out.items() if isinstance(out, dict) else [(None, out)]
+    columns, layout, start = [], [], 0
+    for name, arr in items:
+        arr = np.asarray(arr, dtype=float)
+        if arr.ndim == 0 or arr.shape[0] != m:
+            arr = np.broadcast_to(arr, (m,) + arr.shape)
+        shape = arr.shape[1:]
+        size = int(np.prod(shape))
+        columns.append(arr.reshape(m, size))
+        layout.append((name, shape, slice(start, start + size)))
+        start += size
+    return np.concatenate(columns, axis=1), layout
+
+
+def _sensitivity(func, dists, consts, rel_step: float = 1e-3):
+    """名义值处的模型值与各输入的雅可比矩阵（中心差分，步长为该元素标准不确定度的rel_step倍）"""
+    names = list(dists)
+    nominal = {k: np.asarray(d.value, dtype=float) for k, d in dists.items()}
+    sizes = [nominal[k].size for k in names]
+    m = 1 + 2 * sum(sizes)
+    batch = {k: np.broadcast_to(nominal[k], (m,) + nominal[k].shape).copy() for k in names}
+    steps = {}
+    row = 1
+    for k in names:
+        std = np.ravel(dists[k].std)
+        h = np.where(std > 0, std, np.maximum(np.abs(np.ravel(nominal[k])), 1.0) * 1e-8) * rel_step
+        flat = batch[k].reshape(m, -1)
+        for e in range(nominal[k].size):
+            flat[row, e] += h[e]
+            flat[row + 1, e] -= h[e]
+            row += 2
+        steps[k] = h
+    out, layout = _flatten_output(func(**batch, **consts), m)
+    value = out[0]
+    jac, row = {}, 1
+    for k in names:
+        cols = []
+        for e in range(nominal[k].size):
+            cols.append((out[row] - out[row + 1]) / (2 * steps[k][e]))
+            row += 2
+        jac[k] = np.stack(cols, axis=1)  # (输出元素数, 输入元素数)
+    return value, jac, layout
+
+
+@traced("fit")
+def propagate(func: Callable[..., Union[Array, Dict[str, Array]]],
+              inputs: Dict[str, object],
+              n: int = 10 ** 6,
+              coverage: float = COVERAGE,
+              seed: Optional[int] = None,
+              chunk: Optional[int] = None,
+              tol: float = TOLERANCE,
+              bins: int = BINS) -> Union[Propagation, Dict[str, Propagation]]:
+    """
+    蒙特卡洛不确定度传递，并与一阶解析法比较
+
+    参数:
+    func: 向量化的测量模型，参数名与inputs的键对应；每个分布输入的第一维为抽样序号，
+          返回数组（第一维为抽样序号）或{输出名: 数组}
+    inputs: {参数名: 分布或常数}，常数原样传入
+    n: 抽样次数
+    coverage: 包含概率
+    seed: 随机数种子
+    chunk: 每块抽样次数，None时按CHUNK_ELEMENTS与输入元素总数确定
+    tol: 两种方法包含区间端点之差的容许值（以蒙特卡洛标准不确定度为单位）
+    bins: 每个输出量的直方图分箱数，决定包含区间的分辨率（约为16σ/bins）
+
+    返回:
+    Propagation；func返回字典时为 {输出名: Propagation}
+    """
+    dists, consts = _split_inputs(inputs)
+    if not dists:
+        raise ValueError("至少需要一个以分布给出的输入量")
+    rng = np.random.default_rng(seed)
+    if chunk is None:
+        elements = sum(max(int(np.prod(d.shape)), 1) for d in dists.values())
+        chunk = max(1, min(n, CHUNK_ELEMENTS // elements))
+
+    value, jac, layout = _sensitivity(func, dists, consts)
+    acc = _Accumulator(value.size, bins)
+    done = 0
+    while done < n:
+        m = min(chunk, n - done)
+        sample = {k: d.sample(rng, m) for k, d in dists.items()}
+        out, _ = _flatten_output(func(**sample, **consts), m)
+        acc.add(out)
+        done += m
+
+    var = np.zeros(value.size)
+    budget = {}
+    top, top_factor = np.zeros(value.size), np.full(value.size, np.nan)
+    for k, d in dists.items():
+        cov = d.covariance
+        term = np.einsum("oi,ij,oj->o", jac[k], cov, jac[k])
+        budget[k] = np.sqrt(np.maximum(term, 0.0))
+        var += term
+        # 单个输入元素的方差贡献，用于找出主导输入
+        part = (jac[k] ** 2 * np.diag(cov)).max(axis=1, initial=0.0)
+        larger = part > top
+        if np.any(larger):
+            top = np.where(larger, part, top)
+            top_factor = np.where(larger, d.coverage_factor(coverage), top_factor)
+    analytic_std = np.sqrt(var)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dominant = top > DOMINANT * var
+    z = np.where(dominant, top_factor, NormalDist().inv_cdf((1 + coverage) / 2))
+    std = np.sqrt(acc.m2 / np.maximum(acc.count - 1, 1))
+    lo = np.array([acc.quantile(j, (1 - coverage) / 2) for j in range(value.size)])
+    hi = np.array([acc.quantile(j, (1 + coverage) / 2) for j in range(value.size)])
+    a_lo, a_hi = value - z * analytic_std, value + z * analytic_std
+
+    results = {}
+    for name, shape, cols in layout:
+        def pick(a):
+            a = a[cols].reshape(shape)
+            return float(a) if a.ndim == 0 else a
+
+        notes = []
+        d_lo = np.abs(lo[cols] - a_lo[cols])
+        d_hi = np.abs(hi[cols] - a_hi[cols])
+        bad = np.maximum(d_lo, d_hi) > tol * std[cols]
+        if np.any(bad):
+            where = "" if not shape else f"（{int(bad.sum())}/{bad.size}个元素）"
+            notes.append(f"包含区间端点相差超过{tol:g}u{where}，输出分布偏离正态或模型非线性不可忽略")
+        ratio = analytic_std[cols] / np.where(std[cols] > 0, std[cols], np.nan)
+        if np.any(np.abs(ratio - 1) > tol):
+            notes.append(f"解析/蒙特卡洛标准不确定度之比为{np.nanmin(ratio):.3g}~{np.nanmax(ratio):.3g}")
+        bias = np.abs(acc.mean[cols] - value[cols]) / np.where(std[cols] > 0, std[cols], np.nan)
+        if np.any(bias > tol):
+            notes.append(f"抽样平均值偏离名义模型值{np.nanmax(bias):.3g}u")
+        results[name] = Propagation(
+            mean=pick(acc.mean), std=pick(std), interval=(pick(lo), pick(hi)), coverage=coverage,
+            value=pick(value), analytic_std=pick(analytic_std), analytic_interval=(pick(a_lo), pick(a_hi)),
+            budget={k: pick(b) for k, b in budget.items()},
+            n=int(acc.count.min()), n_invalid=int(n - acc.count.min()), notes=notes)
+    return results[None] if list(results) == [None] else results
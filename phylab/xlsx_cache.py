@@ -0,0 +1,198 @@
+"""
+实验数据.xlsx 的按列读取与磁盘缓存
+
+- 以openpyxl只读（流式）模式打开工作簿，只保留需要的列
+- 每列保存为一个 .npy 文件，之后以内存映射方式加载，毫秒级完成
+- 缓存按 (文件路径, 工作表) 分目录存放，并记录文件的修改时间、大小和内容哈希；
+  只有工作簿确实变化时才会重新打开解析
+
+缓存默认位于工作簿所在目录的 .phylab_cache/ 下（已加入.gitignore）。
+file_digest、atomic_write、write_meta 供其他按文件缓存的模块（如typst_tables）共用。
+"""
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from phylab.trace import traced
+
+CACHE_DIRNAME = ".phylab_cache"
+PathLike = Union[str, Path]
+
+
+class MissingColumnsError(KeyError):
+    """工作表缺少所需列，missing属性为缺少的列名列表"""
+
+    def __init__(self, sheet_name: str, missing: Sequence[str]):
+        super().__init__(f"工作表'{sheet_name}'缺少列：{list(missing)}")
+        self.missing = list(missing)
+
+
+def file_digest(path: Path) -> str:
+    """文件内容的SHA-1，用于判断缓存是否过期"""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _entry_dir(path: Path, sheet_name: str, transposed: bool,
+               cache_dir: Optional[PathLike]) -> Path:
+    root = Path(cache_dir) if cache_dir else path.parent / CACHE_DIRNAME
+    key = hashlib.sha1(f"{path}\0{sheet_name}\0{int(transposed)}".encode("utf-8")).hexdigest()[:16]
+    return root / f"{path.stem}-{key}"
+
+
+def _to_float(value) -> float:
+    """数值单元格转为float，文本（如'#DIV/0!'、'∞'）和空单元格记为NaN"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return np.nan
+
+
+def _parse_sheet(path: Path, sheet_name: str, columns: Sequence[str],
+                 transposed: bool) -> Dict[str, np.ndarray]:
+    """流式读取工作表，只收集需要的列（transposed=True时为行）"""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet_name not in wb.sheetnames:
+            raise ValueError(f"工作表'{sheet_name}'不存在，可选：{wb.sheetnames}")
+        rows = wb[sheet_name].iter_rows(values_only=True)
+        wanted = set(columns)
+        if transposed:
+            # 每行第一个单元格为名称，其余为数据
+            data = {}
+            for row in rows:
+                if row and row[0] in wanted and row[0] not in data:
+                    data[row[0]] = np.array([_to_float(v) for v in row[1:]], dtype=float)
+        else:
+            header = next(rows, ())
+            index = {}
+            for i, name in enumerate(header):
+                if name in wanted and name not in index:
+                    index[name] = i
+            values: Dict[str, List[float]] = {name: [] for name in index}
+            for row in rows:
+                for name, i in index.items():
+                    values[name].append(_to_float(row[i]) if i < len(row) else np.nan)
+            data = {name: np.array(v, dtype=float) for name, v in values.items()}
+    finally:
+        wb.close()
+
+    missing = [c for c in columns if c not in data]
+    if missing:
+        raise MissingColumnsError(sheet_name, missing)
+    return data
+
+
+def atomic_write(target: Path, write) -> None:
+    """先写临时文件再替换，多个进程同时写同一缓存也不会读到半个文件"""
+    fd, tmp = tempfile.mkstemp(dir=target.parent, suffix=target.suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def write_meta(meta_path: Path, meta: dict) -> None:
+    """原子地写入缓存目录的meta.json"""
+    data = json.dumps(meta, ensure_ascii=False, indent=1).encode("utf-8")
+    atomic_write(meta_path, lambda f: f.write(data))
+
+
+@traced("load")
+def read_columns(excel_path: PathLike,
+                 columns: Sequence[str],
+                 sheet_name: str = "Sheet1",
+                 transposed: bool = False,
+                 cache_dir: Optional[PathLike] = None,
+                 mmap: bool = True) -> Dict[str, np.ndarray]:
+    """
+    读取工作表中的若干数值列，优先使用磁盘缓存
+
+    参数:
+    excel_path: 工作簿路径
+    columns: 列名列表（第一行表头；transposed=True时为每行第一个单元格）
+    sheet_name: 工作表名
+    transposed: 数据按行排列时设为True（如lab01的实验数据.xlsx）
+    cache_dir: 缓存根目录，None时使用工作簿所在目录下的 .phylab_cache/
+    mmap: 以只读内存映射方式返回数组
+
+    返回:
+    {列名: float数组}，非数值单元格为NaN
+    """
+    path = Path(excel_path).resolve()
+    if not path.exists():
+        raise FileNotFoundError(f"Excel文件不存在：{excel_path}")
+    sys.audit("phylab.input", str(path))  # 命中缓存时不打开工作簿，为phylab.build补记依赖
+    stat = path.stat()
+    entry = _entry_dir(path, sheet_name, transposed, cache_dir)
+    meta_path = entry / "meta.json"
+
+    meta = {}
+    if meta_path.exists():
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except ValueError:
+            meta = {}
+    stored = meta.get("columns", {})
+
+    digest = meta.get("sha1")
+    fresh = meta.get("mtime_ns") == stat.st_mtime_ns and meta.get("size") == stat.st_size
+    if meta and not fresh and meta.get("size") == stat.st_size:
+        # 修改时间变了（如重新检出）但内容未变时沿用缓存
+        digest = file_digest(path)
+        fresh = digest == meta.get("sha1")
+        if fresh:
+            meta["mtime_ns"] = stat.st_mtime_ns
+            write_meta(meta_path, meta)
+    if not fresh:
+        stored = {}
+        digest = None
+
+    needed = [c for c in columns if c not in stored]
+    if needed:
+        parsed = _parse_sheet(path, sheet_name, needed, transposed)
+        entry.mkdir(parents=True, exist_ok=True)
+        for name, arr in parsed.items():
+            filename = f"col{len(stored)}.npy"
+            atomic_write(entry / filename, lambda f, a=arr: np.save(f, a))
+            stored[name] = filename
+        meta = {"path": str(path), "sheet": sheet_name, "transposed": transposed,
+                "mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+                "sha1": digest or file_digest(path),
+                "columns": stored}
+        write_meta(meta_path, meta)
+
+    mode = "r" if mmap else None
+    return {name: np.load(entry / stored[name], mmap_mode=mode) for name in columns}
+
+
+def clear_cache(excel_path: PathLike, cache_dir: Optional[PathLike] = None) -> int:
+    """删除某个工作簿的全部缓存，返回删除的文件数"""
+    path = Path(excel_path).resolve()
+    root = Path(cache_dir) if cache_dir else path.parent / CACHE_DIRNAME
+    removed = 0
+    for entry in root.glob(f"{path.stem}-*"):
+        meta_path = entry / "meta.json"
+        try:
+            if json.loads(meta_path.read_text(encoding="utf-8")).get("path") != str(path):
+                continue
+        except (OSError, ValueError):
+            continue
+        for f in entry.iterdir():
+            f.unlink()
+            removed += 1
+        entry.rmdir()
+    return removed
@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from phylab.hysteresis import zero_crossings
+
+
+def test_cubic_falls_back_to_linear_on_flat_zero_run():
+    """0的连续段比4点模板更长时，三次插值不外推，与线性插值结果一致"""
+    y = np.array([3.0, 2.0, 1.0, 0, 0, 0, 0, 0, 0, -1.0, -2.0, -3.0, -2.0, 1.0, 4.0])
+    other = np.linspace(-1, 1, y.size) ** 3
+    linear = zero_crossings(y, other, order=1)
+    cubic = zero_crossings(y, other, order=3)
+    np.testing.assert_array_equal(cubic.direction, [-1, 1])
+    assert cubic.position[0] == linear.position[0] == 5.5
+    assert cubic.value[0] == linear.value[0]
+    assert 12 < cubic.position[1] < 13
+
+
+def test_cubic_matches_smooth_signal():
+    x = np.linspace(0, 4 * np.pi, 50)
+    c = zero_crossings(np.sin(x), np.cos(x), order=3)
+    root = np.interp(c.position, np.arange(x.size), x)
+    np.testing.assert_allclose(root, [np.pi, 2 * np.pi, 3 * np.pi], atol=1e-4)
+    np.testing.assert_allclose(np.abs(c.value), 1, atol=1e-3)
@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from phylab.plateau import find_plateaus
+
+
+def test_mixed_batch_keeps_rows_aligned():
+    """含NaN读数或没有平台区的扫描不影响同一批中其他扫描的结果"""
+    x = np.arange(7.0)
+    B = [[1, 2, 3, 3, 3, 2, 1],
+         [1, np.nan, 3, 2, 3, 3, 3],
+         [np.nan] * 7]
+    p = find_plateaus(x, B, 0.01)
+    np.testing.assert_array_equal(p.start[:2], [2, 4])
+    np.testing.assert_array_equal(p.end[:2], [4, 6])
+    np.testing.assert_array_equal(p.x_start[:2], [2.0, 4.0])
+    np.testing.assert_array_equal(p.mean[:2], [3.0, 3.0])
+    np.testing.assert_array_equal(p.ripple[:2], [0.0, 0.0])
+    for name in ("start", "end", "x_start", "x_end", "peak", "mean", "ripple"):
+        assert np.isnan(getattr(p, name)[2]), name
+
+
+def test_single_scan_matches_batch_row():
+    x = np.linspace(0, 1, 9)
+    B = np.array([1, 2, 3, 3.01, 3, 2.5, 3, 3, 1])
+    single = find_plateaus(x, B, 0.01)
+    batch = find_plateaus(x, [B, B], 0.01)
+    assert (single.start, single.end) == (2, 4)
+    assert single.mean == batch.mean[1]